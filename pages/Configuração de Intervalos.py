@@ -2,10 +2,19 @@
 
 import streamlit as st
 import json
+import hashlib
+import io
+import plotly.express as px
 import os
 import pandas as pd
-from utils.fileHandler import FileHandler, atribuir_servidor_melhorado, formatar_numero_processo
-from utils.cache_utils import carregar_config, salvar_config, obter_config_session_state, atualizar_config
+from utils.fileHandler import FileHandler, ColunaNaoEncontrada, TIPOS_ACEITOS, tipo_arquivo, atribuir_servidor_melhorado, formatar_numero_processo
+from utils.derived_columns import ColunasDerivadas
+from utils.quality_utils import RelatorioQualidade, SEM_DIGITO, DIGITO_NAO_CONFIGURADO
+from utils.config_utils import validar_configuracao, nomes_repetidos
+from utils.cache_utils import CacheManager, carregar_config, salvar_config, obter_config_session_state, atualizar_config, obter_sessao_id, usar_coluna_detectada, exibir_aviso_coluna_detectada, selecionar_abas
+from utils.disk_cache import CacheDisco
+from utils.shared_cache import cache_compartilhado
+from utils.interval_utils import histograma_digitos, pesos_processos, carga_por_servidor, configuracao_otimizada, avaliar_configuracoes, gerar_variantes
 
 # Configuração da página com título personalizado
 st.set_page_config(
@@ -86,52 +95,86 @@ if numero_teste:
 st.sidebar.subheader("Configuração de Servidores")
 servidores = configuracao["intervalos_servidores"]
 
-# Listar servidores e intervalos
-for servidor, intervalos in list(servidores.items()):
-    with st.sidebar.expander(f"Servidor: {servidor}"):
-        # Permite editar nome do servidor
-        novo_nome = st.text_input(
-            f"Editar nome do servidor ({servidor}):", 
-            value=servidor, 
-            key=f"edit_{servidor}"
-        )
-        if novo_nome != servidor:
-            servidores[novo_nome] = servidores.pop(servidor)
-            servidor = novo_nome
-
-        # Mostrar e editar intervalos
-        for i, intervalo in enumerate(intervalos):
-            min_val, max_val = st.columns(2)
-            intervalo[0] = min_val.number_input(
-                f"Intervalo {i + 1} - Mín:", 
-                value=intervalo[0], 
-                key=f"min_{servidor}_{i}"
-            )
-            intervalo[1] = max_val.number_input(
-                f"Intervalo {i + 1} - Máx:", 
-                value=intervalo[1], 
-                key=f"max_{servidor}_{i}"
+# As edições ficam em um formulário: a página só é recalculada ao aplicar.
+# A versão entra nas chaves dos campos para que eles acompanhem a configuração
+# quando ela muda por outro caminho (importação, intervalos otimizados).
+versao_servidores = hashlib.md5(json.dumps(servidores, sort_keys=True).encode()).hexdigest()[:8]
+
+with st.sidebar.form("form_intervalos_servidores"):
+    edicoes_servidores = {}
+    for servidor, intervalos in servidores.items():
+        with st.expander(f"Servidor: {servidor}"):
+            # Permite editar nome do servidor
+            novo_nome = st.text_input(
+                f"Editar nome do servidor ({servidor}):", 
+                value=servidor, 
+                key=f"edit_{servidor}_{versao_servidores}"
             )
 
+            # Mostrar e editar intervalos
+            novos_intervalos = []
+            for i, intervalo in enumerate(intervalos):
+                min_val, max_val = st.columns(2)
+                inicio = min_val.number_input(
+                    f"Intervalo {i + 1} - Mín:", 
+                    value=int(intervalo[0]), 
+                    key=f"min_{servidor}_{i}_{versao_servidores}"
+                )
+                fim = max_val.number_input(
+                    f"Intervalo {i + 1} - Máx:", 
+                    value=int(intervalo[1]), 
+                    key=f"max_{servidor}_{i}_{versao_servidores}"
+                )
+                novos_intervalos.append([int(inicio), int(fim)])
+            edicoes_servidores[servidor] = (novo_nome.strip() or servidor, novos_intervalos)
+
+    aplicar_servidores = st.form_submit_button(
+        "✅ Aplicar alterações", 
+        disabled=st.session_state.is_processing
+    )
+
+if aplicar_servidores:
+    # Dois servidores com o mesmo nome: um deles perderia os intervalos
+    repetidos = nomes_repetidos([nome for nome, _ in edicoes_servidores.values()])
+    if repetidos:
+        st.sidebar.error(f"❌ Nomes de servidor repetidos: {', '.join(repetidos)}. Nenhuma alteração foi aplicada.")
+    else:
+        st.session_state.is_processing = True
+        novos_servidores = {nome: intervalos for nome, intervalos in edicoes_servidores.values()}
+        servidores.clear()
+        servidores.update(novos_servidores)
+        atualizar_config({"intervalos_servidores": servidores})
+        st.session_state.is_processing = False
+        st.rerun()
+
+# Incluir intervalos e remover servidores muda a estrutura do formulário,
+# por isso esses botões ficam fora dele
+with st.sidebar.expander("Gerenciar servidores"):
+    servidor_gerenciado = st.selectbox(
+        "Servidor:", 
+        options=list(servidores.keys()), 
+        key="servidor_gerenciado"
+    )
+    if servidor_gerenciado is not None:
         # Adicionar um novo intervalo
         if st.button(
-            f"Adicionar intervalo para {servidor}", 
+            f"Adicionar intervalo para {servidor_gerenciado}", 
             disabled=st.session_state.is_processing, 
-            key=f"add_interval_{servidor}"
+            key="add_interval"
         ):
             st.session_state.is_processing = True
-            intervalos.append([0, 0])
+            servidores[servidor_gerenciado].append([0, 0])
             st.session_state.is_processing = False
             st.rerun()
 
         # Remover o servidor
         if st.button(
-            f"Remover servidor {servidor}", 
+            f"Remover servidor {servidor_gerenciado}", 
             disabled=st.session_state.is_processing, 
-            key=f"remove_server_{servidor}"
+            key="remove_server"
         ):
             st.session_state.is_processing = True
-            del servidores[servidor]
+            del servidores[servidor_gerenciado]
             st.session_state.is_processing = False
             st.rerun()
 
@@ -248,22 +291,28 @@ st.dataframe(df_distribuicao, use_container_width=True)
 # Upload de arquivo
 st.subheader("📁 Processar Arquivo")
 uploaded_file = st.file_uploader(
-    "Envie sua planilha (Excel ou CSV)", 
-    type=["xlsx", "csv"]
+    "Envie sua planilha (Excel, CSV ou Parquet; CSV também compactado)", 
+    type=TIPOS_ACEITOS
 )
+abas = selecionar_abas(uploaded_file, "intervalos_abas", local=st)
 
-if uploaded_file:
-    try:
-        file_type = "xlsx" if uploaded_file.name.endswith(".xlsx") else "csv"
-        
-        # Usar FileHandler para ler e pré-processar o arquivo
-        df = FileHandler.read_file(uploaded_file, file_type, obter_config_session_state())
+def exibir_erro_arquivo(e: Exception):
+    """Mostra o erro de processamento do arquivo"""
+    st.error(f"❌ Erro ao processar o arquivo: {e}")
+    if isinstance(e, ColunaNaoEncontrada) and e.sugestoes:
+        st.info(f"💡 Colunas parecidas no arquivo: {', '.join(map(str, e.sugestoes))}. Ajuste o nome da coluna no sidebar.")
+    st.write("**Possíveis soluções:**")
 
-        # Atribuir servidores
-        df['Servidor'] = df['Dígito'].apply(
-            lambda x: atribuir_servidor(x, obter_config_session_state())
-        )
-        
+
+@st.fragment
+def exibir_processamento(derivadas: ColunasDerivadas):
+    """
+    Análise do arquivo enviado.
+
+    Executada como fragmento: os controles desta seção (formato, critério de
+    carga) recalculam só a análise, sem reler o arquivo.
+    """
+    try:
         # Adicionar formatação personalizada
         formato_escolhido = st.selectbox(
             "Escolha o formato para a coluna 'Número Formatado':",
@@ -272,9 +321,26 @@ if uploaded_file:
             index=0
         )
         
-        df['Número Formatado'] = df[coluna_processos].apply(
-            lambda x: formatar_numero_processo(x, formato_escolhido)
+        # Atribuir servidores e formatar números: cada coluna só é recalculada
+        # quando a configuração de que depende muda
+        params_derivadas = {
+            "coluna_processos": coluna_processos,
+            "intervalos_servidores": obter_config_session_state()["intervalos_servidores"],
+            "ano_meta2": obter_config_session_state().get("ano_meta2", 2018),
+            "formato": formato_escolhido
+        }
+        df = derivadas.materializar(["Servidor", "Número Formatado"], params_derivadas)
+        
+        # Problemas por linha, calculados de uma vez para o arquivo inteiro
+        qualidade = derivadas.agregado(
+            "qualidade",
+            ["Dígito", "Ano Processo", "Servidor"],
+            lambda digitos, anos, _servidores: RelatorioQualidade(
+                derivadas.df[coluna_processos], digitos, anos, params_derivadas["intervalos_servidores"]
+            ),
+            params_derivadas
         )
+        sem_servidor = qualidade.mascara(SEM_DIGITO | DIGITO_NAO_CONFIGURADO)
 
         st.success("✅ Arquivo processado com sucesso!")
         
@@ -283,12 +349,10 @@ if uploaded_file:
         with col1:
             st.metric("Total de Processos", len(df))
         with col2:
-            digitos_identificados = (df['Dígito'] != 0).sum()
+            digitos_identificados = len(df) - qualidade.contar(SEM_DIGITO)
             st.metric("Dígitos Identificados", digitos_identificados)
         with col3:
-            servidores_atribuidos = df[
-                ~df['Servidor'].str.contains('não', case=False, na=False)
-            ]['Servidor'].nunique()
+            servidores_atribuidos = df.loc[~sem_servidor, 'Servidor'].nunique()
             st.metric("Servidores Atribuídos", servidores_atribuidos)
         with col4:
             digitos_unicos = df[df['Dígito'] != 0]['Dígito'].nunique()
@@ -305,15 +369,20 @@ if uploaded_file:
         st.dataframe(distribuicao_df)
         
         # Mostrar problemas se houver
-        problemas = df[df['Servidor'].str.contains('não', case=False, na=False)]
-        if len(problemas) > 0:
-            with st.expander(f"⚠️ {len(problemas)} processos com problemas"):
-                st.dataframe(problemas[[coluna_processos, 'Dígito', 'Servidor']])
+        resumo_qualidade = qualidade.resumo()
+        if len(resumo_qualidade) > 0:
+            with st.expander(f"⚠️ {int((qualidade.codigos != 0).sum())} processos com problemas"):
+                st.dataframe(resumo_qualidade[["Problema", "Processos", "Percentual"]])
                 
                 # Mostrar exemplos de números problemáticos
-                st.write("**Exemplos de números problemáticos:**")
-                for numero in problemas[coluna_processos].head(3):
-                    st.code(numero)
+                exemplos = qualidade.exemplos(
+                    df.assign(Problemas=qualidade.descricoes()),
+                    [coluna_processos, 'Dígito', 'Servidor', 'Problemas'],
+                    linhas=3
+                )
+                for problema, exemplo in exemplos.items():
+                    st.write(f"**Exemplos - {problema}:**")
+                    st.dataframe(exemplo)
         
         # Análise de dígitos encontrados
         st.subheader("🔍 Análise de Dígitos Encontrados")
@@ -332,6 +401,77 @@ if uploaded_file:
                 st.write(f"• Dígito mais comum: {digitos_encontrados.index[0]} ({digitos_encontrados.iloc[0]} vezes)")
                 st.write(f"• Amplitude: {digitos_encontrados.index.max() - digitos_encontrados.index.min()}")
         
+        # Otimização dos intervalos pela carga real do arquivo
+        st.subheader("⚖️ Otimizar Intervalos pela Carga")
+        st.write("Calcula intervalos contíguos de dígitos que minimizam a maior carga entre os servidores.")
+        
+        criterio_peso = st.radio(
+            "Critério de carga:",
+            options=["quantidade", "tarefa", "meta2"],
+            format_func=lambda x: {
+                "quantidade": "Quantidade de processos",
+                "tarefa": "Peso por tarefa (nomeTarefa)",
+                "meta2": "Peso maior para processos Meta 2"
+            }[x],
+            horizontal=True
+        )
+        
+        pesos = None
+        if criterio_peso == "tarefa":
+            if "nomeTarefa" in df.columns:
+                tarefas_prioritarias = st.multiselect(
+                    "Tarefas com peso diferenciado:",
+                    options=df["nomeTarefa"].dropna().value_counts().index.tolist()
+                )
+                peso_tarefa = st.number_input("Peso dessas tarefas:", min_value=0.0, value=2.0, step=0.5)
+                pesos = pesos_processos(df, pesos_tarefa={tarefa: peso_tarefa for tarefa in tarefas_prioritarias})
+            else:
+                st.warning("A coluna 'nomeTarefa' não foi encontrada.")
+        elif criterio_peso == "meta2":
+            ano_meta2_config = params_derivadas["ano_meta2"]
+            peso_meta2 = st.number_input(
+                f"Peso dos processos Meta 2 (anteriores a {ano_meta2_config}):",
+                min_value=0.0,
+                value=2.0,
+                step=0.5
+            )
+            anos = derivadas.get("Ano Processo", params_derivadas)
+            meta2 = pd.to_numeric(anos, errors="coerce") < ano_meta2_config
+            pesos = pesos_processos(df, meta2=meta2, peso_meta2=peso_meta2)
+        
+        histograma = histograma_digitos(df['Dígito'], pesos)
+        config_atual = obter_config_session_state()
+        config_otimizada = configuracao_otimizada(config_atual, histograma)
+        
+        carga_atual = carga_por_servidor(histograma, config_atual["intervalos_servidores"])
+        carga_otimizada = carga_por_servidor(histograma, config_otimizada["intervalos_servidores"])
+        comparacao = pd.DataFrame({
+            "Servidor": carga_atual.index,
+            "Intervalos Atuais": [str(config_atual["intervalos_servidores"][srv]) for srv in carga_atual.index],
+            "Carga Atual": carga_atual.round(1).values,
+            "Intervalos Otimizados": [str(config_otimizada["intervalos_servidores"][srv]) for srv in carga_atual.index],
+            "Carga Otimizada": carga_otimizada.round(1).values
+        })
+        st.dataframe(comparacao, use_container_width=True)
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("Maior carga atual", f"{carga_atual.max():.1f}" if len(carga_atual) else "0")
+        with col2:
+            st.metric(
+                "Maior carga otimizada",
+                f"{carga_otimizada.max():.1f}" if len(carga_otimizada) else "0",
+                delta=f"{carga_otimizada.max() - carga_atual.max():.1f}" if len(carga_atual) else None,
+                delta_color="inverse"
+            )
+        
+        if st.button("✅ Aplicar intervalos otimizados", key="aplicar_otimizacao"):
+            if CacheManager.salvar_configuracao(config_otimizada):
+                st.success("Configuração otimizada salva!")
+                st.rerun()
+            else:
+                st.error("❌ Erro ao salvar configuração")
+        
         # Análise de formatação
         st.subheader("🔧 Análise de Formatação")
         
@@ -358,18 +498,128 @@ if uploaded_file:
         df_display = df[colunas_importantes + outras_colunas]
         st.dataframe(df_display)
 
-        # Opção para download
-        output_file = "arquivo_processado.xlsx"
-        df.to_excel(output_file, index=False)
+        # Download do arquivo processado, gerado apenas quando pedido
+        assinatura_download = (
+            st.session_state.intervalos_arquivo_chave,
+            derivadas.assinatura("Servidor", params_derivadas),
+            derivadas.assinatura("Número Formatado", params_derivadas)
+        )
+        if st.button("📦 Preparar arquivo processado", key="preparar_download_intervalos"):
+            with st.spinner("Gerando planilha..."):
+                buffer = io.BytesIO()
+                df.to_excel(buffer, index=False, engine="openpyxl")
+            st.session_state.intervalos_download = (assinatura_download, buffer.getvalue())
         
-        with open(output_file, "rb") as f:
+        download = st.session_state.get("intervalos_download")
+        if download is not None and download[0] == assinatura_download:
             st.download_button(
                 label="📥 Baixar arquivo processado",
-                data=f,
+                data=download[1],
                 file_name="arquivo_processado.xlsx",
                 mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
             )
             
     except Exception as e:
-        st.error(f"❌ Erro ao processar o arquivo: {e}")
-        st.write("**Possíveis soluções:**")
\ No newline at end of file
+        exibir_erro_arquivo(e)
+
+
+if uploaded_file:
+    exibir_aviso_coluna_detectada()
+    try:
+        file_type = tipo_arquivo(uploaded_file.name)
+        
+        # Ler o arquivo apenas quando o arquivo, as abas ou a coluna de processos mudam
+        chave_arquivo = (uploaded_file.name, uploaded_file.size, coluna_processos, abas)
+        if st.session_state.get("intervalos_arquivo_chave") != chave_arquivo:
+            # Usar FileHandler para ler e pré-processar o arquivo, compartilhando a
+            # leitura e as colunas calculadas com outras sessões do mesmo arquivo
+            hash_conteudo = CacheDisco.hash_arquivo(uploaded_file)
+            chave_base = ("arquivo", hash_conteudo, file_type, coluna_processos, abas)
+            compartilhado = cache_compartilhado()
+            df_base = compartilhado.obter(
+                chave_base,
+                lambda: FileHandler.read_file(
+                    uploaded_file, file_type,
+                    {"coluna_processos": coluna_processos, "hash_conteudo": hash_conteudo, "abas": abas}
+                ),
+                obter_sessao_id(),
+                vaga="intervalos"
+            )
+            st.session_state.intervalos_colunas_derivadas = ColunasDerivadas(
+                df_base, compartilhado=compartilhado, prefixo=chave_base, sessao=obter_sessao_id()
+            )
+            st.session_state.intervalos_arquivo_chave = chave_arquivo
+            st.session_state.intervalos_download = None
+            
+            # Histograma sem pesos, reaproveitado na comparação de configurações
+            st.session_state.histograma_digitos = histograma_digitos(df_base['Dígito'])
+        
+        exibir_processamento(st.session_state.intervalos_colunas_derivadas)
+        
+    except Exception as e:
+        if not usar_coluna_detectada(e):
+            exibir_erro_arquivo(e)
+
+# =============================
+# Comparação de várias configurações
+# =============================
+if st.session_state.get("histograma_digitos") is not None:
+    st.subheader("🧪 Comparar Configurações")
+    st.write("Avalia várias configurações de intervalos contra a distribuição de dígitos do último arquivo processado.")
+    
+    configuracoes_enviadas = st.file_uploader(
+        "Configurações candidatas (JSON no formato do config.json)",
+        type=["json"],
+        accept_multiple_files=True,
+        key="configuracoes_candidatas"
+    )
+    gerar_candidatas = st.checkbox("Gerar variantes automaticamente (otimizada, sem cada servidor, com novos servidores)", value=True)
+    novos_servidores = st.text_input("Novos servidores para simular (separados por vírgula):", key="novos_servidores_simulacao")
+    
+    config_referencia = obter_config_session_state()
+    histograma_arquivo = st.session_state.histograma_digitos
+    candidatas = {"Atual": config_referencia}
+    
+    for arquivo in configuracoes_enviadas or []:
+        try:
+            conteudo = json.loads(arquivo.getvalue().decode("utf-8"))
+            if "intervalos_servidores" not in conteudo:
+                conteudo = {"intervalos_servidores": conteudo}
+            problemas = validar_configuracao({**config_referencia, **conteudo})
+            if problemas:
+                st.error(f"❌ Configuração inválida em {arquivo.name}: " + "; ".join(problemas))
+                continue
+            candidatas[arquivo.name] = conteudo
+        except Exception as e:
+            st.error(f"❌ Erro ao ler {arquivo.name}: {e}")
+    
+    if gerar_candidatas:
+        candidatas.update(gerar_variantes(
+            config_referencia,
+            histograma_arquivo,
+            [nome.strip() for nome in novos_servidores.split(",") if nome.strip()]
+        ))
+    
+    avaliacao = avaliar_configuracoes(histograma_arquivo, candidatas, config_referencia)
+    st.dataframe(avaliacao["resumo"].round(2), use_container_width=True)
+    
+    fig = px.bar(avaliacao["cargas"], x="Configuração", y="Carga", color="Servidor",
+                 barmode="group", title="Carga por servidor em cada configuração")
+    st.plotly_chart(fig, use_container_width=True)
+    
+    escolhida = st.selectbox("Configuração para aplicar:", options=list(candidatas.keys()), key="configuracao_escolhida")
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button(
+            label="📥 Baixar configuração escolhida",
+            data=json.dumps({**config_referencia, **candidatas[escolhida]}, indent=4, ensure_ascii=False),
+            file_name=f"config_{escolhida}.json".replace(" ", "_"),
+            mime="application/json"
+        )
+    with col2:
+        if st.button("✅ Aplicar configuração escolhida", disabled=escolhida == "Atual"):
+            if CacheManager.salvar_configuracao({**config_referencia, **candidatas[escolhida]}):
+                st.success(f"Configuração '{escolhida}' aplicada!")
+                st.rerun()
+            else:
+                st.error("❌ Erro ao salvar configuração")
@@ -3,12 +3,22 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from utils.fileHandler import FileHandler, diagnosticar_arquivo, extrair_ano_processo_melhorado, classificar_meta2_melhorado, atribuir_servidor_melhorado, formatar_numero_processo
-from utils.cache_utils import carregar_config, salvar_config, obter_config_session_state, atualizar_config
+from utils.fileHandler import FileHandler, ColunaNaoEncontrada, TIPOS_ACEITOS, tipo_arquivo, diagnosticar_arquivo, extrair_ano_processo_melhorado, formatar_numero_processo
+from utils.profile_utils import ColumnProfiler
+from utils.derived_columns import ColunasDerivadas, COLUNAS_EXPORTACAO, COLUNAS_REMOCAO_PADRAO
+from utils.meta2_utils import HistogramaAnos
+from utils.quality_utils import RelatorioQualidade, SEM_DIGITO
+from utils.cache_utils import carregar_config, salvar_config, obter_config_session_state, atualizar_config, obter_sessao_id, usar_coluna_detectada, exibir_aviso_coluna_detectada, selecionar_abas
+from utils.disk_cache import CacheDisco
+from utils.config_utils import nomes_repetidos
+from utils.shared_cache import cache_compartilhado
+from utils.memory_utils import relatorio_memoria
+from utils.excel_utils import relatorio_leitura_excel
 import json
 import os
 import re
 import io
+import hashlib
 
 # =============================
 # Configuração da página
@@ -33,7 +43,11 @@ utilizando a extensão PJe R+.
 # Sidebar: Upload e Configurações Gerais
 # =============================
 st.sidebar.header(":open_file_folder: Upload e Configurações")
-uploaded_file = st.sidebar.file_uploader("Envie o arquivo de processos (CSV ou Excel)", type=["csv", "xlsx"])
+uploaded_file = st.sidebar.file_uploader(
+    "Envie o arquivo de processos (CSV, Excel ou Parquet; CSV também compactado em .zip/.gz)",
+    type=TIPOS_ACEITOS
+)
+abas = selecionar_abas(uploaded_file, "dashboard_abas")
 
 # =============================
 # Configuração com cache
@@ -49,32 +63,51 @@ atualizar_config({"coluna_processos": coluna_processos})
 st.sidebar.subheader(":busts_in_silhouette: Configuração dos Servidores")
 servidores = configuracao["intervalos_servidores"]
 
-# Variável para controlar mudanças nos servidores
-servidores_alterados = False
-
-for servidor in list(servidores.keys()):
-    with st.sidebar.expander(f"Servidor: {servidor}"):
-        novo_nome = st.text_input(f"Editar nome do servidor ({servidor}):", value=servidor, key=f"nome_{servidor}")
-        if novo_nome != servidor and novo_nome.strip() != "":
-            servidores[novo_nome] = servidores.pop(servidor)
-            servidor = novo_nome
-            servidores_alterados = True
-
-        intervalos = servidores[servidor]
-        for i, intervalo in enumerate(intervalos):
-            col1, col2 = st.columns(2)
-            min_val = col1.number_input(f"Dígito Mínimo ({i+1})", value=intervalo[0], key=f"min_{servidor}_{i}")
-            max_val = col2.number_input(f"Dígito Máximo ({i+1})", value=intervalo[1], key=f"max_{servidor}_{i}")
-            intervalos[i] = [int(min_val), int(max_val)]
-
-        if st.button(f"Adicionar intervalo para {servidor}", key=f"add_{servidor}"):
-            intervalos.append([0, 0])
-            servidores_alterados = True
+# As edições de nome e intervalos ficam em um formulário: a página só é
+# recalculada quando o usuário aplica as alterações, não a cada campo editado.
+# A versão entra nas chaves dos campos para que eles reflitam a configuração
+# atual quando ela muda por outro caminho (ex.: intervalos otimizados).
+versao_servidores = hashlib.md5(json.dumps(servidores, sort_keys=True).encode()).hexdigest()[:8]
+
+with st.sidebar.form("form_servidores"):
+    edicoes_servidores = {}
+    for servidor, intervalos in servidores.items():
+        with st.expander(f"Servidor: {servidor}"):
+            novo_nome = st.text_input(f"Editar nome do servidor ({servidor}):", value=servidor, key=f"nome_{servidor}_{versao_servidores}")
+            novos_intervalos = []
+            for i, intervalo in enumerate(intervalos):
+                col1, col2 = st.columns(2)
+                min_val = col1.number_input(f"Dígito Mínimo ({i+1})", value=int(intervalo[0]), key=f"min_{servidor}_{i}_{versao_servidores}")
+                max_val = col2.number_input(f"Dígito Máximo ({i+1})", value=int(intervalo[1]), key=f"max_{servidor}_{i}_{versao_servidores}")
+                novos_intervalos.append([int(min_val), int(max_val)])
+            edicoes_servidores[servidor] = (novo_nome.strip() or servidor, novos_intervalos)
+    aplicar_servidores = st.form_submit_button("✅ Aplicar alterações nos servidores")
+
+if aplicar_servidores:
+    # Dois servidores com o mesmo nome: um deles perderia os intervalos
+    repetidos = nomes_repetidos([nome for nome, _ in edicoes_servidores.values()])
+    if repetidos:
+        st.sidebar.error(f"❌ Nomes de servidor repetidos: {', '.join(repetidos)}. Nenhuma alteração foi aplicada.")
+    else:
+        novos_servidores = {nome: intervalos for nome, intervalos in edicoes_servidores.values()}
+        servidores.clear()
+        servidores.update(novos_servidores)
+        atualizar_config({"intervalos_servidores": servidores})
+        st.rerun()
+
+# Incluir e remover intervalos ou servidores mudam a estrutura do formulário,
+# por isso ficam fora dele
+with st.sidebar.expander("Gerenciar servidores"):
+    servidor_gerenciado = st.selectbox("Servidor:", options=list(servidores.keys()), key="servidor_gerenciado")
+    if servidor_gerenciado is not None:
+        if st.button(f"Adicionar intervalo para {servidor_gerenciado}", key="add_intervalo"):
+            servidores[servidor_gerenciado].append([0, 0])
+            atualizar_config({"intervalos_servidores": servidores})
             st.rerun()
 
-        if st.button(f"Remover servidor {servidor}", key=f"remove_{servidor}"):
-            del servidores[servidor]
-            servidores_alterados = True
+        if st.button(f"Remover servidor {servidor_gerenciado}", key="remove_servidor"):
+            del servidores[servidor_gerenciado]
+            atualizar_config({"intervalos_servidores": servidores})
             st.rerun()
 
 with st.sidebar.expander("Adicionar novo servidor"):
@@ -84,14 +117,10 @@ with st.sidebar.expander("Adicionar novo servidor"):
             st.warning("Esse servidor já existe.")
         else:
             servidores[novo_servidor] = [[0, 0]]
-            servidores_alterados = True
+            atualizar_config({"intervalos_servidores": servidores})
             st.success(f"Servidor {novo_servidor} adicionado com sucesso!")
             st.rerun()
 
-# Atualizar servidores no cache se houve alterações
-if servidores_alterados:
-    atualizar_config({"intervalos_servidores": servidores})
-
 # Configuração de Meta 2
 st.sidebar.subheader(":calendar: Configuração de Meta 2")
 ano_meta2 = st.sidebar.number_input("Ano a partir do qual os processos não são Meta 2:", min_value=1900, max_value=2100, value=configuracao.get("ano_meta2", 2018))
@@ -203,21 +232,25 @@ def exibir_dashboard_assunto_principal(df: pd.DataFrame):
             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
         )
 
-def exibir_analise_nome_tarefa(df: pd.DataFrame):
-    if "nomeTarefa" not in df.columns:
+def contagem_meta2(histograma: HistogramaAnos, ano_meta2: int, coluna_grupo: str, coluna_valor: str) -> pd.DataFrame:
+    """Contagem de processos Meta 2 por grupo, em ordem decrescente, sem grupos zerados"""
+    contagem = histograma.contar_meta2(ano_meta2)
+    contagem = contagem[contagem > 0].sort_values(ascending=False).reset_index()
+    contagem.columns = [coluna_grupo, coluna_valor]
+    return contagem
+
+def exibir_analise_nome_tarefa(df: pd.DataFrame, histograma_tarefa: HistogramaAnos, ano_meta2: int):
+    if "nomeTarefa" not in df.columns or histograma_tarefa is None:
         st.warning("A coluna 'nomeTarefa' não foi encontrada.")
         return
 
     st.subheader("📝 Análise de Tarefas com Mais Processos Meta 2")
 
-    meta2_df = df[df["Meta 2 Classificacao"] == "Meta 2"]
+    tarefa_counts = contagem_meta2(histograma_tarefa, ano_meta2, "Tarefa", "Quantidade")
     
-    if len(meta2_df) == 0:
+    if len(tarefa_counts) == 0:
         st.warning("Nenhum processo foi classificado como 'Meta 2'. Verifique a configuração do ano.")
         return
-    
-    tarefa_counts = meta2_df["nomeTarefa"].value_counts().reset_index()
-    tarefa_counts.columns = ["Tarefa", "Quantidade"]
 
     fig = px.bar(tarefa_counts.head(10), x="Tarefa", y="Quantidade", title="Top 10 Tarefas com Mais Processos Meta 2")
     fig.update_xaxes(tickangle=45)
@@ -233,7 +266,7 @@ def exibir_analise_nome_tarefa(df: pd.DataFrame):
         mime="text/csv"
     )
 
-def exibir_dashboard_servidores(df: pd.DataFrame):
+def exibir_dashboard_servidores(df: pd.DataFrame, histograma_servidor: HistogramaAnos, ano_meta2: int):
     """Dashboard para análise por servidor"""
     st.subheader("👥 Análise por Servidor")
     
@@ -248,10 +281,9 @@ def exibir_dashboard_servidores(df: pd.DataFrame):
     st.dataframe(servidor_counts)
     
     # Análise por servidor e Meta 2
-    if "Meta 2 Classificacao" in df.columns:
+    if histograma_servidor is not None:
         st.markdown("#### Processos Meta 2 por Servidor")
-        meta2_servidor = df[df["Meta 2 Classificacao"] == "Meta 2"]["Servidor"].value_counts().reset_index()
-        meta2_servidor.columns = ["Servidor", "Processos Meta 2"]
+        meta2_servidor = contagem_meta2(histograma_servidor, ano_meta2, "Servidor", "Processos Meta 2")
         
         if len(meta2_servidor) > 0:
             fig2 = px.bar(meta2_servidor, x="Servidor", y="Processos Meta 2", title="Processos Meta 2 por Servidor")
@@ -292,25 +324,253 @@ def exibir_analise_anos(df: pd.DataFrame):
     with col2:
         st.metric("Ano mais recente", int(df_anos["Ano Processo"].max()))
     with col3:
-        st.metric("Anos diferentes", df_anos["Ano Processo"].nunique())
+        st.metric("Anos diferentes", ColumnProfiler.column_stats(df, "Ano Processo")["Valores Únicos"])
+
+def exibir_simulacao_meta2(histograma: HistogramaAnos, histograma_servidor: HistogramaAnos, ano_meta2: int):
+    """Curva da Meta 2 para todos os anos de corte e simulação instantânea de um corte"""
+    st.subheader("🎯 Simulação da Meta 2 por Ano de Corte")
+    
+    curva = histograma.curva()
+    if len(curva) == 0:
+        st.warning("Nenhum ano foi identificado nos processos.")
+        return
+    
+    ano_min = int(curva["Ano de Corte"].min())
+    ano_max = int(curva["Ano de Corte"].max())
+    ano_simulado = st.slider(
+        "Simular ano de corte da Meta 2:",
+        min_value=ano_min,
+        max_value=ano_max,
+        value=min(max(int(ano_meta2), ano_min), ano_max),
+        key="ano_meta2_simulado"
+    )
+    
+    fig = px.line(curva, x="Ano de Corte", y="Processos Meta 2", markers=True,
+                  title="Processos Meta 2 conforme o ano de corte")
+    fig.add_vline(x=ano_simulado, line_dash="dash")
+    st.plotly_chart(fig, use_container_width=True)
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric(
+            f"Processos Meta 2 com corte em {ano_simulado}",
+            histograma.total_meta2(ano_simulado),
+            delta=histograma.total_meta2(ano_simulado) - histograma.total_meta2(ano_meta2)
+        )
+    with col2:
+        st.markdown(f"**Por servidor (corte em {ano_simulado})**")
+        st.dataframe(contagem_meta2(histograma_servidor, ano_simulado, "Servidor", "Processos Meta 2"))
 
 # =============================
 # Processamento do arquivo
 # =============================
+def exibir_erro_processamento(e: Exception):
+    """Mostra o erro de processamento e sugestões de solução"""
+    st.error(f"❌ Erro ao processar o arquivo: {str(e)}")
+    if isinstance(e, ColunaNaoEncontrada) and e.sugestoes:
+        st.info(f"💡 Colunas parecidas no arquivo: {', '.join(map(str, e.sugestoes))}. Ajuste o nome da coluna no sidebar.")
+    if debug_mode:
+        st.exception(e)
+    
+    # Sugerir soluções
+    st.write("**Possíveis soluções:**")
+    st.write("1. Verifique se o nome da coluna de processos está correto")
+    st.write("2. Verifique se o arquivo está no formato correto (CSV ou Excel)")
+    st.write("3. Ative o 'Modo Debug' para mais informações")
+    st.write("4. Use o botão '🧪 Testar Formatos' no sidebar para verificar se os números estão no formato esperado")
+
+
+@st.fragment
+def exibir_resultados(derivadas: ColunasDerivadas, params_derivadas: dict, colunas_removidas: list, chave_arquivo: tuple):
+    """
+    Painéis do arquivo processado.
+
+    Executado como fragmento: os controles dos painéis (ano simulado, assunto,
+    preparação do download) recalculam só esta seção, sem reler o arquivo nem
+    redesenhar o sidebar.
+    """
+    try:
+        ano_meta2 = params_derivadas["ano_meta2"]
+        
+        # "Meta 2 Classificacao" e "Número Formatado" não são usadas pelos painéis:
+        # só são calculadas para a amostra e o download
+        colunas_paineis = ["Dígito", "Ano Processo", "Servidor"]
+        if debug_mode:
+            desatualizadas = [col for col in colunas_paineis if not derivadas.esta_atualizada(col, params_derivadas)]
+            st.write(f"🐛 **DEBUG**: Colunas recalculadas nesta execução: {desatualizadas}")
+        
+        df = derivadas.materializar(colunas_paineis, params_derivadas)
+        
+        # Histogramas de anos: contagens de Meta 2 para qualquer ano por soma de prefixo
+        histograma = derivadas.agregado(
+            "histograma_anos", ["Ano Processo"], HistogramaAnos, params_derivadas
+        )
+        histograma_servidor = derivadas.agregado(
+            "histograma_servidor", ["Ano Processo", "Servidor"], HistogramaAnos, params_derivadas
+        )
+        histograma_tarefa = None
+        if "nomeTarefa" in derivadas.df.columns:
+            histograma_tarefa = derivadas.agregado(
+                "histograma_tarefa",
+                ["Ano Processo"],
+                lambda anos: HistogramaAnos(anos, derivadas.df["nomeTarefa"]),
+                params_derivadas
+            )
+        
+        # Problemas por linha (ano, dígito, servidor, dígito verificador e formato)
+        qualidade = derivadas.agregado(
+            "qualidade",
+            ["Dígito", "Ano Processo", "Servidor"],
+            lambda digitos, anos, _servidores: RelatorioQualidade(
+                derivadas.df[coluna_processos], digitos, anos, params_derivadas["intervalos_servidores"]
+            ),
+            params_derivadas
+        )
+        
+        if debug_mode:
+            anos_extraidos = df["Ano Processo"].value_counts().sort_index()
+            st.write(f"🐛 **DEBUG**: Anos extraídos: {dict(anos_extraidos)}")
+            st.write(f"🐛 **DEBUG**: Processos sem ano identificado: {df['Ano Processo'].isna().sum()}")
+            st.write(f"🐛 **DEBUG**: Processos Meta 2: {histograma.total_meta2(ano_meta2)}")
+            servidor_counts = df["Servidor"].value_counts()
+            st.write(f"🐛 **DEBUG**: Distribuição por servidor: {dict(servidor_counts)}")
+
+        st.success("✅ Arquivo processado com sucesso!")
+        
+        # Mostrar resumo dos resultados
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Total de Processos", len(df))
+        with col2:
+            meta2_count = histograma.total_meta2(ano_meta2)
+            st.metric("Processos Meta 2", meta2_count)
+        with col3:
+            anos_identificados = ColumnProfiler.column_stats(df, "Ano Processo")["Não Nulos"]
+            st.metric("Anos Identificados", anos_identificados)
+        with col4:
+            digitos_identificados = len(df) - qualidade.contar(SEM_DIGITO)
+            st.metric("Dígitos Identificados", digitos_identificados)
+        
+        # Mostrar problemas encontrados
+        resumo_qualidade = qualidade.resumo()
+        if len(resumo_qualidade) > 0:
+            with st.expander("⚠️ Problemas Identificados"):
+                for _, linha in resumo_qualidade.iterrows():
+                    st.write(f"❗ {linha['Processos']} processos: {linha['Problema']} ({linha['Percentual']}%)")
+                
+                # Mostrar alguns exemplos de cada problema
+                exemplos = qualidade.exemplos(
+                    df.assign(Problemas=qualidade.descricoes()),
+                    [coluna_processos, "Dígito", "Ano Processo", "Servidor", "Problemas"],
+                    linhas=3
+                )
+                for problema, exemplo in exemplos.items():
+                    st.write(f"**Exemplos - {problema}:**")
+                    st.dataframe(exemplo)
+        
+        # Mostrar amostra dos dados
+        st.subheader("📋 Amostra dos Dados Processados")
+        # Reorganizar colunas para melhor visualização
+        colunas_importantes = COLUNAS_EXPORTACAO
+        df_amostra = derivadas.amostra(colunas_importantes, params_derivadas).drop(columns=colunas_removidas)
+        outras_colunas = [col for col in df_amostra.columns if col not in colunas_importantes]
+        
+        df_display = df_amostra[[col for col in colunas_importantes if col in df_amostra.columns] + outras_colunas]
+        st.dataframe(df_display)
+
+        # Download do arquivo processado, gerado apenas quando pedido
+        assinatura_download = (
+            chave_arquivo,
+            tuple(derivadas.assinatura(col, params_derivadas) for col in colunas_importantes),
+            tuple(colunas_removidas)
+        )
+        if st.button("📦 Preparar Arquivo Processado"):
+            with st.spinner("Gerando planilha..."):
+                df_completo = derivadas.materializar(colunas_importantes, params_derivadas).drop(columns=colunas_removidas)
+                buffer = io.BytesIO()
+                df_completo.to_excel(buffer, index=False, engine="openpyxl")
+            st.session_state.dashboard_download = (assinatura_download, buffer.getvalue())
+        
+        download = st.session_state.get("dashboard_download")
+        if download is not None and download[0] == assinatura_download:
+            st.download_button(
+                label="📥 Baixar Arquivo Processado",
+                data=download[1],
+                file_name="processos_classificados.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            )
+
+        # Exibir dashboards
+        st.divider()
+        exibir_dashboard_servidores(df, histograma_servidor, ano_meta2)
+        
+        st.divider()
+        exibir_analise_anos(df)
+        
+        st.divider()
+        exibir_simulacao_meta2(histograma, histograma_servidor, ano_meta2)
+        
+        st.divider() 
+        exibir_dashboard_assunto_principal(df)
+        
+        st.divider()
+        exibir_analise_nome_tarefa(df, histograma_tarefa, ano_meta2)
+        
+    except Exception as e:
+        exibir_erro_processamento(e)
+
+
 if uploaded_file:
+    exibir_aviso_coluna_detectada()
     with st.spinner("Processando o arquivo..."):
         try:
-            file_type = "xlsx" if uploaded_file.name.endswith(".xlsx") else "csv"
+            file_type = tipo_arquivo(uploaded_file.name)
             
-            if debug_mode:
-                st.write("🐛 **DEBUG**: Iniciando leitura do arquivo...")
+            # Ler o arquivo apenas quando o arquivo, as abas ou a coluna de processos mudam
+            chave_arquivo = (uploaded_file.name, uploaded_file.size, coluna_processos, abas)
+            if st.session_state.get("dashboard_arquivo_chave") != chave_arquivo:
+                if debug_mode:
+                    st.write("🐛 **DEBUG**: Iniciando leitura do arquivo...")
+                
+                # Sessões que enviam o mesmo arquivo compartilham a leitura e as colunas calculadas
+                hash_conteudo = CacheDisco.hash_arquivo(uploaded_file)
+                chave_base = ("arquivo", hash_conteudo, file_type, coluna_processos, abas)
+                compartilhado = cache_compartilhado()
+                df_base = compartilhado.obter(
+                    chave_base,
+                    lambda: FileHandler.read_file(
+                        uploaded_file, file_type,
+                        {"coluna_processos": coluna_processos, "hash_conteudo": hash_conteudo, "abas": abas}
+                    ),
+                    obter_sessao_id(),
+                    vaga="dashboard"
+                )
+                st.session_state.dashboard_colunas_derivadas = ColunasDerivadas(
+                    df_base, compartilhado=compartilhado, prefixo=chave_base, sessao=obter_sessao_id()
+                )
+                st.session_state.dashboard_arquivo_chave = chave_arquivo
+                st.session_state.dashboard_download = None
             
-            df = FileHandler.read_file(uploaded_file, file_type, {"coluna_processos": coluna_processos})
+            derivadas = st.session_state.dashboard_colunas_derivadas
+            df = derivadas.df
             
             if debug_mode:
                 st.write("🐛 **DEBUG**: Arquivo lido com sucesso!")
                 st.write(f"🐛 **DEBUG**: Shape do DataFrame: {df.shape}")
                 st.write(f"🐛 **DEBUG**: Colunas: {list(df.columns)}")
+                st.write(f"🐛 **DEBUG**: Cache compartilhado: {cache_compartilhado().estatisticas()}")
+                relatorio = relatorio_memoria(df)
+                if relatorio:
+                    st.write(
+                        f"🐛 **DEBUG**: Memória após otimização dos tipos: {relatorio['memoria_antes_mb']:.1f} MB → "
+                        f"{relatorio['memoria_depois_mb']:.1f} MB (-{relatorio['reducao_percentual']}%)"
+                    )
+                    st.dataframe(pd.DataFrame(relatorio['colunas_convertidas']), hide_index=True)
+                leitura = relatorio_leitura_excel(df)
+                if leitura:
+                    st.write(f"🐛 **DEBUG**: XLSX lido com {leitura['backend']} em {leitura['segundos']:.2f}s")
+                    if leitura['falhas']:
+                        st.write(f"🐛 **DEBUG**: Leitores que falharam: {leitura['falhas']}")
                 
                 # Executar diagnóstico completo
                 with st.expander("🔍 Diagnóstico Detalhado"):
@@ -344,159 +604,33 @@ if uploaded_file:
                         st.write(f"- `{col}`")
                 st.stop()
 
-            # Extrair ano do processo com função melhorada
-            if debug_mode:
-                st.write("🐛 **DEBUG**: Extraindo anos dos processos...")
-            
-            df["Ano Processo"] = df[coluna_processos].apply(lambda x: extrair_ano_processo_melhorado(x))
-            
-            if debug_mode:
-                anos_extraidos = df["Ano Processo"].value_counts().sort_index()
-                st.write(f"🐛 **DEBUG**: Anos extraídos: {dict(anos_extraidos)}")
-                st.write(f"🐛 **DEBUG**: Processos sem ano identificado: {df['Ano Processo'].isna().sum()}")
-            
-            # Classificar Meta 2 com função melhorada
-            df["Meta 2 Classificacao"] = df["Ano Processo"].apply(lambda x: classificar_meta2_melhorado(x, ano_meta2))
-            
-            if debug_mode:
-                meta2_counts = df["Meta 2 Classificacao"].value_counts()
-                st.write(f"🐛 **DEBUG**: Classificação Meta 2: {dict(meta2_counts)}")
-
-            # Atribuir servidor com função melhorada
-            if "Dígito" in df.columns:
-                if debug_mode:
-                    st.write("🐛 **DEBUG**: Atribuindo servidores...")
-                    digitos_counts = df["Dígito"].value_counts().sort_index()
-                    st.write(f"🐛 **DEBUG**: Dígitos encontrados: {dict(digitos_counts)}")
-                
-                df["Servidor"] = df["Dígito"].apply(lambda x: atribuir_servidor_melhorado(x, obter_config_session_state()))
-                
-                if debug_mode:
-                    servidor_counts = df["Servidor"].value_counts()
-                    st.write(f"🐛 **DEBUG**: Distribuição por servidor: {dict(servidor_counts)}")
-            else:
-                st.warning("⚠️ Coluna 'Dígito' não encontrada. Todos os processos serão marcados como 'Servidor não identificado'.")
-                df["Servidor"] = "Servidor não identificado"
-
-            # Criar coluna de número formatado com formato escolhido pelo usuário
-            if debug_mode:
-                st.write(f"🐛 **DEBUG**: Aplicando formato '{formato_escolhido}' aos números...")
-            
-            df["Número Formatado"] = df[coluna_processos].apply(
-                lambda x: formatar_numero_processo(x, formato_escolhido)
-            )
-            
-            if debug_mode:
-                st.write("🐛 **DEBUG**: Exemplos de números formatados:")
-                for i, (original, formatado) in enumerate(zip(df[coluna_processos].head(3), df["Número Formatado"].head(3))):
-                    st.write(f"  {i+1}: `{original}` → `{formatado}`")
-
-            # Remover colunas desnecessárias
-            colunas_padrao = [
-                "cargoJudicial", "ultimoMovimento", "podeMovimentarEmLote",
-                "podeMinutarEmLote", "podeIntimarEmLote", "podeDesignarAudienciaEmLote",
-                "podeDesignarPericiaEmLote", "podeRenajudEmLote", "sigiloso",
-                "prioridade", "dataChegada", "conferido", "idTaskInstance",
-                "idTaskInstanceProximo", "idProcesso", "classeJudicial"
+            # Colunas derivadas: só as que tiveram alguma entrada alterada são recalculadas
+            params_derivadas = {
+                "coluna_processos": coluna_processos,
+                "ano_meta2": ano_meta2,
+                "intervalos_servidores": servidores,
+                "formato": formato_escolhido
+            }
+
+            # Remover colunas desnecessárias (apenas da amostra e do download)
+            colunas_disponiveis = [
+                col for col in dict.fromkeys(list(df.columns) + ["Dígito", "Ano Processo", "Servidor"])
+                if col != coluna_processos
             ]
-            colunas_disponiveis = [col for col in df.columns if col != coluna_processos]
-            colunas_padrao_existentes = [col for col in colunas_padrao if col in df.columns]
+            colunas_padrao_existentes = [col for col in COLUNAS_REMOCAO_PADRAO if col in df.columns]
 
             st.sidebar.subheader("Colunas para remover")
-            colunas_remover_usuario = st.sidebar.multiselect(
+            colunas_removidas = st.sidebar.multiselect(
                 "Selecione colunas para excluir",
                 options=colunas_disponiveis,
                 default=colunas_padrao_existentes
             )
 
-            if colunas_remover_usuario:
-                df.drop(columns=[col for col in colunas_remover_usuario if col in df.columns], inplace=True)
-
-            st.success("✅ Arquivo processado com sucesso!")
-            
-            # Mostrar resumo dos resultados
-            col1, col2, col3, col4 = st.columns(4)
-            with col1:
-                st.metric("Total de Processos", len(df))
-            with col2:
-                meta2_count = len(df[df["Meta 2 Classificacao"] == "Meta 2"])
-                st.metric("Processos Meta 2", meta2_count)
-            with col3:
-                anos_identificados = df["Ano Processo"].notna().sum()
-                st.metric("Anos Identificados", anos_identificados)
-            with col4:
-                digitos_identificados = (df.get("Dígito", pd.Series([0])) != 0).sum()
-                st.metric("Dígitos Identificados", digitos_identificados)
-            
-            # Mostrar problemas encontrados
-            problemas = []
-            if df["Ano Processo"].isna().sum() > 0:
-                problemas.append(f"❗ {df['Ano Processo'].isna().sum()} processos sem ano identificado")
-            if "Dígito" in df.columns and (df["Dígito"] == 0).sum() > 0:
-                problemas.append(f"❗ {(df['Dígito'] == 0).sum()} processos sem dígito identificado")
-            if any("não" in str(servidor).lower() for servidor in df["Servidor"].values):
-                count_problemas_servidor = sum(1 for servidor in df["Servidor"].values if "não" in str(servidor).lower())
-                problemas.append(f"❗ {count_problemas_servidor} processos com problemas na atribuição de servidor")
-            
-            if problemas:
-                with st.expander("⚠️ Problemas Identificados"):
-                    for problema in problemas:
-                        st.write(problema)
-                    
-                    # Mostrar alguns exemplos de problemas
-                    if "Dígito" in df.columns:
-                        problemas_digito = df[df["Dígito"] == 0][coluna_processos].head(3)
-                        if len(problemas_digito) > 0:
-                            st.write("**Exemplos de números sem dígito identificado:**")
-                            for numero in problemas_digito:
-                                st.code(numero)
-            
-            # Mostrar amostra dos dados
-            st.subheader("📋 Amostra dos Dados Processados")
-            # Reorganizar colunas para melhor visualização
-            colunas_importantes = ['Dígito', 'Ano Processo', 'Meta 2 Classificacao', 'Servidor', 'Número Formatado']
-            colunas_disponiveis = [col for col in colunas_importantes if col in df.columns]
-            outras_colunas = [col for col in df.columns if col not in colunas_importantes]
-            
-            df_display = df[colunas_disponiveis + outras_colunas]
-            st.dataframe(df_display.head())
-
-            # Download do arquivo processado
-            output_file = "processos_classificados.xlsx"
-            df.to_excel(output_file, index=False)
-
-            with open(output_file, "rb") as f:
-                st.download_button(
-                    label="📥 Baixar Arquivo Processado",
-                    data=f,
-                    file_name="processos_classificados.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                )
-
-            # Exibir dashboards
-            st.divider()
-            exibir_dashboard_servidores(df)
-            
-            st.divider()
-            exibir_analise_anos(df)
-            
-            st.divider() 
-            exibir_dashboard_assunto_principal(df)
-            
-            st.divider()
-            exibir_analise_nome_tarefa(df)
+            exibir_resultados(derivadas, params_derivadas, colunas_removidas, chave_arquivo)
             
         except Exception as e:
-            st.error(f"❌ Erro ao processar o arquivo: {str(e)}")
-            if debug_mode:
-                st.exception(e)
-            
-            # Sugerir soluções
-            st.write("**Possíveis soluções:**")
-            st.write("1. Verifique se o nome da coluna de processos está correto")
-            st.write("2. Verifique se o arquivo está no formato correto (CSV ou Excel)")
-            st.write("3. Ative o 'Modo Debug' para mais informações")
-            st.write("4. Use o botão '🧪 Testar Formatos' no sidebar para verificar se os números estão no formato esperado")
+            if not usar_coluna_detectada(e):
+                exibir_erro_processamento(e)
             
 else:
     st.info("📁 Envie um arquivo para iniciar a análise.")
@@ -29,15 +29,13 @@ if "arquivos_gerados" not in st.session_state:
 
 # Quando um novo arquivo for enviado
 if uploaded_file:
-    input_pdf_path = os.path.join(output_folder, uploaded_file.name)
-    with open(input_pdf_path, "wb") as f:
-        f.write(uploaded_file.getbuffer())
-
     st.success("Arquivo recebido com sucesso!")
-    st.write(f"Tamanho: **{os.path.getsize(input_pdf_path) / (1024 * 1024):.2f} MB**")
+    st.write(f"Tamanho: **{uploaded_file.size / (1024 * 1024):.2f} MB**")
 
     if st.button("Dividir PDF"):
-        reader = PdfReader(input_pdf_path)
+        # Lê direto do arquivo enviado (já em memória), sem gravar uma cópia em disco
+        uploaded_file.seek(0)
+        reader = PdfReader(uploaded_file)
         current_writer = PdfWriter()
         part_number = 1
         arquivos_gerados = []
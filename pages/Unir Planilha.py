@@ -3,8 +3,16 @@
 import streamlit as st
 import pandas as pd
 import io
-from utils.fileHandler import FileHandler
-from utils.cache_utils import obter_config_session_state
+import os
+import datetime
+import uuid
+from utils.fileHandler import FileHandler, TIPOS_ACEITOS
+from utils.merge_utils import MergeUtils
+from utils.profile_utils import ColumnProfiler
+from utils.disk_merge import DiskMerge
+from utils.cache_utils import obter_config_session_state, dados_sessao, exibir_uso_dados_sessao, selecionar_abas
+from utils.memory_utils import relatorio_memoria
+from utils.excel_utils import relatorio_leitura_excel
 
 # Configuração da página
 st.set_page_config(
@@ -21,19 +29,397 @@ Esta funcionalidade permite unir duas planilhas baseando-se em uma coluna comum,
 mantendo apenas os registros que existem em ambas as planilhas.
 
 **Como funciona:**
-1. Carregue duas planilhas (Excel ou CSV)
+1. Carregue duas planilhas (Excel, CSV ou Parquet; CSV também compactado em .zip/.gz)
 2. Escolha a coluna de comparação em cada planilha
 3. Selecione quais colunas manter na planilha final
 4. A ferramenta criará uma planilha com apenas os registros comuns
+
+No modo **União múltipla**, uma planilha base (ex.: acervo) é combinada de uma só vez
+com várias outras (audiências, perícias, prazos...). No modo **Empilhar**, exportações
+mensais ou por vara são concatenadas, com remoção de processos repetidos. O modo
+**Planilhas grandes** une arquivos que não cabem juntos na memória, usando o disco.
 """)
 
-# Estado para armazenar os dados
-if "planilha1_data" not in st.session_state:
-    st.session_state.planilha1_data = None
-if "planilha2_data" not in st.session_state:
-    st.session_state.planilha2_data = None
-if "resultado_uniao" not in st.session_state:
-    st.session_state.resultado_uniao = None
+modo_uniao = st.radio(
+    "Modo de união:",
+    options=["duas", "multipla", "empilhar", "disco"],
+    format_func=lambda x: {
+        "duas": "🔗 Duas planilhas",
+        "multipla": "🧩 União múltipla (uma base + várias planilhas)",
+        "empilhar": "📚 Empilhar planilhas (mesmo tipo de relatório)",
+        "disco": "💾 Planilhas grandes (união em disco)"
+    }[x],
+    horizontal=True,
+    key="modo_uniao"
+)
+
+# Planilhas e resultados da sessão: os menos usados vão para o disco quando a
+# sessão (ou o servidor) passa do limite de memória
+dados = dados_sessao()
+
+def ler_planilhas_enviadas(arquivos, chave, chave_resultado):
+    """Lê as planilhas em paralelo apenas quando o conjunto de arquivos muda (ou a sessão expirou)"""
+    assinatura = tuple((arquivo.name, arquivo.size) for arquivo in arquivos)
+    expiradas = any(not dados.contem(f"{chave}/{nome}") for nome in st.session_state.get(chave, []))
+    if st.session_state.get(f"{chave}_assinatura") != assinatura or expiradas:
+        with st.spinner(f"Lendo {len(arquivos)} planilhas..."):
+            planilhas, erros = MergeUtils.read_spreadsheets(arquivos)
+        dados.remover_prefixo(f"{chave}/")
+        for nome, df in planilhas.items():
+            dados.guardar(f"{chave}/{nome}", df)
+        st.session_state[chave] = list(planilhas.keys())
+        st.session_state[f"{chave}_erros"] = erros
+        st.session_state[f"{chave}_assinatura"] = assinatura
+        dados.remover(chave_resultado)
+    
+    for nome, erro in st.session_state[f"{chave}_erros"].items():
+        st.error(f"❌ Erro ao carregar {nome}: {erro}")
+    
+    return {nome: dados.obter(f"{chave}/{nome}") for nome in st.session_state[chave]}
+
+def exibir_relatorio_memoria(df):
+    """Mostra o leitor de XLSX usado e a memória economizada na leitura (tipos compactos)"""
+    leitura = relatorio_leitura_excel(df)
+    if leitura:
+        st.caption(f"⏱️ XLSX lido com {leitura['backend']} em {leitura['segundos']:.2f}s")
+    relatorio = relatorio_memoria(df)
+    if relatorio and relatorio['colunas_convertidas']:
+        st.caption(
+            f"💾 Memória: {relatorio['memoria_antes_mb']:.1f} MB → {relatorio['memoria_depois_mb']:.1f} MB "
+            f"(-{relatorio['reducao_percentual']}%, {len(relatorio['colunas_convertidas'])} colunas compactadas)"
+        )
+
+def exibir_downloads_resultado(resultado, prefixo_arquivo):
+    """Botões de download (Excel e CSV) de um resultado"""
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    output = io.BytesIO()
+    resultado.to_excel(output, index=False, engine='openpyxl')
+    output.seek(0)
+    st.download_button(
+        label="📥 Baixar Resultado (Excel)",
+        data=output,
+        file_name=f"{prefixo_arquivo}_{timestamp}.xlsx",
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        use_container_width=True,
+        key=f"{prefixo_arquivo}_xlsx"
+    )
+    st.download_button(
+        label="📥 Baixar Resultado (CSV)",
+        data=resultado.to_csv(index=False).encode('utf-8'),
+        file_name=f"{prefixo_arquivo}_{timestamp}.csv",
+        mime="text/csv",
+        use_container_width=True,
+        key=f"{prefixo_arquivo}_csv"
+    )
+
+def exibir_uniao_multipla():
+    """Modo de união de uma planilha base com várias outras planilhas"""
+    st.header("📁 1. Carregar Planilhas")
+    arquivos = st.file_uploader(
+        "Escolha a planilha base e as demais planilhas",
+        type=TIPOS_ACEITOS,
+        accept_multiple_files=True,
+        key="arquivos_multiplos"
+    )
+    
+    if not arquivos or len(arquivos) < 2:
+        st.info("📁 Envie pelo menos duas planilhas para iniciar a união múltipla.")
+        return
+    
+    planilhas = ler_planilhas_enviadas(arquivos, "planilhas_multiplas", "resultado_uniao_multipla")
+    if len(planilhas) < 2:
+        st.warning("São necessárias pelo menos duas planilhas válidas.")
+        return
+    
+    for nome, df in planilhas.items():
+        st.write(f"✅ **{nome}**: {len(df)} linhas, {len(df.columns)} colunas")
+    
+    st.header("⚙️ 2. Configurar União")
+    nomes = list(planilhas.keys())
+    nome_base = st.selectbox("Planilha base:", options=nomes, key="multipla_base")
+    df_base = planilhas[nome_base]
+    
+    coluna_base = st.selectbox(
+        "Coluna de comparação da planilha base:",
+        options=df_base.columns.tolist(),
+        key="multipla_coluna_base"
+    )
+    colunas_base = st.multiselect(
+        "Colunas da planilha base para manter:",
+        options=df_base.columns.tolist(),
+        default=df_base.columns.tolist(),
+        key="multipla_colunas_base"
+    )
+    
+    anexos = []
+    for i, nome in enumerate([nome for nome in nomes if nome != nome_base]):
+        df = planilhas[nome]
+        colunas = df.columns.tolist()
+        with st.expander(f"📎 {nome}", expanded=True):
+            col1, col2 = st.columns(2)
+            with col1:
+                coluna_anexo = st.selectbox(
+                    "Coluna de comparação:",
+                    options=colunas,
+                    index=colunas.index(coluna_base) if coluna_base in colunas else 0,
+                    key=f"multipla_coluna_{nome}"
+                )
+            with col2:
+                sufixo = st.text_input(
+                    "Sufixo para colunas duplicadas:",
+                    value=f"_p{i + 2}",
+                    key=f"multipla_sufixo_{nome}"
+                )
+            colunas_anexo = st.multiselect(
+                "Colunas para manter:",
+                options=[col for col in colunas if col != coluna_anexo],
+                key=f"multipla_colunas_{nome}"
+            )
+        anexos.append({
+            'df': df,
+            'on': coluna_anexo,
+            'columns': colunas_anexo or None,
+            'suffix': sufixo
+        })
+    
+    tipo_join = st.selectbox(
+        "Tipo de união:",
+        options=["left", "inner"],
+        format_func=lambda x: {
+            "left": "Todos da planilha base + dados encontrados nas demais (LEFT JOIN)",
+            "inner": "Apenas registros presentes em todas as planilhas (INNER JOIN)"
+        }[x],
+        key="multipla_tipo_join"
+    )
+    
+    st.header("🚀 3. Executar União")
+    if st.button("🧩 Unir Planilhas", type="primary", use_container_width=True, key="multipla_executar"):
+        try:
+            with st.spinner("Processando união das planilhas..."):
+                dados.guardar("resultado_uniao_multipla", MergeUtils.multi_merge(
+                    df_base,
+                    coluna_base,
+                    anexos,
+                    base_columns=colunas_base,
+                    how=tipo_join
+                ))
+        except Exception as e:
+            st.error(f"❌ Erro ao unir planilhas: {str(e)}")
+            dados.remover("resultado_uniao_multipla")
+    
+    resultado = dados.obter("resultado_uniao_multipla")
+    if resultado is None:
+        return
+    
+    st.header("📊 4. Resultado da União")
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("📈 Total de Linhas", len(resultado))
+    with col2:
+        st.metric("📋 Total de Colunas", len(resultado.columns))
+    st.dataframe(resultado.head(20))
+    exibir_downloads_resultado(resultado, "planilhas_unidas")
+
+def exibir_empilhamento():
+    """Modo de empilhamento (união vertical) de várias exportações"""
+    st.header("📁 1. Carregar Planilhas")
+    arquivos = st.file_uploader(
+        "Escolha as planilhas a empilhar (da mais antiga para a mais recente)",
+        type=TIPOS_ACEITOS,
+        accept_multiple_files=True,
+        key="arquivos_empilhar"
+    )
+    
+    if not arquivos:
+        st.info("📁 Envie as planilhas para empilhar.")
+        return
+    
+    planilhas = ler_planilhas_enviadas(arquivos, "planilhas_empilhar", "resultado_empilhamento")
+    if not planilhas:
+        return
+    
+    total_linhas = sum(len(df) for df in planilhas.values())
+    st.write(f"✅ {len(planilhas)} planilhas carregadas, {total_linhas} linhas no total")
+    
+    # Colunas presentes em alguma planilha, na ordem em que aparecem
+    todas_colunas = list(dict.fromkeys(col for df in planilhas.values() for col in df.columns))
+    colunas_parciais = [col for col in todas_colunas if any(col not in df.columns for df in planilhas.values())]
+    if colunas_parciais:
+        with st.expander(f"⚠️ {len(colunas_parciais)} colunas não existem em todas as planilhas"):
+            st.write(colunas_parciais)
+    
+    st.header("⚙️ 2. Configurar Empilhamento")
+    config = obter_config_session_state()
+    coluna_padrao = config.get("coluna_processos", "numeroProcesso")
+    opcoes_chave = ["(não deduplicar)"] + todas_colunas
+    coluna_chave = st.selectbox(
+        "Coluna do número do processo para remover duplicados:",
+        options=opcoes_chave,
+        index=opcoes_chave.index(coluna_padrao) if coluna_padrao in opcoes_chave else 0,
+        key="empilhar_coluna_chave"
+    )
+    coluna_ordem = st.selectbox(
+        "Coluna que indica a linha mais recente (opcional):",
+        options=["(ordem de envio das planilhas)"] + todas_colunas,
+        key="empilhar_coluna_ordem"
+    )
+    
+    st.header("🚀 3. Executar Empilhamento")
+    if st.button("📚 Empilhar Planilhas", type="primary", use_container_width=True, key="empilhar_executar"):
+        try:
+            with st.spinner("Empilhando planilhas..."):
+                dados.guardar("resultado_empilhamento", MergeUtils.stack_frames(
+                    planilhas,
+                    key_column=None if coluna_chave == opcoes_chave[0] else coluna_chave,
+                    order_column=None if coluna_ordem.startswith("(") else coluna_ordem
+                ))
+        except Exception as e:
+            st.error(f"❌ Erro ao empilhar planilhas: {str(e)}")
+            dados.remover("resultado_empilhamento")
+    
+    resultado = dados.obter("resultado_empilhamento")
+    if resultado is None:
+        return
+    
+    st.header("📊 4. Resultado do Empilhamento")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("📈 Total de Linhas", len(resultado))
+    with col2:
+        st.metric("🗑️ Duplicados Removidos", total_linhas - len(resultado))
+    with col3:
+        st.metric("📋 Total de Colunas", len(resultado.columns))
+    st.dataframe(resultado.head(20))
+    exibir_downloads_resultado(resultado, "planilhas_empilhadas")
+
+def exibir_uniao_em_disco():
+    """Modo de união de planilhas grandes, particionadas em disco"""
+    st.header("📁 1. Carregar Planilhas")
+    st.caption("As planilhas são lidas em blocos e não ficam guardadas na sessão.")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        arquivo1 = st.file_uploader("Primeira planilha", type=TIPOS_ACEITOS, key="arquivo_disco_1")
+    with col2:
+        arquivo2 = st.file_uploader("Segunda planilha", type=TIPOS_ACEITOS, key="arquivo_disco_2")
+    
+    if not arquivo1 or not arquivo2:
+        st.info("📁 Envie as duas planilhas para iniciar a união em disco.")
+        return
+    
+    try:
+        amostra1 = DiskMerge.read_header(arquivo1)
+        amostra2 = DiskMerge.read_header(arquivo2)
+    except Exception as e:
+        st.error(f"❌ Erro ao ler as planilhas: {str(e)}")
+        return
+    
+    st.header("⚙️ 2. Configurar União")
+    col1, col2 = st.columns(2)
+    with col1:
+        coluna1 = st.selectbox("Coluna de comparação - Planilha 1:", options=amostra1.columns.tolist(), key="disco_coluna1")
+        colunas1 = st.multiselect("Colunas da Planilha 1 para manter:", options=amostra1.columns.tolist(), key="disco_colunas1")
+    with col2:
+        coluna2 = st.selectbox("Coluna de comparação - Planilha 2:", options=amostra2.columns.tolist(), key="disco_coluna2")
+        colunas2 = st.multiselect(
+            "Colunas da Planilha 2 para manter:",
+            options=[col for col in amostra2.columns if col != coluna2],
+            key="disco_colunas2"
+        )
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        tipo_join = st.selectbox(
+            "Tipo de união:",
+            options=["inner", "left", "right", "outer"],
+            format_func=lambda x: x.upper() + " JOIN",
+            key="disco_tipo_join"
+        )
+    with col2:
+        sufixos = st.text_input("Sufixos (formato: _p1,_p2):", value="_p1,_p2", key="disco_sufixos")
+        sufixo_list = [s.strip() for s in sufixos.split(",")]
+        if len(sufixo_list) != 2:
+            sufixo_list = ["_p1", "_p2"]
+    with col3:
+        particoes = st.number_input(
+            "Partições:",
+            min_value=1,
+            max_value=1024,
+            value=32,
+            help="Mais partições = menos memória por etapa",
+            key="disco_particoes"
+        )
+    
+    st.header("🚀 3. Executar União")
+    if st.button("💾 Unir Planilhas em Disco", type="primary", use_container_width=True, key="disco_executar"):
+        arquivo_anterior = st.session_state.get("resultado_disco_arquivo")
+        if arquivo_anterior and os.path.exists(arquivo_anterior):
+            os.remove(arquivo_anterior)
+        st.session_state.resultado_disco_arquivo = None
+        
+        saida = None
+        try:
+            with st.spinner("Particionando e unindo as planilhas..."):
+                os.makedirs(dados.pasta, exist_ok=True)
+                with DiskMerge(partitions=int(particoes), directory=dados.pasta) as uniao:
+                    uniao.add_table("planilha1", DiskMerge.iter_chunks(arquivo1), coluna1, colunas1 or None)
+                    uniao.add_table("planilha2", DiskMerge.iter_chunks(arquivo2), coluna2, colunas2 or None)
+                    
+                    # Na pasta da sessão: os arquivos são apagados junto com ela quando
+                    # a sessão expira, mesmo que a união não seja refeita
+                    saida = os.path.join(dados.pasta, f"planilhas_unidas_{uuid.uuid4().hex}.csv")
+                    linhas = uniao.merge_to_csv("planilha1", "planilha2", saida, how=tipo_join, suffixes=tuple(sufixo_list))
+            
+            st.session_state.resultado_disco_arquivo = saida
+            st.session_state.resultado_disco_linhas = linhas
+        except Exception as e:
+            st.error(f"❌ Erro ao unir planilhas: {str(e)}")
+            if saida is not None and os.path.exists(saida):
+                os.remove(saida)
+        finally:
+            arquivo1.seek(0)
+            arquivo2.seek(0)
+    
+    caminho = st.session_state.get("resultado_disco_arquivo")
+    if not caminho or not os.path.exists(caminho):
+        return
+    
+    st.header("📊 4. Resultado da União")
+    st.metric("📈 Total de Linhas", st.session_state.resultado_disco_linhas)
+    st.dataframe(pd.read_csv(caminho, nrows=20))
+    
+    # O CSV só é carregado para o download quando pedido; o botão vale para
+    # esta execução, e as demais interações não releem o arquivo
+    tamanho_mb = os.path.getsize(caminho) / 1024 ** 2
+    st.caption(
+        f"ℹ️ O resultado tem {tamanho_mb:,.1f} MB. Para o download, o arquivo inteiro é "
+        "carregado na memória do servidor."
+    )
+    if st.button("📦 Preparar Download (CSV)", use_container_width=True, key="disco_preparar"):
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        with open(caminho, "rb") as f:
+            st.download_button(
+                label="📥 Baixar Planilha Unida (CSV)",
+                data=f,
+                file_name=f"planilhas_unidas_{timestamp}.csv",
+                mime="text/csv",
+                use_container_width=True
+            )
+
+exibir_uso_dados_sessao()
+
+if modo_uniao == "multipla":
+    exibir_uniao_multipla()
+    st.stop()
+
+if modo_uniao == "disco":
+    exibir_uniao_em_disco()
+    st.stop()
+
+if modo_uniao == "empilhar":
+    exibir_empilhamento()
+    st.stop()
+
 
 # =============================
 # Seção 1: Upload das Planilhas
@@ -46,23 +432,22 @@ with col1:
     st.subheader("Planilha 1")
     uploaded_file1 = st.file_uploader(
         "Escolha a primeira planilha", 
-        type=["xlsx", "csv"], 
+        type=TIPOS_ACEITOS, 
         key="file1"
     )
+    abas1 = selecionar_abas(uploaded_file1, "abas1", local=st)
     
     if uploaded_file1:
         try:
-            # Detectar tipo de arquivo
-            file_type1 = "xlsx" if uploaded_file1.name.endswith(".xlsx") else "csv"
+            # Ler arquivo sem pré-processamento, apenas quando o arquivo ou as abas mudam
+            assinatura = (uploaded_file1.name, uploaded_file1.size, abas1)
+            if st.session_state.get("planilha1_assinatura") != assinatura or not dados.contem("planilha1_data"):
+                dados.guardar("planilha1_data", MergeUtils.read_spreadsheet(uploaded_file1, abas1))
+                st.session_state.planilha1_assinatura = assinatura
+            df1 = dados.obter("planilha1_data")
             
-            # Ler arquivo usando FileHandler (sem pré-processamento)
-            if file_type1 == "xlsx":
-                df1 = pd.read_excel(uploaded_file1)
-            else:
-                df1 = pd.read_csv(uploaded_file1, encoding="utf-8", on_bad_lines="skip")
-            
-            st.session_state.planilha1_data = df1
             st.success(f"✅ Planilha 1 carregada: {len(df1)} linhas, {len(df1.columns)} colunas")
+            exibir_relatorio_memoria(df1)
             
             # Mostrar preview
             with st.expander("👀 Preview da Planilha 1"):
@@ -70,29 +455,29 @@ with col1:
                 
         except Exception as e:
             st.error(f"❌ Erro ao carregar Planilha 1: {str(e)}")
-            st.session_state.planilha1_data = None
+            dados.remover("planilha1_data")
+            st.session_state.planilha1_assinatura = None
 
 with col2:
     st.subheader("Planilha 2")
     uploaded_file2 = st.file_uploader(
         "Escolha a segunda planilha", 
-        type=["xlsx", "csv"], 
+        type=TIPOS_ACEITOS, 
         key="file2"
     )
+    abas2 = selecionar_abas(uploaded_file2, "abas2", local=st)
     
     if uploaded_file2:
         try:
-            # Detectar tipo de arquivo
-            file_type2 = "xlsx" if uploaded_file2.name.endswith(".xlsx") else "csv"
-            
-            # Ler arquivo usando FileHandler (sem pré-processamento)
-            if file_type2 == "xlsx":
-                df2 = pd.read_excel(uploaded_file2)
-            else:
-                df2 = pd.read_csv(uploaded_file2, encoding="utf-8", on_bad_lines="skip")
+            # Ler arquivo sem pré-processamento, apenas quando o arquivo ou as abas mudam
+            assinatura = (uploaded_file2.name, uploaded_file2.size, abas2)
+            if st.session_state.get("planilha2_assinatura") != assinatura or not dados.contem("planilha2_data"):
+                dados.guardar("planilha2_data", MergeUtils.read_spreadsheet(uploaded_file2, abas2))
+                st.session_state.planilha2_assinatura = assinatura
+            df2 = dados.obter("planilha2_data")
             
-            st.session_state.planilha2_data = df2
             st.success(f"✅ Planilha 2 carregada: {len(df2)} linhas, {len(df2.columns)} colunas")
+            exibir_relatorio_memoria(df2)
             
             # Mostrar preview
             with st.expander("👀 Preview da Planilha 2"):
@@ -100,16 +485,49 @@ with col2:
                 
         except Exception as e:
             st.error(f"❌ Erro ao carregar Planilha 2: {str(e)}")
-            st.session_state.planilha2_data = None
+            dados.remover("planilha2_data")
+            st.session_state.planilha2_assinatura = None
 
 # =============================
 # Seção 2: Configuração da União
 # =============================
-if st.session_state.planilha1_data is not None and st.session_state.planilha2_data is not None:
+if dados.contem("planilha1_data") and dados.contem("planilha2_data"):
     st.header("⚙️ 2. Configurar União")
     
-    df1 = st.session_state.planilha1_data
-    df2 = st.session_state.planilha2_data
+    df1 = dados.obter("planilha1_data")
+    df2 = dados.obter("planilha2_data")
+    
+    # Descoberta automática do par de colunas, refeita apenas quando as planilhas
+    # mudam (arquivo enviado e abas, não só o formato)
+    assinatura_planilhas = (
+        st.session_state.get("planilha1_assinatura"), tuple(df1.columns), len(df1),
+        st.session_state.get("planilha2_assinatura"), tuple(df2.columns), len(df2)
+    )
+    if st.session_state.get("sugestao_colunas_assinatura") != assinatura_planilhas:
+        with st.spinner("Procurando colunas em comum..."):
+            sugestoes = MergeUtils.discover_join_keys(df1, df2)
+        st.session_state.sugestao_colunas = sugestoes
+        st.session_state.sugestao_colunas_assinatura = assinatura_planilhas
+        if len(sugestoes) > 0:
+            st.session_state.coluna_comp1 = sugestoes.iloc[0]['coluna_1']
+            st.session_state.coluna_comp2 = sugestoes.iloc[0]['coluna_2']
+    
+    sugestoes = st.session_state.sugestao_colunas
+    if len(sugestoes) > 0:
+        melhor = sugestoes.iloc[0]
+        st.success(
+            f"🔎 Par sugerido: **{melhor['coluna_1']}** ↔ **{melhor['coluna_2']}** "
+            f"(~{melhor['comuns_estimados']} valores em comum)"
+        )
+        if max(len(df1), len(df2)) > MergeUtils.SKETCH_SAMPLE_ROWS:
+            st.caption(
+                f"Estimativas feitas sobre uma amostra de {MergeUtils.SKETCH_SAMPLE_ROWS:,} linhas "
+                "de cada planilha; a união usa todas as linhas."
+            )
+        with st.expander("🔎 Outros pares de colunas prováveis"):
+            st.dataframe(sugestoes.round({'cobertura': 2, 'jaccard': 2}))
+    else:
+        st.info("🔎 Nenhum par de colunas com valores em comum foi encontrado automaticamente.")
     
     # Seleção das colunas de comparação
     col1, col2 = st.columns(2)
@@ -123,9 +541,9 @@ if st.session_state.planilha1_data is not None and st.session_state.planilha2_da
         )
         
         if coluna_comp1:
-            valores_unicos1 = df1[coluna_comp1].nunique()
-            valores_nulos1 = df1[coluna_comp1].isnull().sum()
-            st.info(f"📊 {valores_unicos1} valores únicos, {valores_nulos1} valores nulos")
+            estatisticas1 = ColumnProfiler.column_stats(df1, coluna_comp1)
+            aproximado1 = "~" if estatisticas1['Únicos Aproximados'] else ""
+            st.info(f"📊 {aproximado1}{estatisticas1['Valores Únicos']} valores únicos, {estatisticas1['Nulos']} valores nulos")
     
     with col2:
         st.subheader("Coluna de Comparação - Planilha 2")
@@ -136,48 +554,97 @@ if st.session_state.planilha1_data is not None and st.session_state.planilha2_da
         )
         
         if coluna_comp2:
-            valores_unicos2 = df2[coluna_comp2].nunique()
-            valores_nulos2 = df2[coluna_comp2].isnull().sum()
-            st.info(f"📊 {valores_unicos2} valores únicos, {valores_nulos2} valores nulos")
+            estatisticas2 = ColumnProfiler.column_stats(df2, coluna_comp2)
+            aproximado2 = "~" if estatisticas2['Únicos Aproximados'] else ""
+            st.info(f"📊 {aproximado2}{estatisticas2['Valores Únicos']} valores únicos, {estatisticas2['Nulos']} valores nulos")
     
     # Preview da comparação
     if coluna_comp1 and coluna_comp2:
         st.subheader("🔍 Preview da Comparação")
         
-        # Converter para string para comparação mais robusta
-        valores1 = set(df1[coluna_comp1].astype(str).dropna())
-        valores2 = set(df2[coluna_comp2].astype(str).dropna())
+        # Separar as linhas pela presença da chave normalizada na outra planilha,
+        # apenas quando as planilhas ou as colunas de comparação mudam
+        conjuntos_divisao = ["only_in_1", "only_in_2", "in_both_1", "in_both_2"]
+        assinatura_divisao = (
+            st.session_state.get("planilha1_assinatura"), st.session_state.get("planilha2_assinatura"),
+            coluna_comp1, coluna_comp2
+        )
+        if (st.session_state.get("divisao_assinatura") != assinatura_divisao
+                or not all(dados.contem(f"divisao/{nome}") for nome in conjuntos_divisao)):
+            with st.spinner("Comparando as planilhas..."):
+                divisao = MergeUtils.split_by_key(df1, coluna_comp1, df2, coluna_comp2)
+            for nome in conjuntos_divisao:
+                dados.guardar(f"divisao/{nome}", divisao[nome])
+            # Só a contagem e os primeiros exemplos de cada conjunto de valores
+            valores = [
+                divisao['in_both_1'][coluna_comp1].dropna().unique(),
+                divisao['only_in_1'][coluna_comp1].dropna().unique(),
+                divisao['only_in_2'][coluna_comp2].dropna().unique()
+            ]
+            st.session_state.divisao_valores = [(len(v), list(v[:10])) for v in valores]
+            st.session_state.divisao_assinatura = assinatura_divisao
         
-        valores_comuns = valores1.intersection(valores2)
-        valores_apenas1 = valores1.difference(valores2)
-        valores_apenas2 = valores2.difference(valores1)
+        (total_comuns, exemplos_comuns), (total_apenas1, exemplos_apenas1), (total_apenas2, exemplos_apenas2) = \
+            st.session_state.divisao_valores
+        linhas_divisao = {nome: dados.obter(f"divisao/{nome}") for nome in conjuntos_divisao}
         
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            st.metric("📈 Valores Comuns", len(valores_comuns))
+            st.metric("📈 Valores Comuns", total_comuns)
         with col2:
-            st.metric("📊 Apenas Planilha 1", len(valores_apenas1))
+            st.metric("📊 Apenas Planilha 1", total_apenas1)
         with col3:
-            st.metric("📋 Apenas Planilha 2", len(valores_apenas2))
+            st.metric("📋 Apenas Planilha 2", total_apenas2)
         
         # Mostrar alguns exemplos
-        if len(valores_comuns) > 0:
-            with st.expander(f"👀 Exemplos de Valores Comuns ({min(10, len(valores_comuns))} primeiros)"):
-                st.write(list(valores_comuns)[:10])
+        if total_comuns > 0:
+            with st.expander(f"👀 Exemplos de Valores Comuns ({min(10, total_comuns)} primeiros)"):
+                st.write(exemplos_comuns[:10])
         
-        if len(valores_apenas1) > 0:
-            with st.expander(f"👀 Exemplos Apenas na Planilha 1 ({min(5, len(valores_apenas1))} primeiros)"):
-                st.write(list(valores_apenas1)[:5])
+        if total_apenas1 > 0:
+            with st.expander(f"👀 Exemplos Apenas na Planilha 1 ({min(5, total_apenas1)} primeiros)"):
+                st.write(exemplos_apenas1[:5])
                 
-        if len(valores_apenas2) > 0:
-            with st.expander(f"👀 Exemplos Apenas na Planilha 2 ({min(5, len(valores_apenas2))} primeiros)"):
-                st.write(list(valores_apenas2)[:5])
+        if total_apenas2 > 0:
+            with st.expander(f"👀 Exemplos Apenas na Planilha 2 ({min(5, total_apenas2)} primeiros)"):
+                st.write(exemplos_apenas2[:5])
+        
+        # Exportar as linhas completas de cada conjunto, sem executar a união
+        with st.expander("📤 Exportar diferenças entre as planilhas"):
+            conjuntos = {
+                "only_in_1": ("Linhas apenas na Planilha 1", "apenas_planilha1"),
+                "only_in_2": ("Linhas apenas na Planilha 2", "apenas_planilha2"),
+                "in_both_1": ("Linhas da Planilha 1 presentes na Planilha 2", "comuns_planilha1"),
+                "in_both_2": ("Linhas da Planilha 2 presentes na Planilha 1", "comuns_planilha2")
+            }
+            conjunto = st.selectbox(
+                "Conjunto para exportar:",
+                options=list(conjuntos.keys()),
+                format_func=lambda x: f"{conjuntos[x][0]} ({len(linhas_divisao[x])} linhas)",
+                key="conjunto_diferenca"
+            )
+            df_conjunto = linhas_divisao[conjunto]
+            st.dataframe(df_conjunto.head(20))
+            # O CSV só é gerado quando pedido, não a cada interação da página
+            if st.button(
+                f"📦 Preparar {conjuntos[conjunto][0]} (CSV)",
+                use_container_width=True,
+                disabled=len(df_conjunto) == 0,
+                key="preparar_diferenca"
+            ):
+                st.download_button(
+                    label=f"📥 Baixar {conjuntos[conjunto][0]} (CSV)",
+                    data=df_conjunto.to_csv(index=False).encode('utf-8'),
+                    file_name=f"{conjuntos[conjunto][1]}.csv",
+                    mime="text/csv",
+                    use_container_width=True
+                )
 
 # =============================
 # Seção 3: Seleção de Colunas
 # =============================
-if st.session_state.planilha1_data is not None and st.session_state.planilha2_data is not None and 'coluna_comp1' in locals() and 'coluna_comp2' in locals():
+if dados.contem("planilha1_data") and dados.contem("planilha2_data") and 'coluna_comp1' in locals() and 'coluna_comp2' in locals():
     st.header("📋 3. Selecionar Colunas para Planilha Final")
     
     # Seleção de colunas da Planilha 1
@@ -232,8 +699,8 @@ if st.session_state.planilha1_data is not None and st.session_state.planilha2_da
 # =============================
 # Seção 4: Executar União
 # =============================
-if (st.session_state.planilha1_data is not None and 
-    st.session_state.planilha2_data is not None and 
+if (dados.contem("planilha1_data") and 
+    dados.contem("planilha2_data") and 
     'colunas_planilha1' in locals() and 
     'colunas_planilha2' in locals() and
     len(colunas_planilha1) > 0):
@@ -270,22 +737,22 @@ if (st.session_state.planilha1_data is not None and
                     if coluna_comp1 != coluna_comp2:
                         resultado = resultado.drop(columns=[coluna_comp2])
                 
-                st.session_state.resultado_uniao = resultado
+                dados.guardar("resultado_uniao", resultado)
                 
                 st.success(f"✅ União realizada com sucesso!")
                 st.info(f"📊 Resultado: {len(resultado)} linhas, {len(resultado.columns)} colunas")
                 
         except Exception as e:
             st.error(f"❌ Erro ao unir planilhas: {str(e)}")
-            st.session_state.resultado_uniao = None
+            dados.remover("resultado_uniao")
 
 # =============================
 # Seção 5: Resultado e Download
 # =============================
-if st.session_state.resultado_uniao is not None:
+if dados.contem("resultado_uniao"):
     st.header("📊 5. Resultado da União")
     
-    resultado = st.session_state.resultado_uniao
+    resultado = dados.obter("resultado_uniao")
     
     # Estatísticas do resultado
     col1, col2, col3, col4 = st.columns(4)
@@ -295,7 +762,7 @@ if st.session_state.resultado_uniao is not None:
     with col2:
         st.metric("📋 Total de Colunas", len(resultado.columns))
     with col3:
-        st.metric("🔍 Valores Únicos", resultado.iloc[:, 0].nunique() if len(resultado) > 0 else 0)
+        st.metric("🔍 Valores Únicos", ColumnProfiler.column_stats(resultado, resultado.columns[0])['Valores Únicos'] if len(resultado) > 0 else 0)
     with col4:
         st.metric("📊 Linhas com Dados", len(resultado.dropna()))
     
@@ -305,17 +772,7 @@ if st.session_state.resultado_uniao is not None:
     
     # Informações das colunas
     with st.expander("📋 Informações das Colunas"):
-        info_colunas = []
-        for col in resultado.columns:
-            info_colunas.append({
-                "Coluna": col,
-                "Tipo": str(resultado[col].dtype),
-                "Não Nulos": resultado[col].notna().sum(),
-                "Valores Únicos": resultado[col].nunique(),
-                "Exemplo": str(resultado[col].dropna().iloc[0]) if len(resultado[col].dropna()) > 0 else "N/A"
-            })
-        
-        df_info = pd.DataFrame(info_colunas)
+        df_info = ColumnProfiler.profile(resultado)
         st.dataframe(df_info)
     
     # Download
@@ -327,7 +784,6 @@ if st.session_state.resultado_uniao is not None:
     output.seek(0)
     
     # Nome do arquivo baseado na data/hora
-    import datetime
     timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
     filename = f"planilhas_unidas_{timestamp}.xlsx"
     
@@ -353,9 +809,10 @@ if st.session_state.resultado_uniao is not None:
     
     # Botão para limpar e começar novamente
     if st.button("🔄 Limpar e Começar Novamente", type="secondary"):
-        st.session_state.planilha1_data = None
-        st.session_state.planilha2_data = None
-        st.session_state.resultado_uniao = None
+        dados.remover("planilha1_data", "planilha2_data", "resultado_uniao")
+        dados.remover_prefixo("divisao/")
+        st.session_state.planilha1_assinatura = None
+        st.session_state.planilha2_assinatura = None
         st.rerun()
 
 # =============================
@@ -0,0 +1,6 @@
+# tests/conftest.py - Torna os módulos do projeto (utils) importáveis nos testes
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
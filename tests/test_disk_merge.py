@@ -0,0 +1,73 @@
+# tests/test_disk_merge.py - União em disco comparada com pd.merge
+
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.disk_merge import DiskMerge
+from utils.merge_utils import MergeUtils
+
+
+def _esperado(left: pd.DataFrame, right: pd.DataFrame, how: str) -> list:
+    """
+    pd.merge sobre as chaves limpas, com chaves nulas ou vazias sem par
+    (cada uma recebe um valor próprio, que não casa com nenhum outro).
+    """
+    def chaves(df, prefixo):
+        keys = MergeUtils.clean_column_for_comparison(df["k"])
+        nulas = df["k"].isna() | keys.isin(["nan", "None", "<NA>", ""])
+        unicas = pd.Series([f"{prefixo}{i}" for i in range(len(df))], index=df.index)
+        return keys.astype(object).where(~nulas, unicas)
+
+    result = pd.merge(
+        left.assign(_k=chaves(left, "L")), right.assign(_k=chaves(right, "R")),
+        on="_k", how=how
+    )
+    return sorted(zip(result["a"].fillna(-1).astype(int), result["b"].fillna(-1).astype(int)))
+
+
+def _obtido(left: pd.DataFrame, right: pd.DataFrame, how: str, tmp_path, chunk: int = 7) -> list:
+    with DiskMerge(partitions=4, directory=str(tmp_path)) as uniao:
+        uniao.add_table("l", (left.iloc[i:i + chunk] for i in range(0, len(left), chunk)), "k")
+        uniao.add_table("r", (right.iloc[i:i + chunk] for i in range(0, len(right), chunk)), "k")
+        saida = tmp_path / "saida.csv"
+        linhas = uniao.merge_to_csv("l", "r", str(saida), how=how)
+    result = pd.read_csv(saida)
+    assert linhas == len(result)
+    return sorted(zip(result["a"].fillna(-1).astype(int), result["b"].fillna(-1).astype(int)))
+
+
+@pytest.mark.parametrize("how", ["inner", "left", "right", "outer"])
+def test_igual_ao_pd_merge_com_chaves_repetidas_e_nulas(how, tmp_path):
+    rng = np.random.default_rng(0)
+    left_keys = rng.integers(0, 30, 120).astype(str).astype(object)
+    right_keys = rng.integers(10, 40, 90).astype(str).astype(object)
+    left_keys[:5] = [None, "", " ", np.nan, "nan"]
+    right_keys[:4] = [None, "", np.nan, "nan"]
+    left = pd.DataFrame({"k": left_keys, "a": np.arange(len(left_keys))})
+    right = pd.DataFrame({"k": right_keys, "b": np.arange(len(right_keys))})
+
+    assert _obtido(left, right, how, tmp_path) == _esperado(left, right, how)
+
+
+@pytest.mark.parametrize("how", ["inner", "outer"])
+def test_chave_float_casa_com_chave_inteira(how, tmp_path):
+    # Coluna de inteiros com células vazias é lida como float (1.0, 2.0, NaN)
+    left = pd.DataFrame({"k": [1.0, 2.0, np.nan, 4.0, 5.5], "a": range(5)})
+    right = pd.DataFrame({"k": ["1", "2", "3", "4", "5.5"], "b": range(5)})
+
+    obtido = _obtido(left, right, how, tmp_path)
+    assert obtido == _esperado(left, right, how)
+    assert [par for par in obtido if -1 not in par] == [(0, 0), (1, 1), (3, 3), (4, 4)]
+
+
+def test_le_csv_com_ponto_e_virgula_em_blocos():
+    arquivo = io.BytesIO("processo;classe\n1;x\n2;y\n3;z\n".encode("utf-8"))
+    arquivo.name = "planilha.csv"
+
+    blocos = list(DiskMerge.iter_chunks(arquivo, chunksize=2))
+
+    assert [len(bloco) for bloco in blocos] == [2, 1]
+    assert blocos[0].columns.tolist() == ["processo", "classe"]
@@ -0,0 +1,38 @@
+# tests/test_interval_utils.py - Otimização dos intervalos comparada com a busca exaustiva
+
+from itertools import combinations
+
+import numpy as np
+import pytest
+
+from utils.interval_utils import DIGITO_FINAL, DIGITO_INICIAL, carga_por_servidor, otimizar_intervalos
+
+
+def _melhor_carga_maxima(histograma: np.ndarray, servidores: int) -> float:
+    """Menor carga máxima entre todas as divisões em intervalos contíguos"""
+    cargas = histograma[DIGITO_INICIAL:DIGITO_FINAL + 1]
+    acumulado = np.concatenate([[0.0], np.cumsum(cargas)])
+    melhor = np.inf
+    for cortes in combinations(range(1, len(cargas)), servidores - 1):
+        limites = (0,) + cortes + (len(cargas),)
+        melhor = min(melhor, max(acumulado[fim] - acumulado[inicio] for inicio, fim in zip(limites, limites[1:])))
+    return melhor
+
+
+@pytest.mark.parametrize("semente", range(3))
+@pytest.mark.parametrize("servidores", [1, 2, 3])
+def test_igual_a_busca_exaustiva(semente, servidores):
+    rng = np.random.default_rng(semente)
+    histograma = rng.integers(0, 50, 100).astype(float)
+    # Concentrações de carga em poucos dígitos
+    histograma[rng.integers(1, 100, 3)] += 500
+    nomes = [f"S{i}" for i in range(servidores)]
+
+    intervalos = otimizar_intervalos(histograma, nomes)
+
+    assert list(intervalos) == nomes
+    digitos = [d for nome in nomes for inicio, fim in intervalos[nome] for d in range(inicio, fim + 1)]
+    assert digitos == list(range(DIGITO_INICIAL, DIGITO_FINAL + 1))
+    assert carga_por_servidor(histograma, intervalos).max() == pytest.approx(
+        _melhor_carga_maxima(histograma, servidores)
+    )
@@ -0,0 +1,58 @@
+# tests/test_merge_utils.py - Uniões por índice de chaves comparadas com pd.merge
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.merge_utils import MergeUtils
+
+
+@pytest.fixture
+def planilhas():
+    rng = np.random.default_rng(1)
+    base = pd.DataFrame({"k": rng.integers(0, 50, 300).astype(str), "id": np.arange(300)})
+    anexo = pd.DataFrame({"k": rng.integers(0, 70, 400).astype(str), "v": np.arange(400)})
+    return base, anexo
+
+
+def test_attach_to_key_index_usa_a_primeira_ocorrencia(planilhas):
+    base, anexo = planilhas
+    key_index = MergeUtils.build_key_index(base, "k")
+
+    rows = MergeUtils.attach_to_key_index(key_index, anexo, "k")
+
+    esperado = base.merge(anexo.drop_duplicates("k"), on="k", how="left")["v"]
+    obtido = np.where(rows >= 0, anexo["v"].to_numpy()[rows], -1)
+    np.testing.assert_array_equal(obtido, esperado.fillna(-1).astype(int).to_numpy())
+
+
+@pytest.mark.parametrize("how", ["left", "inner"])
+def test_multi_merge_igual_ao_pd_merge(planilhas, how):
+    base, anexo = planilhas
+    outro = pd.DataFrame({"chave": [str(i) for i in range(0, 60, 3)], "w": range(20)})
+
+    result = MergeUtils.multi_merge(
+        base, "k",
+        [{"df": anexo, "on": "k", "columns": ["v"]}, {"df": outro, "on": "chave", "columns": ["w"]}],
+        how=how
+    )
+
+    esperado = (
+        base.merge(anexo.drop_duplicates("k"), on="k", how=how)
+        .merge(outro.rename(columns={"chave": "k"}), on="k", how=how)
+    )
+    pd.testing.assert_frame_equal(
+        result[["id", "v", "w"]].astype(float).reset_index(drop=True),
+        esperado[["id", "v", "w"]].astype(float).reset_index(drop=True)
+    )
+
+
+def test_split_by_key_igual_ao_isin(planilhas):
+    base, anexo = planilhas
+    base = base.astype({"k": object})
+    base.loc[:4, "k"] = None
+
+    partes = MergeUtils.split_by_key(base, "k", anexo, "k")
+
+    presentes = base["k"].isin(set(anexo["k"])) & base["k"].notna()
+    np.testing.assert_array_equal(partes["masks"]["df1"], presentes.to_numpy())
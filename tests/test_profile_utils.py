@@ -0,0 +1,83 @@
+# tests/test_profile_utils.py - Perfil de colunas e cache por conteúdo
+
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.profile_utils import ColumnProfiler
+
+
+@pytest.fixture(autouse=True)
+def cache_vazio():
+    ColumnProfiler.clear()
+    yield
+    ColumnProfiler.clear()
+
+
+@pytest.fixture
+def contador(monkeypatch):
+    """Conta as colunas efetivamente calculadas (fora do cache)"""
+    chamadas = []
+    original = ColumnProfiler._column_stats
+
+    def contar(series):
+        chamadas.append(series.name)
+        return original(series)
+
+    monkeypatch.setattr(ColumnProfiler, "_column_stats", staticmethod(contar))
+    return chamadas
+
+
+def _planilha(linhas=5_000):
+    rng = np.random.default_rng(5)
+    return pd.DataFrame({
+        "processo": [f"{i:07d}" for i in range(linhas)],
+        "classe": rng.choice(["a", "b", None], linhas),
+        "valor": rng.integers(0, 100, linhas),
+    })
+
+
+def test_perfil_igual_ao_pandas():
+    df = _planilha()
+    perfil = ColumnProfiler.profile(df).set_index("Coluna")
+
+    for col in df.columns:
+        assert perfil.loc[col, "Não Nulos"] == df[col].notna().sum()
+        assert perfil.loc[col, "Valores Únicos"] == df[col].nunique()
+    assert ColumnProfiler.duplicate_rows(df) == df.duplicated().sum()
+
+
+def test_distintos_aproximados_em_planilha_grande(monkeypatch):
+    monkeypatch.setattr(ColumnProfiler, "APPROX_THRESHOLD", 1_000)
+    df = _planilha(20_000)
+    stats = ColumnProfiler.column_stats(df, "processo")
+
+    assert stats["Únicos Aproximados"]
+    assert stats["Valores Únicos"] == pytest.approx(df["processo"].nunique(), rel=0.1)
+
+
+def test_cache_vale_para_o_dataframe_recarregado(contador):
+    df = _planilha()
+    ColumnProfiler.profile(df)
+
+    # Como no descarregamento da sessão para o disco (Feather)
+    arquivo = io.BytesIO()
+    df.to_feather(arquivo)
+    arquivo.seek(0)
+    ColumnProfiler.profile(pd.read_feather(arquivo))
+
+    assert len(contador) == len(df.columns)
+
+
+@pytest.mark.parametrize("coluna, valor", [("valor", -1), ("processo", "x")])
+def test_alteracao_no_proprio_objeto_recalcula(contador, coluna, valor):
+    df = _planilha()
+    antes = ColumnProfiler.profile(df)
+
+    df.loc[1, coluna] = valor
+    depois = ColumnProfiler.profile(df)
+
+    assert len(contador) == 2 * len(df.columns)
+    assert not antes.equals(depois)
@@ -0,0 +1,49 @@
+# tests/test_sketch_utils.py - Estimativas dos sketches comparadas com as contagens exatas
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.merge_utils import MergeUtils
+from utils.sketch_utils import ColumnSketch
+
+
+def _sketch(values, k=1024):
+    return ColumnSketch(pd.util.hash_array(np.asarray(values, dtype=object)), k=k)
+
+
+def test_distintos_exatos_ate_k():
+    values = np.random.default_rng(2).integers(0, 500, 5_000).astype(str)
+    assert _sketch(values).estimate_distinct() == pd.Series(values).nunique()
+
+
+@pytest.mark.parametrize("distintos", [5_000, 50_000])
+def test_distintos_aproximados(distintos):
+    values = np.random.default_rng(3).integers(0, distintos, 4 * distintos).astype(str)
+    exato = pd.Series(values).nunique()
+    assert _sketch(values).estimate_distinct() == pytest.approx(exato, rel=0.1)
+
+
+@pytest.mark.parametrize("inicio_b", [0, 5_000, 15_000])
+def test_jaccard_e_intersecao(inicio_b):
+    a = {str(i) for i in range(0, 20_000)}
+    b = {str(i) for i in range(inicio_b, inicio_b + 10_000)}
+    sketch_a, sketch_b = _sketch(sorted(a)), _sketch(sorted(b))
+
+    jaccard = len(a & b) / len(a | b)
+    assert sketch_a.estimate_jaccard(sketch_b) == pytest.approx(jaccard, abs=0.05)
+    assert sketch_a.estimate_intersection(sketch_b) == pytest.approx(len(a & b), rel=0.15)
+
+
+def test_discover_join_keys_encontra_o_par():
+    rng = np.random.default_rng(4)
+    ids = np.array([f"{i:07d}-12.2020.8.05.0001" for i in range(3_000)], dtype=object)
+    df1 = pd.DataFrame({"processo": ids, "classe": rng.integers(0, 3, 3_000), "valor": rng.normal(size=3_000)})
+    df2 = pd.DataFrame({"numero": rng.permutation(ids)[:2_000], "status": rng.integers(100, 200, 2_000)})
+
+    for sample_rows in (None, 1_000):
+        ranking = MergeUtils.discover_join_keys(df1, df2, sample_rows=sample_rows)
+        assert (ranking.loc[0, "coluna_1"], ranking.loc[0, "coluna_2"]) == ("processo", "numero")
+
+    ranking = MergeUtils.discover_join_keys(df1, df2, sample_rows=None)
+    assert ranking.loc[0, "comuns_estimados"] == pytest.approx(2_000, rel=0.1)
@@ -0,0 +1,261 @@
+# utils/batch_cli.py - Classificação de processos em lote, sem interface
+#
+# Executa a mesma classificação do Dashboard (FileHandler + colunas derivadas)
+# sobre vários arquivos, em paralelo, e grava os arquivos classificados e um
+# resumo em JSON. Não importa streamlit, para iniciar rápido e rodar no cron.
+#
+# Uso:
+#     python -m utils.batch_cli acervo1.xlsx acervo2.csv --saida resultados \
+#         --formato-saida parquet --remover-padrao --remover sigiloso,prioridade
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List
+
+from utils.config_utils import CAMINHO_CONFIG, carregar_configuracao, validar_configuracao
+from utils.fileHandler import FileHandler, ColunaNaoEncontrada, EXTENSOES_COMPRESSAO, tipo_arquivo
+from utils.excel_utils import BACKENDS_EXCEL, relatorio_leitura_excel
+from utils.derived_columns import ColunasDerivadas, COLUNAS_EXPORTACAO, COLUNAS_REMOCAO_PADRAO
+from utils.meta2_utils import HistogramaAnos
+from utils.parallel_utils import numero_workers
+from utils.quality_utils import RelatorioQualidade
+
+FORMATOS_SAIDA = ["xlsx", "csv", "parquet"]
+FORMATOS_NUMERO = ["padrao_cnj", "tribunal_805", "sem_formatacao"]
+
+
+def _nome_base(caminho: str) -> str:
+    """Nome do arquivo sem extensão (e sem a extensão de compressão)"""
+    nome_base = os.path.basename(caminho)
+    if os.path.splitext(nome_base)[1].lower() in EXTENSOES_COMPRESSAO:
+        nome_base = os.path.splitext(nome_base)[0]
+    return os.path.splitext(nome_base)[0]
+
+
+def nomes_saida(arquivos: List[str]) -> List[str]:
+    """
+    Nome base do arquivo gerado para cada entrada. Entradas com o mesmo nome em
+    pastas diferentes (a/acervo.csv, b/acervo.csv) recebem a pasta no nome
+    (a_acervo, b_acervo) e, se ainda repetirem, um contador.
+    """
+    bases = [_nome_base(caminho) for caminho in arquivos]
+    nomes = []
+    for caminho, base in zip(arquivos, bases):
+        if bases.count(base) > 1:
+            pasta = os.path.basename(os.path.dirname(os.path.abspath(caminho)))
+            base = f"{pasta}_{base}" if pasta else base
+        nome = base
+        contador = 2
+        while nome in nomes:
+            nome = f"{base}_{contador}"
+            contador += 1
+        nomes.append(nome)
+    return nomes
+
+
+def classificar_arquivo(caminho: str, config: Dict[str, Any], pasta_saida: str, formato_saida: str,
+                        formato_numero: str, colunas_remover: List[str], verbose: bool = False,
+                        workers_linhas: int = None, nome_saida: str = None) -> Dict[str, Any]:
+    """
+    Classifica um arquivo e grava o resultado.
+
+    Args:
+        caminho: Arquivo CSV (também compactado), XLSX ou Parquet de entrada
+        config: Configuração (ver config_utils.carregar_configuracao)
+        pasta_saida: Pasta dos arquivos gerados
+        formato_saida: "xlsx", "csv" ou "parquet"
+        formato_numero: Formato da coluna "Número Formatado"
+        colunas_remover: Colunas excluídas do arquivo gerado
+        nome_saida: Nome base do arquivo gerado (None = nome da entrada, ver nomes_saida)
+        verbose: Mostra as mensagens de depuração do FileHandler
+        workers_linhas: Processos usados para dividir as linhas do arquivo
+
+    Returns:
+        Resumo do arquivo (linhas, Meta 2, servidores, problemas e tempo)
+    """
+    inicio = time.perf_counter()
+    resumo = {"arquivo": caminho}
+    try:
+        file_type = tipo_arquivo(caminho)
+        saida_debug = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+        # O caminho vai direto para o FileHandler: CSVs são lidos com memory map
+        with saida_debug:
+            try:
+                df = FileHandler.read_file(caminho, file_type, {**config, "workers": workers_linhas})
+            except ColunaNaoEncontrada as e:
+                # Exportações com outro nome de coluna: usa a detectada pelo conteúdo
+                if e.detectada is None:
+                    raise
+                config = {**config, "coluna_processos": e.detectada}
+                resumo["coluna_detectada"] = e.detectada
+                df = FileHandler.read_file(caminho, file_type, {**config, "workers": workers_linhas})
+
+        leitura = relatorio_leitura_excel(df)
+        if leitura:
+            resumo["leitura_excel"] = leitura
+
+        coluna_processos = config["coluna_processos"]
+        params = {
+            "coluna_processos": coluna_processos,
+            "ano_meta2": config["ano_meta2"],
+            "intervalos_servidores": config["intervalos_servidores"],
+            "formato": formato_numero,
+            "workers": workers_linhas
+        }
+        derivadas = ColunasDerivadas(df)
+        df_saida = derivadas.materializar(COLUNAS_EXPORTACAO, params)
+        df_saida = df_saida.drop(columns=[col for col in colunas_remover if col in df_saida.columns and col != coluna_processos])
+        outras_colunas = [col for col in df_saida.columns if col not in COLUNAS_EXPORTACAO]
+        df_saida = df_saida[[col for col in COLUNAS_EXPORTACAO if col in df_saida.columns] + outras_colunas]
+
+        nome_base = nome_saida or _nome_base(caminho)
+        destino = os.path.join(pasta_saida, f"{nome_base}_classificado.{formato_saida}")
+        if formato_saida == "xlsx":
+            df_saida.to_excel(destino, index=False, engine="openpyxl")
+        elif formato_saida == "csv":
+            df_saida.to_csv(destino, index=False, sep=";", encoding="utf-8")
+        else:
+            df_saida.to_parquet(destino, index=False)
+
+        qualidade = RelatorioQualidade(
+            df[coluna_processos],
+            derivadas.get("Dígito", params),
+            derivadas.get("Ano Processo", params),
+            params["intervalos_servidores"]
+        )
+        resumo.update({
+            "saida": destino,
+            "linhas": len(df),
+            "meta2": HistogramaAnos(derivadas.get("Ano Processo", params)).total_meta2(params["ano_meta2"]),
+            "servidores": {str(k): int(v) for k, v in derivadas.get("Servidor", params).value_counts().items()},
+            "problemas": {linha["Problema"]: int(linha["Processos"]) for _, linha in qualidade.resumo().iterrows()},
+            "status": "ok"
+        })
+    except Exception as e:
+        resumo.update({"status": "erro", "erro": f"{type(e).__name__}: {e}"})
+
+    resumo["segundos"] = round(time.perf_counter() - inicio, 3)
+    return resumo
+
+
+def executar(arquivos: List[str], config: Dict[str, Any], pasta_saida: str, formato_saida: str = "xlsx",
+             formato_numero: str = "padrao_cnj", colunas_remover: List[str] = None,
+             workers: int = None, verbose: bool = False) -> Dict[str, Any]:
+    """
+    Classifica vários arquivos, um processo por arquivo. Com um único arquivo
+    (ou workers=1), os processos são usados para dividir as linhas do arquivo.
+
+    Args:
+        arquivos: Arquivos de entrada
+        config: Configuração (ver config_utils.carregar_configuracao)
+        pasta_saida: Pasta dos arquivos gerados e do resumo.json
+        formato_saida: "xlsx", "csv" ou "parquet"
+        formato_numero: Formato da coluna "Número Formatado"
+        colunas_remover: Colunas excluídas dos arquivos gerados
+        workers: Processos simultâneos (ver parallel_utils.numero_workers)
+        verbose: Mostra as mensagens de depuração do FileHandler
+
+    Returns:
+        Resumo geral, também gravado em resumo.json
+    """
+    os.makedirs(pasta_saida, exist_ok=True)
+    argumentos = (config, pasta_saida, formato_saida, formato_numero, colunas_remover or [], verbose)
+
+    inicio = time.perf_counter()
+    # Entradas com o mesmo nome não podem gravar no mesmo arquivo
+    nomes = nomes_saida(arquivos)
+    # Fora do servidor web o padrão é usar todos os núcleos
+    workers = numero_workers(workers, padrao=os.cpu_count() or 1)
+    if workers <= 1 or len(arquivos) == 1:
+        resultados = [
+            classificar_arquivo(caminho, *argumentos, workers, nome)
+            for caminho, nome in zip(arquivos, nomes)
+        ]
+    else:
+        workers = min(workers, len(arquivos))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futuros = [
+                executor.submit(classificar_arquivo, caminho, *argumentos, 1, nome)
+                for caminho, nome in zip(arquivos, nomes)
+            ]
+            resultados = [futuro.result() for futuro in futuros]
+
+    resumo = {
+        "gerado_em": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "configuracao": config,
+        "formato_saida": formato_saida,
+        "arquivos": resultados,
+        "total_linhas": sum(r.get("linhas", 0) for r in resultados),
+        "erros": sum(1 for r in resultados if r["status"] != "ok"),
+        "segundos": round(time.perf_counter() - inicio, 3)
+    }
+    with open(os.path.join(pasta_saida, "resumo.json"), "w", encoding="utf-8") as f:
+        json.dump(resumo, f, indent=4, ensure_ascii=False)
+    return resumo
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m utils.batch_cli",
+        description="Classifica arquivos de processos (Dígito, Ano, Meta 2, Servidor) sem abrir o navegador."
+    )
+    parser.add_argument("arquivos", nargs="+", help="Arquivos CSV (também .gz/.zip/.bz2/.xz), XLSX ou Parquet de entrada")
+    parser.add_argument("--config", default=CAMINHO_CONFIG, help="Configuração no formato de pages/config.json")
+    parser.add_argument("--saida", default="saida_classificacao", help="Pasta dos arquivos gerados")
+    parser.add_argument("--formato-saida", choices=FORMATOS_SAIDA, default="xlsx")
+    parser.add_argument("--formato-numero", choices=FORMATOS_NUMERO, default="padrao_cnj",
+                        help="Formato da coluna 'Número Formatado'")
+    parser.add_argument("--remover", default="", help="Colunas para remover, separadas por vírgula")
+    parser.add_argument("--remover-padrao", action="store_true",
+                        help="Remove também as colunas removidas por padrão no Dashboard")
+    parser.add_argument("--workers", type=int, default=None, help="Processos simultâneos (padrão: número de núcleos)")
+    parser.add_argument("--verbose", action="store_true", help="Mostra as mensagens de depuração da leitura")
+    parser.add_argument("--sem-cache", action="store_true", help="Não usa nem grava o cache em disco das planilhas lidas")
+    parser.add_argument("--abas", default="",
+                        help='Abas dos XLSX a ler: "todas" ou nomes separados por vírgula (padrão: só a primeira)')
+    parser.add_argument("--leitor-excel", choices=BACKENDS_EXCEL, default=None,
+                        help="Leitor de XLSX tentado primeiro (padrão: o mais rápido instalado)")
+    args = parser.parse_args(argv)
+
+    try:
+        config = carregar_configuracao(args.config)
+        config["cache_disco"] = not args.sem_cache
+        if args.leitor_excel:
+            config["backend_excel"] = args.leitor_excel
+        if args.abas:
+            config["abas"] = "todas" if args.abas == "todas" else [aba.strip() for aba in args.abas.split(",") if aba.strip()]
+    except (OSError, ValueError) as e:
+        print(f"Erro ao carregar a configuração: {e}", file=sys.stderr)
+        return 2
+    problemas = validar_configuracao(config)
+    if problemas:
+        for problema in problemas:
+            print(f"Configuração inválida: {problema}", file=sys.stderr)
+        return 2
+
+    colunas_remover = [col.strip() for col in args.remover.split(",") if col.strip()]
+    if args.remover_padrao:
+        colunas_remover += COLUNAS_REMOCAO_PADRAO
+
+    resumo = executar(
+        args.arquivos, config, args.saida, args.formato_saida, args.formato_numero,
+        colunas_remover, args.workers, args.verbose
+    )
+
+    for resultado in resumo["arquivos"]:
+        if resultado["status"] == "ok":
+            print(f"OK    {resultado['arquivo']} -> {resultado['saida']} ({resultado['linhas']} linhas, {resultado['segundos']}s)")
+        else:
+            print(f"ERRO  {resultado['arquivo']}: {resultado['erro']}", file=sys.stderr)
+    print(f"Resumo: {os.path.join(args.saida, 'resumo.json')}")
+    return 1 if resumo["erros"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,15 @@
 # utils/cache_utils.py - Utilitários para cache e persistência
+#
+# Adaptador entre a configuração (utils/config_utils.py, sem streamlit) e o
+# session_state do Streamlit. Código fora das páginas deve usar config_utils.
 
 import streamlit as st
-import json
-import os
-from typing import Dict, Any
+import uuid
+from typing import Dict, Any, Optional, Tuple
+
+from utils import config_utils
+from utils.fileHandler import COLUNA_ABA, abas_excel, tipo_arquivo
+from utils.session_data import GerenciadorDados
 
 class CacheManager:
     """Gerenciador de cache para configurações do Streamlit"""
@@ -26,9 +32,7 @@ class CacheManager:
             
             # Tentar salvar backup em arquivo
             try:
-                filepath = os.path.join(os.path.dirname(__file__), "..", "pages", nome_arquivo)
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    json.dump(configuracao, f, indent=4, ensure_ascii=False)
+                config_utils.salvar_configuracao(configuracao, config_utils.caminho_configuracao(nome_arquivo))
                 return True
             except Exception:
                 # Se não conseguir salvar arquivo, pelo menos mantém no cache
@@ -48,38 +52,14 @@ class CacheManager:
         Returns:
             Dict com as configurações
         """
-        # Configuração padrão
-        config_padrao = {
-            "intervalos_servidores": {
-                "ABEL": [[1, 19]],
-                "CARLOS": [[20, 39]],
-                "JACKMARA": [[40, 59]],
-                "LEIDIANE": [[60, 79]],
-                "TANIA": [[80, 99]]
-            },
-            "coluna_processos": "numeroProcesso",
-            "ano_meta2": 2018
-        }
-        
         # Primeiro, verificar se existe no session_state
         if "configuracao" in st.session_state:
             return st.session_state.configuracao
         
-        # Senão, tentar carregar do arquivo
-        try:
-            filepath = os.path.join(os.path.dirname(__file__), "..", "pages", nome_arquivo)
-            if os.path.exists(filepath):
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
-                    # Salvar no cache para próximas vezes
-                    st.session_state.configuracao = config
-                    return config
-        except Exception:
-            pass
-        
-        # Se não conseguiu carregar, usar padrão e salvar no cache
-        st.session_state.configuracao = config_padrao
-        return config_padrao
+        # Senão, carregar do arquivo (ou a padrão) e salvar no cache para próximas vezes
+        config = config_utils.carregar_configuracao_ou_padrao(config_utils.caminho_configuracao(nome_arquivo))
+        st.session_state.configuracao = config
+        return config
     
     @staticmethod
     def limpar_cache():
@@ -95,8 +75,7 @@ class CacheManager:
         Returns:
             String JSON com as configurações
         """
-        config = CacheManager.carregar_configuracao()
-        return json.dumps(config, indent=4, ensure_ascii=False)
+        return config_utils.exportar_configuracao(CacheManager.carregar_configuracao())
     
     @staticmethod
     def importar_configuracao(json_str: str) -> bool:
@@ -110,7 +89,7 @@ class CacheManager:
             bool: True se importou com sucesso
         """
         try:
-            config = json.loads(json_str)
+            config = config_utils.importar_configuracao(json_str)
             return CacheManager.salvar_configuracao(config)
         except Exception:
             return False
@@ -118,18 +97,7 @@ class CacheManager:
     @staticmethod 
     def resetar_configuracao():
         """Reseta configuração para valores padrão"""
-        config_padrao = {
-            "intervalos_servidores": {
-                "ABEL": [[1, 19]],
-                "CARLOS": [[20, 39]],
-                "JACKMARA": [[40, 59]], 
-                "LEIDIANE": [[60, 79]],
-                "TANIA": [[80, 99]]
-            },
-            "coluna_processos": "numeroProcesso",
-            "ano_meta2": 2018
-        }
-        return CacheManager.salvar_configuracao(config_padrao)
+        return CacheManager.salvar_configuracao(config_utils.configuracao_padrao())
 
 # Funções convenientes para uso direto
 def salvar_config(config: Dict[str, Any]) -> bool:
@@ -153,6 +121,98 @@ def atualizar_config(updates: Dict[str, Any]):
     
     st.session_state.configuracao.update(updates)
 
+def usar_coluna_detectada(erro: Exception) -> bool:
+    """
+    Se o arquivo não tem a coluna de processos configurada, mas outra coluna tem
+    números de processo (ColunaNaoEncontrada.detectada), passa a usar essa
+    coluna e reexecuta a página.
+
+    Returns:
+        False se não houver coluna detectada (o erro deve ser mostrado)
+    """
+    detectada = getattr(erro, "detectada", None)
+    if detectada is None:
+        return False
+    atualizar_config({"coluna_processos": detectada})
+    st.session_state.aviso_coluna_detectada = (erro.coluna, detectada, erro.taxa)
+    st.rerun()
+
+def exibir_aviso_coluna_detectada():
+    """Avisa (uma vez) que a coluna de processos foi trocada pela detectada"""
+    aviso = st.session_state.pop("aviso_coluna_detectada", None)
+    if aviso:
+        coluna, detectada, taxa = aviso
+        st.info(f"🔎 A coluna '{coluna}' não existe no arquivo. Usando '{detectada}', "
+                f"em que {taxa:.0%} dos valores são números de processo.")
+
+def selecionar_abas(arquivo, chave: str, local=st.sidebar) -> Optional[Tuple[str, ...]]:
+    """
+    Para um XLSX com mais de uma aba, deixa escolher as abas a ler (por
+    padrão, só a primeira).
+
+    Args:
+        arquivo: Arquivo enviado
+        chave: Chave do widget (única na página)
+        local: Onde mostrar a seleção (barra lateral por padrão)
+
+    Returns:
+        Abas escolhidas (config "abas" do FileHandler) ou None para só a primeira
+    """
+    if arquivo is None or tipo_arquivo(arquivo.name) != "xlsx":
+        return None
+    assinatura = (arquivo.name, arquivo.size)
+    guardadas = st.session_state.get(f"{chave}_nomes")
+    if not guardadas or guardadas[0] != assinatura:
+        try:
+            guardadas = (assinatura, abas_excel(arquivo))
+        except Exception:
+            # Arquivo inválido: o erro aparece na leitura
+            return None
+        st.session_state[f"{chave}_nomes"] = guardadas
+    abas = guardadas[1]
+    if len(abas) <= 1:
+        return None
+
+    escolhidas = local.multiselect(
+        f"Abas a ler ({len(abas)} no arquivo):", abas, default=abas[:1], key=chave,
+        help=f"Com mais de uma aba, as linhas são empilhadas e a coluna '{COLUNA_ABA}' indica a origem."
+    )
+    if not escolhidas or list(escolhidas) == abas[:1]:
+        return None
+    # Na ordem das guias, para a mesma seleção dar sempre a mesma chave de cache
+    return tuple(aba for aba in abas if aba in escolhidas)
+
+def obter_sessao_id() -> str:
+    """Identificador da sessão atual, usado nas reservas do cache compartilhado"""
+    if "sessao_id" not in st.session_state:
+        st.session_state.sessao_id = uuid.uuid4().hex
+    return st.session_state.sessao_id
+
+def dados_sessao() -> GerenciadorDados:
+    """DataFrames da sessão atual, com limite de memória (ver utils/session_data.py)"""
+    return GerenciadorDados(obter_sessao_id())
+
+def exibir_uso_dados_sessao():
+    """Mostra na barra lateral a memória usada pelos DataFrames da sessão"""
+    dados = dados_sessao()
+    uso = dados.uso()
+    with st.sidebar.expander("💾 Memória da sessão"):
+        st.metric(
+            "Em memória",
+            f"{uso['memoria_sessao_mb']:.1f} MB",
+            help=f"Limite da sessão: {uso['limite_sessao_mb']:.0f} MB"
+        )
+        if uso["disco_sessao_mb"]:
+            st.caption(f"📀 {uso['disco_sessao_mb']:.1f} MB descarregados em disco (relidos quando usados)")
+        st.progress(min(uso["memoria_sessao_mb"] / max(uso["limite_sessao_mb"], 1), 1.0))
+        st.caption(
+            f"Todas as sessões ({uso['sessoes']}): {uso['memoria_global_mb']:.1f} MB "
+            f"de {uso['limite_global_mb']:.0f} MB"
+        )
+        tabela = dados.tabela_uso()
+        if len(tabela):
+            st.dataframe(tabela, hide_index=True, use_container_width=True)
+
 # Decorador para funcões que usam cache
 def with_cache_config(func):
     """Decorador que garante que a configuração está carregada"""
@@ -0,0 +1,203 @@
+# utils/config_utils.py - Leitura, validação e gravação da configuração
+#
+# Não depende de streamlit: pode ser usado pelo CLI, por processos de trabalho
+# e por testes. O acesso à sessão do Streamlit fica em utils/cache_utils.py.
+
+import copy
+import json
+import os
+from typing import Any, Dict, List
+
+PASTA_CONFIG = os.path.join(os.path.dirname(__file__), "..", "pages")
+CAMINHO_CONFIG = os.path.join(PASTA_CONFIG, "config.json")
+
+CONFIG_PADRAO = {
+    "intervalos_servidores": {
+        "ABEL": [[1, 19]],
+        "CARLOS": [[20, 39]],
+        "JACKMARA": [[40, 59]],
+        "LEIDIANE": [[60, 79]],
+        "TANIA": [[80, 99]]
+    },
+    "coluna_processos": "numeroProcesso",
+    "ano_meta2": 2018
+}
+
+
+def configuracao_padrao() -> Dict[str, Any]:
+    """Cópia da configuração padrão"""
+    return copy.deepcopy(CONFIG_PADRAO)
+
+
+def caminho_configuracao(nome_arquivo: str = "config.json") -> str:
+    """Caminho de um arquivo de configuração na pasta pages"""
+    return os.path.join(PASTA_CONFIG, nome_arquivo)
+
+
+def normalizar_configuracao(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Completa as chaves ausentes com a configuração padrão e converte os limites
+    dos intervalos para inteiros.
+
+    Args:
+        config: Configuração lida de um JSON
+
+    Returns:
+        Nova configuração normalizada
+
+    Raises:
+        ValueError: Se a estrutura não for a esperada
+    """
+    if not isinstance(config, dict):
+        raise ValueError("A configuração deve ser um objeto JSON")
+
+    normalizada = configuracao_padrao()
+    normalizada.update(copy.deepcopy(config))
+
+    intervalos_servidores = normalizada["intervalos_servidores"]
+    if not isinstance(intervalos_servidores, dict):
+        raise ValueError("'intervalos_servidores' deve associar cada servidor a uma lista de intervalos")
+
+    for servidor, intervalos in intervalos_servidores.items():
+        if not isinstance(intervalos, list):
+            raise ValueError(f"Os intervalos do servidor '{servidor}' devem ser uma lista")
+        for i, intervalo in enumerate(intervalos):
+            if not isinstance(intervalo, (list, tuple)) or len(intervalo) != 2:
+                raise ValueError(f"Intervalo {i + 1} do servidor '{servidor}' deve ter início e fim")
+            try:
+                intervalos[i] = [int(intervalo[0]), int(intervalo[1])]
+            except (TypeError, ValueError):
+                raise ValueError(f"Intervalo {i + 1} do servidor '{servidor}' não é numérico: {intervalo}")
+
+    try:
+        normalizada["ano_meta2"] = int(normalizada["ano_meta2"])
+    except (TypeError, ValueError):
+        raise ValueError(f"'ano_meta2' deve ser um ano: {normalizada['ano_meta2']}")
+    normalizada["coluna_processos"] = str(normalizada["coluna_processos"])
+
+    return normalizada
+
+
+def validar_configuracao(config: Dict[str, Any]) -> List[str]:
+    """
+    Lista os problemas de uma configuração.
+
+    Intervalos [0, 0] são aceitos: é o valor usado para servidores sem dígitos.
+
+    Args:
+        config: Configuração a validar
+
+    Returns:
+        Lista de mensagens (vazia se a configuração é válida)
+    """
+    try:
+        config = normalizar_configuracao(config)
+    except ValueError as e:
+        return [str(e)]
+
+    problemas = []
+    if not config["coluna_processos"].strip():
+        problemas.append("'coluna_processos' não pode ser vazio")
+    if not 1900 <= config["ano_meta2"] <= 2100:
+        problemas.append(f"'ano_meta2' fora do intervalo 1900-2100: {config['ano_meta2']}")
+
+    for servidor, intervalos in config["intervalos_servidores"].items():
+        for inicio, fim in intervalos:
+            if not (0 <= inicio <= 99 and 0 <= fim <= 99):
+                problemas.append(f"Servidor '{servidor}': intervalo [{inicio}, {fim}] fora dos dígitos 0-99")
+            elif inicio > fim:
+                problemas.append(f"Servidor '{servidor}': intervalo [{inicio}, {fim}] com início maior que o fim")
+
+    return problemas
+
+
+def nomes_repetidos(nomes: List[str]) -> List[str]:
+    """
+    Nomes que aparecem mais de uma vez (ex.: dois servidores renomeados para o
+    mesmo nome, em que um perderia os intervalos).
+
+    Args:
+        nomes: Nomes na ordem do formulário
+
+    Returns:
+        Nomes repetidos, em ordem alfabética
+    """
+    return sorted({nome for nome in nomes if nomes.count(nome) > 1})
+
+
+def carregar_configuracao(caminho: str = CAMINHO_CONFIG) -> Dict[str, Any]:
+    """
+    Lê e normaliza uma configuração em JSON.
+
+    Args:
+        caminho: Arquivo de configuração
+
+    Returns:
+        Configuração normalizada
+
+    Raises:
+        OSError: Se o arquivo não puder ser lido
+        ValueError: Se o JSON ou a estrutura forem inválidos
+    """
+    with open(caminho, "r", encoding="utf-8") as f:
+        return normalizar_configuracao(json.load(f))
+
+
+def carregar_configuracao_ou_padrao(caminho: str = CAMINHO_CONFIG) -> Dict[str, Any]:
+    """
+    Lê a configuração do arquivo ou, se não for possível, retorna a padrão.
+
+    Args:
+        caminho: Arquivo de configuração
+
+    Returns:
+        Configuração
+    """
+    try:
+        if os.path.exists(caminho):
+            return carregar_configuracao(caminho)
+    except (OSError, ValueError):
+        pass
+    return configuracao_padrao()
+
+
+def salvar_configuracao(config: Dict[str, Any], caminho: str = CAMINHO_CONFIG):
+    """
+    Grava a configuração em JSON.
+
+    Args:
+        config: Configuração
+        caminho: Arquivo de destino
+
+    Raises:
+        OSError: Se o arquivo não puder ser gravado
+    """
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=4, ensure_ascii=False)
+
+
+def exportar_configuracao(config: Dict[str, Any]) -> str:
+    """Configuração como texto JSON"""
+    return json.dumps(config, indent=4, ensure_ascii=False)
+
+
+def importar_configuracao(json_str: str, validar: bool = True) -> Dict[str, Any]:
+    """
+    Lê uma configuração a partir de texto JSON.
+
+    Args:
+        json_str: Texto JSON
+        validar: Rejeita configurações com problemas (ver validar_configuracao)
+
+    Returns:
+        Configuração normalizada
+
+    Raises:
+        ValueError: Se o JSON for inválido ou, com validar, se houver problemas
+    """
+    config = normalizar_configuracao(json.loads(json_str))
+    if validar:
+        problemas = validar_configuracao(config)
+        if problemas:
+            raise ValueError("; ".join(problemas))
+    return config
@@ -0,0 +1,222 @@
+# utils/derived_columns.py - Colunas derivadas com recálculo incremental
+
+import functools
+import json
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+import pandas as pd
+
+from utils.parallel_utils import aplicar_texto
+from utils.shared_cache import CacheCompartilhado
+from utils.fileHandler import (
+    FileHandler,
+    extrair_ano_processo_melhorado,
+    classificar_meta2_melhorado,
+    atribuir_servidor_melhorado,
+    formatar_numero_processo,
+)
+
+
+class ColunaDerivada:
+    """Declaração de uma coluna derivada: de quais colunas e configurações ela depende"""
+
+    def __init__(self, dependencias: List[str], entradas: List[str],
+                 funcao: Callable[[pd.DataFrame, Dict[str, pd.Series], Dict[str, Any]], pd.Series]):
+        """
+        Args:
+            dependencias: Outras colunas derivadas usadas no cálculo
+            entradas: Chaves de configuração usadas no cálculo
+            funcao: Recebe (DataFrame base, colunas dependentes, parâmetros) e retorna a coluna
+        """
+        self.dependencias = dependencias
+        self.entradas = entradas
+        self.funcao = funcao
+
+
+def _calcular_digito(df, colunas, params):
+    # FileHandler.read_file já extrai o dígito da coluna de processos configurada
+    if "Dígito" in df.columns:
+        return df["Dígito"]
+    return aplicar_texto(df[params["coluna_processos"]], FileHandler.extrair_digito_simples, params.get("workers"))
+
+
+def _calcular_ano(df, colunas, params):
+    return aplicar_texto(df[params["coluna_processos"]], extrair_ano_processo_melhorado, params.get("workers"))
+
+
+def _calcular_meta2(df, colunas, params):
+    return colunas["Ano Processo"].apply(lambda ano: classificar_meta2_melhorado(ano, params["ano_meta2"]))
+
+
+def _calcular_servidor(df, colunas, params):
+    configuracao = {"intervalos_servidores": params["intervalos_servidores"]}
+    return colunas["Dígito"].apply(lambda digito: atribuir_servidor_melhorado(digito, configuracao))
+
+
+def _calcular_numero_formatado(df, colunas, params):
+    formatar = functools.partial(formatar_numero_processo, formato_destino=params["formato"])
+    return aplicar_texto(df[params["coluna_processos"]], formatar, params.get("workers"))
+
+
+# Grafo das colunas derivadas do Dashboard. Além das entradas declaradas, os
+# parâmetros podem ter "workers": processos usados nas colunas de texto (não
+# altera o resultado, por isso não entra nas assinaturas).
+COLUNAS_DERIVADAS = {
+    "Dígito": ColunaDerivada([], ["coluna_processos"], _calcular_digito),
+    "Ano Processo": ColunaDerivada([], ["coluna_processos"], _calcular_ano),
+    "Meta 2 Classificacao": ColunaDerivada(["Ano Processo"], ["ano_meta2"], _calcular_meta2),
+    "Servidor": ColunaDerivada(["Dígito"], ["intervalos_servidores"], _calcular_servidor),
+    "Número Formatado": ColunaDerivada([], ["coluna_processos", "formato"], _calcular_numero_formatado),
+}
+
+# Colunas derivadas incluídas no arquivo processado, nesta ordem
+COLUNAS_EXPORTACAO = ["Dígito", "Ano Processo", "Meta 2 Classificacao", "Servidor", "Número Formatado"]
+
+# Colunas do acervo PJe R+ removidas por padrão do arquivo processado
+COLUNAS_REMOCAO_PADRAO = [
+    "cargoJudicial", "ultimoMovimento", "podeMovimentarEmLote",
+    "podeMinutarEmLote", "podeIntimarEmLote", "podeDesignarAudienciaEmLote",
+    "podeDesignarPericiaEmLote", "podeRenajudEmLote", "sigiloso",
+    "prioridade", "dataChegada", "conferido", "idTaskInstance",
+    "idTaskInstanceProximo", "idProcesso", "classeJudicial"
+]
+
+
+class ColunasDerivadas:
+    """
+    Calcula as colunas derivadas de um DataFrame sob demanda.
+
+    Cada coluna calculada fica guardada junto com a assinatura das suas entradas
+    (configurações usadas e assinaturas das colunas de que depende). Ao mudar uma
+    configuração, só as colunas afetadas por ela são recalculadas; colunas que
+    nenhum painel pede nunca são calculadas.
+    """
+
+    def __init__(self, df: pd.DataFrame, grafo: Dict[str, ColunaDerivada] = None,
+                 compartilhado: Optional[CacheCompartilhado] = None, prefixo: Hashable = None,
+                 sessao: Optional[str] = None):
+        """
+        Args:
+            df: DataFrame base (já lido e pré-processado)
+            grafo: Declaração das colunas derivadas (padrão: COLUNAS_DERIVADAS)
+            compartilhado: Cache entre sessões; colunas com a mesma assinatura,
+                calculadas por outra sessão para o mesmo arquivo, são reaproveitadas
+            prefixo: Identificador do arquivo base no cache compartilhado
+                (ex.: hash do conteúdo e coluna de processos)
+            sessao: Sessão que reserva as colunas no cache compartilhado
+        """
+        self.df = df
+        self.grafo = grafo or COLUNAS_DERIVADAS
+        self.compartilhado = compartilhado
+        self.prefixo = prefixo
+        self.sessao = sessao
+        self._cache = {}
+        self._agregados = {}
+
+    def assinatura(self, nome: str, params: Dict[str, Any]) -> str:
+        """
+        Assinatura das entradas de uma coluna, incluindo as das suas dependências.
+
+        Args:
+            nome: Nome da coluna derivada
+            params: Configurações atuais
+
+        Returns:
+            String que muda sempre que alguma entrada da coluna muda
+        """
+        coluna = self.grafo[nome]
+        entradas = {entrada: params.get(entrada) for entrada in coluna.entradas}
+        dependencias = {dep: self.assinatura(dep, params) for dep in coluna.dependencias}
+        return json.dumps([entradas, dependencias], sort_keys=True, ensure_ascii=False, default=str)
+
+    def get(self, nome: str, params: Dict[str, Any]) -> pd.Series:
+        """
+        Retorna uma coluna derivada, recalculando apenas se suas entradas mudaram.
+
+        Args:
+            nome: Nome da coluna derivada
+            params: Configurações atuais
+
+        Returns:
+            Série com a coluna calculada
+        """
+        assinatura = self.assinatura(nome, params)
+        em_cache = self._cache.get(nome)
+        if em_cache is not None and em_cache[0] == assinatura:
+            return em_cache[1]
+
+        coluna = self.grafo[nome]
+
+        def calcular():
+            dependencias = {dep: self.get(dep, params) for dep in coluna.dependencias}
+            return coluna.funcao(self.df, dependencias, params)
+
+        if self.compartilhado is None:
+            serie = calcular()
+        else:
+            serie = self.compartilhado.obter(
+                (self.prefixo, nome, assinatura), calcular, self.sessao, vaga=(self.prefixo, nome)
+            )
+        self._cache[nome] = (assinatura, serie)
+        return serie
+
+    def esta_atualizada(self, nome: str, params: Dict[str, Any]) -> bool:
+        """Indica se a coluna já está calculada para as configurações atuais"""
+        em_cache = self._cache.get(nome)
+        return em_cache is not None and em_cache[0] == self.assinatura(nome, params)
+
+    def agregado(self, nome: str, colunas: List[str], funcao: Callable[..., Any],
+                 params: Dict[str, Any]) -> Any:
+        """
+        Resultado calculado a partir de colunas derivadas (ex.: histogramas),
+        recalculado apenas quando alguma dessas colunas muda.
+
+        Args:
+            nome: Identificador do agregado
+            colunas: Colunas derivadas usadas
+            funcao: Recebe as colunas, na ordem de `colunas`, e retorna o agregado
+            params: Configurações atuais
+
+        Returns:
+            O agregado calculado ou em cache
+        """
+        assinatura = json.dumps([self.assinatura(coluna, params) for coluna in colunas], ensure_ascii=False)
+        em_cache = self._agregados.get(nome)
+        if em_cache is not None and em_cache[0] == assinatura:
+            return em_cache[1]
+
+        resultado = funcao(*[self.get(coluna, params) for coluna in colunas])
+        self._agregados[nome] = (assinatura, resultado)
+        return resultado
+
+    def materializar(self, nomes: List[str], params: Dict[str, Any]) -> pd.DataFrame:
+        """
+        Monta um DataFrame com as colunas base e as colunas derivadas pedidas.
+
+        Args:
+            nomes: Colunas derivadas desejadas
+            params: Configurações atuais
+
+        Returns:
+            Novo DataFrame (o DataFrame base não é alterado)
+        """
+        return self.df.assign(**{nome: self.get(nome, params) for nome in nomes})
+
+    def amostra(self, nomes: List[str], params: Dict[str, Any], linhas: int = 5) -> pd.DataFrame:
+        """
+        Primeiras linhas com as colunas derivadas, sem calcular colunas inteiras.
+
+        Colunas já atualizadas vêm do cache; as demais são calculadas só para a amostra.
+
+        Args:
+            nomes: Colunas derivadas desejadas
+            params: Configurações atuais
+            linhas: Quantidade de linhas
+
+        Returns:
+            DataFrame com a amostra
+        """
+        amostra = ColunasDerivadas(self.df.head(linhas), self.grafo)
+        for nome, (assinatura, serie) in self._cache.items():
+            amostra._cache[nome] = (assinatura, serie.head(linhas))
+        return amostra.materializar(nomes, params)
@@ -0,0 +1,196 @@
+# utils/disk_cache.py - Cache em disco das planilhas já lidas (formato Feather)
+
+import hashlib
+import os
+import tempfile
+from typing import Any, Optional
+
+import pandas as pd
+
+try:
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow é opcional: sem ele o cache fica desativado
+    feather = None
+
+# Muda quando a leitura ou o pré-processamento mudam, invalidando o cache antigo
+VERSAO_CACHE = 2
+
+PASTA_PADRAO = os.environ.get(
+    "CENTRAL_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "central_automacao")
+)
+LIMITE_PADRAO_MB = int(os.environ.get("CENTRAL_CACHE_MB", "1024"))
+
+
+class CacheDisco:
+    """
+    Cache das planilhas lidas, guardadas em arquivos Feather sem compressão
+    (lidos com memory map), identificados pelo hash do conteúdo enviado.
+
+    O mesmo arquivo enviado de novo, em outra sessão ou em outra página, é
+    carregado do cache em vez de ser lido e pré-processado outra vez. Quando o
+    tamanho total passa do limite, os arquivos usados há mais tempo são
+    removidos (a data de modificação é atualizada a cada leitura).
+    """
+
+    EXTENSAO = ".feather"
+
+    def __init__(self, pasta: str = PASTA_PADRAO, limite_mb: int = LIMITE_PADRAO_MB):
+        """
+        Args:
+            pasta: Pasta dos arquivos de cache
+            limite_mb: Tamanho máximo do cache em MB (0 desativa o cache)
+        """
+        self.pasta = pasta
+        self.limite_bytes = limite_mb * 1024 * 1024
+        self.ativo = feather is not None and self.limite_bytes > 0
+        if self.ativo:
+            try:
+                os.makedirs(self.pasta, exist_ok=True)
+            except OSError:
+                self.ativo = False
+
+    @staticmethod
+    def hash_arquivo(file) -> str:
+        """
+        Hash do conteúdo de um arquivo enviado.
+
+        Arquivos enviados (BytesIO/UploadedFile) são lidos direto do buffer, sem
+        cópia; arquivos abertos e caminhos são lidos em blocos. Arquivos abertos
+        voltam para o início.
+
+        Args:
+            file: Arquivo enviado, arquivo aberto em modo binário ou caminho
+
+        Returns:
+            Hash hexadecimal
+        """
+        hash_conteudo = hashlib.blake2b(digest_size=20)
+        if isinstance(file, (str, os.PathLike)):
+            with open(file, "rb") as f:
+                for bloco in iter(lambda: f.read(1024 * 1024), b""):
+                    hash_conteudo.update(bloco)
+        elif hasattr(file, "getbuffer"):
+            with file.getbuffer() as buffer:
+                hash_conteudo.update(buffer)
+            file.seek(0)
+        else:
+            file.seek(0)
+            for bloco in iter(lambda: file.read(1024 * 1024), b""):
+                hash_conteudo.update(bloco)
+            file.seek(0)
+        return hash_conteudo.hexdigest()
+
+    def chave(self, file, *parametros: Any, hash_conteudo: Optional[str] = None) -> str:
+        """
+        Chave de cache: conteúdo do arquivo mais os parâmetros que mudam o
+        resultado da leitura (tipo de arquivo, coluna de processos...).
+
+        Args:
+            file: Arquivo enviado
+            parametros: Parâmetros da leitura
+            hash_conteudo: Hash já calculado com hash_arquivo (evita reler o arquivo)
+
+        Returns:
+            Chave usada como nome do arquivo de cache
+        """
+        parametros_hash = hashlib.blake2b(repr((VERSAO_CACHE,) + parametros).encode("utf-8"), digest_size=8)
+        return f"{hash_conteudo or self.hash_arquivo(file)}_{parametros_hash.hexdigest()}"
+
+    def _caminho(self, chave: str) -> str:
+        return os.path.join(self.pasta, chave + self.EXTENSAO)
+
+    def ler(self, chave: str) -> Optional[pd.DataFrame]:
+        """
+        Lê uma planilha do cache.
+
+        Args:
+            chave: Chave (ver chave)
+
+        Returns:
+            DataFrame ou None se não estiver no cache
+        """
+        if not self.ativo:
+            return None
+        caminho = self._caminho(chave)
+        try:
+            df = feather.read_table(caminho, memory_map=True).to_pandas()
+            os.utime(caminho)
+            return df
+        except (OSError, ValueError):
+            # Ausente, removido por outra sessão ou corrompido
+            return None
+
+    def gravar(self, chave: str, df: pd.DataFrame) -> bool:
+        """
+        Grava uma planilha no cache e remove as mais antigas se passar do limite.
+
+        Planilhas que o formato Feather não aceita (colunas com tipos misturados,
+        nomes de coluna não texto) simplesmente não são guardadas.
+
+        Args:
+            chave: Chave (ver chave)
+            df: DataFrame lido
+
+        Returns:
+            True se a planilha foi guardada
+        """
+        if not self.ativo:
+            return False
+
+        descritor, temporario = tempfile.mkstemp(dir=self.pasta, suffix=".tmp")
+        os.close(descritor)
+        try:
+            df.reset_index(drop=True).to_feather(temporario, compression="uncompressed")
+            os.replace(temporario, self._caminho(chave))
+        except Exception:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+            return False
+
+        self.limpar_excedente()
+        return True
+
+    def limpar_excedente(self):
+        """Remove os arquivos usados há mais tempo até o cache caber no limite"""
+        arquivos = []
+        for nome in os.listdir(self.pasta):
+            if nome.endswith(self.EXTENSAO):
+                caminho = os.path.join(self.pasta, nome)
+                try:
+                    estado = os.stat(caminho)
+                except OSError:
+                    continue
+                arquivos.append((estado.st_mtime, estado.st_size, caminho))
+
+        total = sum(tamanho for _, tamanho, _ in arquivos)
+        for _, tamanho, caminho in sorted(arquivos):
+            if total <= self.limite_bytes:
+                break
+            try:
+                os.remove(caminho)
+                total -= tamanho
+            except OSError:
+                pass
+
+    def limpar(self):
+        """Remove todos os arquivos do cache"""
+        if not self.ativo:
+            return
+        for nome in os.listdir(self.pasta):
+            if nome.endswith(self.EXTENSAO):
+                try:
+                    os.remove(os.path.join(self.pasta, nome))
+                except OSError:
+                    pass
+
+
+_cache_padrao = None
+
+
+def cache_padrao() -> CacheDisco:
+    """Cache compartilhado pelas páginas (pasta e limite das variáveis de ambiente)"""
+    global _cache_padrao
+    if _cache_padrao is None:
+        _cache_padrao = CacheDisco()
+    return _cache_padrao
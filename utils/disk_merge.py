@@ -0,0 +1,229 @@
+# utils/disk_merge.py - União de planilhas grandes com apoio em disco (SQLite)
+
+import os
+import shutil
+import sqlite3
+import tempfile
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.fileHandler import FileHandler, tipo_arquivo
+from utils.merge_utils import MergeUtils
+
+
+class DiskMerge:
+    """
+    União de planilhas que não cabem juntas na memória.
+
+    As duas planilhas são lidas em blocos e gravadas em um banco SQLite
+    temporário, particionadas pelo hash da chave normalizada. A união é feita
+    partição por partição e o resultado é gravado direto em um CSV, de modo que
+    o pico de memória fica limitado ao tamanho de uma partição.
+
+    Chaves nulas ou vazias nunca têm correspondência (como em
+    MergeUtils.split_by_key): ficam em uma partição própria e só aparecem no
+    resultado como linhas sem par, nos joins left/right/outer.
+    """
+
+    KEY_COLUMN = "_chave"
+    PARTITION_COLUMN = "_particao"
+    # Partição das linhas com chave nula ou vazia
+    NULL_PARTITION = -1
+
+    def __init__(self, partitions: int = 32, directory: Optional[str] = None):
+        """
+        Args:
+            partitions: Quantidade de partições por hash da chave
+            directory: Pasta para os arquivos temporários (None = pasta temporária do sistema)
+        """
+        self.partitions = partitions
+        self.directory = tempfile.mkdtemp(prefix="uniao_disco_", dir=directory)
+        self.connection = sqlite3.connect(os.path.join(self.directory, "particoes.db"))
+        self.tables = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Fecha o banco e remove os arquivos temporários"""
+        self.connection.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    @staticmethod
+    def iter_chunks(file, chunksize: int = 50_000) -> Iterator[pd.DataFrame]:
+        """
+        Lê uma planilha enviada em blocos de linhas, sem carregá-la inteira.
+
+        CSV (também compactado) usa o leitor em blocos do pandas, com o
+        delimitador detectado; Parquet é lido por lotes; XLSX usa o modo somente
+        leitura do openpyxl, que percorre a planilha linha a linha.
+
+        Args:
+            file: Arquivo enviado (UploadedFile ou objeto com atributo name)
+            chunksize: Linhas por bloco
+
+        Returns:
+            Iterador de DataFrames
+        """
+        file_type = tipo_arquivo(file.name)
+        if file_type == "csv":
+            delimiter, quotechar = FileHandler.detect_csv_properties(file)
+            with pd.read_csv(file, chunksize=chunksize, delimiter=delimiter, quotechar=quotechar,
+                             **FileHandler.opcoes_csv(file)) as reader:
+                yield from reader
+            return
+        if file_type == "parquet":
+            import pyarrow.parquet as pq
+            for lote in pq.ParquetFile(file).iter_batches(batch_size=chunksize):
+                yield lote.to_pandas()
+            return
+
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(file, read_only=True, data_only=True)
+        try:
+            rows = workbook.worksheets[0].iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+            columns = [name if name is not None else f"Unnamed: {i}" for i, name in enumerate(header)]
+
+            buffer = []
+            for row in rows:
+                buffer.append(row)
+                if len(buffer) == chunksize:
+                    yield pd.DataFrame(buffer, columns=columns)
+                    buffer = []
+            if buffer:
+                yield pd.DataFrame(buffer, columns=columns)
+        finally:
+            workbook.close()
+
+    @staticmethod
+    def read_header(file, rows: int = 50) -> pd.DataFrame:
+        """
+        Lê apenas as primeiras linhas de uma planilha, para escolher colunas.
+
+        Args:
+            file: Arquivo enviado
+            rows: Quantidade de linhas lidas
+
+        Returns:
+            DataFrame com as primeiras linhas
+        """
+        chunks = DiskMerge.iter_chunks(file, chunksize=rows)
+        try:
+            header = next(chunks, pd.DataFrame())
+        finally:
+            chunks.close()
+        file.seek(0)
+        return header
+
+    def add_table(self, name: str, chunks: Iterator[pd.DataFrame], key_column: str,
+                  columns: Optional[List[str]] = None) -> int:
+        """
+        Grava uma planilha no banco, particionada pelo hash da chave normalizada.
+
+        Args:
+            name: Nome da tabela
+            chunks: Blocos da planilha (ver iter_chunks)
+            key_column: Coluna de comparação
+            columns: Colunas para manter (None = todas)
+
+        Returns:
+            Número de linhas gravadas
+        """
+        total = 0
+        for chunk in chunks:
+            if columns:
+                chunk = chunk[[key_column] + [col for col in columns if col != key_column]]
+            chunk = chunk.copy()
+            keys = MergeUtils.clean_column_for_comparison(chunk[key_column])
+            valid = chunk[key_column].notna().to_numpy() & ~keys.isin(['nan', 'None', '<NA>', '']).to_numpy()
+            partitions = (pd.util.hash_array(keys.to_numpy(dtype=object)) % self.partitions).astype("int64")
+            chunk[self.KEY_COLUMN] = keys.where(valid, None)
+            chunk[self.PARTITION_COLUMN] = np.where(valid, partitions, self.NULL_PARTITION)
+            chunk.to_sql(name, self.connection, if_exists="append", index=False)
+            total += len(chunk)
+
+        self.connection.execute(
+            f'CREATE INDEX IF NOT EXISTS "idx_{name}_particao" ON "{name}" ("{self.PARTITION_COLUMN}")'
+        )
+        self.connection.commit()
+        self.tables[name] = key_column
+        return total
+
+    def _read_partition(self, name: str, partition: int) -> pd.DataFrame:
+        """Lê uma partição de uma tabela"""
+        return pd.read_sql_query(
+            f'SELECT * FROM "{name}" WHERE "{self.PARTITION_COLUMN}" = ?',
+            self.connection,
+            params=(partition,)
+        )
+
+    def merge_to_csv(self, left: str, right: str, output_path: str, how: str = "inner",
+                     suffixes: Tuple[str, str] = ("_x", "_y")) -> int:
+        """
+        Une duas tabelas partição por partição e grava o resultado em CSV.
+
+        As linhas saem agrupadas por partição, não na ordem original das planilhas.
+
+        Args:
+            left, right: Nomes das tabelas gravadas com add_table
+            output_path: Caminho do CSV de saída
+            how: Tipo de join ('inner', 'left', 'right', 'outer')
+            suffixes: Sufixos para colunas duplicadas
+
+        Returns:
+            Número de linhas do resultado
+        """
+        left_on = self.tables[left]
+        right_on = self.tables[right]
+        right_key = f"{self.KEY_COLUMN}_{right_on}"
+
+        def merge_partition(df_left: pd.DataFrame, df_right: pd.DataFrame, how: str) -> pd.DataFrame:
+            df_left = df_left.drop(columns=[self.PARTITION_COLUMN])
+            df_right = df_right.drop(columns=[self.PARTITION_COLUMN])
+            # Uma coluna comum da segunda planilha com o nome da chave da primeira
+            # levaria o sufixo no merge (e a chave da primeira também)
+            renomear = {right_on: right_key}
+            if left_on != right_on and left_on in df_right.columns:
+                nome = f"{left_on}{suffixes[1]}"
+                while nome in df_left.columns or nome in df_right.columns:
+                    nome += suffixes[1]
+                renomear[left_on] = nome
+            df_right = df_right.rename(columns=renomear)
+
+            result = pd.merge(df_left, df_right, on=self.KEY_COLUMN, how=how, suffixes=suffixes)
+
+            # Manter uma única coluna de comparação, preenchida com a chave da
+            # segunda planilha nas linhas que só existem nela
+            result[left_on] = result[left_on].fillna(result[right_key])
+            return result.drop(columns=[self.KEY_COLUMN, right_key])
+
+        total = 0
+        header = True
+        with open(output_path, "w", encoding="utf-8", newline="") as output:
+            def write(result: pd.DataFrame):
+                nonlocal header, total
+                result.to_csv(output, index=False, header=header)
+                header = False
+                total += len(result)
+
+            for partition in range(self.partitions):
+                write(merge_partition(self._read_partition(left, partition), self._read_partition(right, partition), how))
+
+            # Linhas sem chave: sem par, mantidas conforme o tipo de join
+            null_left = self._read_partition(left, self.NULL_PARTITION)
+            null_right = self._read_partition(right, self.NULL_PARTITION)
+            if how in ("left", "outer") and len(null_left):
+                write(merge_partition(null_left, null_right.iloc[0:0], "left"))
+            if how in ("right", "outer") and len(null_right):
+                write(merge_partition(null_left.iloc[0:0], null_right, "right"))
+
+        return total
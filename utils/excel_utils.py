@@ -0,0 +1,148 @@
+# utils/excel_utils.py - Leitura de XLSX com escolha automática do leitor
+
+import importlib.util
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Union
+
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+# Leitores em ordem de preferência (do mais rápido ao mais lento)
+BACKENDS_EXCEL = ["calamine", "openpyxl_leitura", "openpyxl"]
+# Leitor preferido (ex.: CENTRAL_BACKEND_EXCEL=openpyxl); os demais ficam de reserva
+BACKEND_PADRAO = os.environ.get("CENTRAL_BACKEND_EXCEL") or None
+# Leitor usado e tempo de leitura, guardados em df.attrs (sobrevivem ao cache em disco)
+CHAVE_LEITURA = "leitura_excel"
+
+
+def _ler_calamine(file, aba, nrows):
+    """Leitor em Rust (python-calamine), pelo engine do pandas (pandas>=2.2)"""
+    return pd.read_excel(file, sheet_name=aba, nrows=nrows, engine="calamine")
+
+
+def _ler_openpyxl_leitura(file, aba, nrows):
+    """
+    openpyxl em modo somente leitura, pegando só os valores das células
+    (o pandas monta um objeto por célula). O cabeçalho, as linhas vazias e os
+    tipos das colunas seguem as regras do pd.read_excel.
+    """
+    import openpyxl
+
+    livro = openpyxl.load_workbook(file, read_only=True, data_only=True, keep_links=False)
+    try:
+        if isinstance(aba, str):
+            if aba not in livro.sheetnames:
+                raise ValueError(f"Worksheet named '{aba}' not found")
+            planilha = livro[aba]
+        else:
+            planilha = livro.worksheets[aba]
+
+        linhas = []
+        largura = 0
+        preenchidas = 0
+        limite = nrows + 1 if nrows is not None else None
+        for linha in planilha.iter_rows(values_only=True):
+            # Como o pandas: linhas vazias no fim e colunas vazias à direita são
+            # descartadas; linhas vazias no meio viram linhas de nulos
+            fim = len(linha)
+            while fim and linha[fim - 1] is None:
+                fim -= 1
+            linhas.append(linha)
+            if fim:
+                largura = max(largura, fim)
+                preenchidas = len(linhas)
+            if limite is not None and len(linhas) >= limite:
+                break
+    finally:
+        livro.close()
+
+    if not preenchidas:
+        return pd.DataFrame()
+    linhas = [linha[:largura] for linha in linhas[:preenchidas]]
+    # Células vazias do cabeçalho viram "Unnamed: n", como no pandas
+    linhas[0] = tuple("" if valor is None else valor for valor in linhas[0])
+    df = TextParser(linhas, header=0).read()
+
+    # O pandas lê números inteiros gravados como 1.0 em colunas inteiras
+    for col in df.columns[(df.dtypes == "float64").to_numpy()]:
+        valores = df[col].to_numpy()
+        if not pd.isna(valores).any() and (valores == valores.round()).all():
+            df[col] = valores.astype("int64")
+    return df
+
+
+def _ler_openpyxl(file, aba, nrows):
+    """Leitor padrão do pandas"""
+    return pd.read_excel(file, sheet_name=aba, nrows=nrows, engine="openpyxl")
+
+
+LEITORES: Dict[str, Callable[[Any, Union[int, str], Optional[int]], pd.DataFrame]] = {
+    "calamine": _ler_calamine,
+    "openpyxl_leitura": _ler_openpyxl_leitura,
+    "openpyxl": _ler_openpyxl,
+}
+
+
+def backends_disponiveis() -> List[str]:
+    """Leitores instalados, em ordem de preferência"""
+    modulos = {"calamine": "python_calamine", "openpyxl_leitura": "openpyxl", "openpyxl": "openpyxl"}
+    return [nome for nome in BACKENDS_EXCEL if importlib.util.find_spec(modulos[nome]) is not None]
+
+
+def ler_excel(file, aba: Union[int, str] = 0, nrows: Optional[int] = None,
+              backend: Optional[str] = BACKEND_PADRAO) -> pd.DataFrame:
+    """
+    Lê uma aba de um XLSX com o leitor mais rápido instalado.
+
+    Os leitores são tentados em ordem (calamine, openpyxl somente leitura,
+    leitor padrão do pandas); se um falhar, o arquivo é relido pelo seguinte.
+    O leitor usado, o tempo e as falhas ficam em df.attrs[CHAVE_LEITURA].
+
+    Args:
+        file: Arquivo enviado, arquivo aberto em modo binário ou caminho
+        aba: Nome ou posição da aba
+        nrows: Linhas de dados lidas além do cabeçalho (None = todas)
+        backend: Leitor tentado primeiro (None = ordem de BACKENDS_EXCEL)
+
+    Returns:
+        DataFrame com o conteúdo da aba
+
+    Raises:
+        ValueError: Se o leitor pedido não existir
+        Exception: O erro do último leitor, se nenhum conseguir ler
+    """
+    if backend is not None and backend not in LEITORES:
+        raise ValueError(f"Leitor de XLSX desconhecido: {backend}. Opções: {', '.join(BACKENDS_EXCEL)}")
+    candidatos = backends_disponiveis()
+    if backend in candidatos:
+        candidatos.remove(backend)
+        candidatos.insert(0, backend)
+
+    falhas = {}
+    erro = None
+    for nome in candidatos:
+        if hasattr(file, "seek"):
+            file.seek(0)
+        inicio = time.perf_counter()
+        try:
+            df = LEITORES[nome](file, aba, nrows)
+        except Exception as e:
+            falhas[nome] = str(e)
+            erro = e
+            continue
+        df.attrs[CHAVE_LEITURA] = {
+            "backend": nome,
+            "segundos": round(time.perf_counter() - inicio, 3),
+            "falhas": falhas,
+        }
+        return df
+
+    if erro is None:
+        raise ImportError("Nenhum leitor de XLSX instalado (instale openpyxl)")
+    raise erro
+
+
+def relatorio_leitura_excel(df: pd.DataFrame) -> Optional[Dict[str, Any]]:
+    """Leitor e tempo de leitura do XLSX que originou o DataFrame, se houver"""
+    return df.attrs.get(CHAVE_LEITURA)
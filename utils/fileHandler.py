@@ -1,59 +1,466 @@
 # utils/fileHandler.py - Versão completa final com formatação
 
+import bz2
+import difflib
+import gzip
+import lzma
+import os
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from xml.etree import ElementTree
+import numpy as np
 import pandas as pd
 import re
 from csv import Sniffer
+from utils.parallel_utils import aplicar_texto, numero_workers
+from utils.disk_cache import cache_padrao
+from utils.memory_utils import otimizar_memoria
+from utils.excel_utils import BACKEND_PADRAO, CHAVE_LEITURA, ler_excel
+
+# Formatos de número de processo aceitos (ver extrair_componentes_numero)
+PADRAO_CNJ = re.compile(r'(\d{7})-(\d{2})\.(\d{4})\.(\d)\.(\d{2})\.(\d{4})')
+PADRAO_CNJ_805 = re.compile(r'(\d{7})-(\d{2})\.(\d{4})\.(\d{3})\.(\d{4})')
+# Tipos aceitos nos envios de planilhas (file_uploader); gz/zip/bz2/xz são CSVs compactados
+TIPOS_ACEITOS = ["csv", "xlsx", "parquet", "gz", "zip", "bz2", "xz"]
+EXTENSOES_COMPRESSAO = {".gz": "gzip", ".zip": "zip", ".bz2": "bz2", ".xz": "xz"}
+# Primeiros bytes de cada formato de compressão
+ASSINATURAS_COMPRESSAO = [
+    (b"\x1f\x8b", "gzip"), (b"BZh", "bz2"), (b"\xfd7zXZ\x00", "xz"), (b"PK\x03\x04", "zip")
+]
+# Coluna com a aba de origem quando várias abas de um XLSX são lidas juntas
+COLUNA_ABA = "Aba de Origem"
+# Abaixo deste tamanho (XLSX compactado) as abas são lidas no mesmo processo
+TAMANHO_MINIMO_ABAS_PARALELO = 1024 * 1024
+# Linhas lidas pela sonda e usadas na detecção da coluna de processos
+LINHAS_DETECCAO = 300
+# Proporção mínima de números de processo para uma coluna ser escolhida automaticamente
+TAXA_MINIMA_DETECCAO = 0.5
+
+
+class ColunaNaoEncontrada(KeyError):
+    """
+    A coluna de processos configurada não existe no arquivo. Se alguma coluna
+    tem números de processo na amostra, ela fica em detectada (e taxa).
+    """
+
+    def __init__(self, coluna, colunas, detectada=None, taxa=0.0):
+        self.coluna = coluna
+        self.colunas = list(colunas)
+        self.detectada = detectada
+        self.taxa = taxa
+        self.sugestoes = sugerir_colunas(coluna, self.colunas)
+        if detectada is not None:
+            self.sugestoes = list(dict.fromkeys([detectada] + self.sugestoes))
+        super().__init__(coluna)
+
+    def __str__(self):
+        return (f"A coluna '{self.coluna}' não foi encontrada. Colunas disponíveis: {self.colunas}. "
+                f"Colunas similares: {self.sugestoes}")
+
+
+def sugerir_colunas(coluna, colunas, limite=3):
+    """
+    Colunas parecidas com a procurada: nomes próximos (difflib, sem diferenciar
+    maiúsculas) seguidos das que contêm "processo" ou "numero".
+    """
+    nomes = {str(col).lower(): col for col in colunas}
+    parecidas = [nomes[nome] for nome in difflib.get_close_matches(str(coluna).lower(), list(nomes), n=limite, cutoff=0.5)]
+    por_nome = [col for col in colunas if 'processo' in str(col).lower() or 'numero' in str(col).lower()]
+    return list(dict.fromkeys(parecidas + por_nome))
+
+
+def tipo_arquivo(nome):
+    """
+    Tipo de leitura pelo nome do arquivo: "xlsx", "parquet" ou "csv" (inclusive
+    CSVs compactados, como processos.csv.gz ou processos.zip).
+    """
+    nome = str(nome).lower()
+    if any(nome.endswith(extensao) for extensao in EXTENSOES_COMPRESSAO):
+        return "csv"
+    if nome.endswith(".xlsx"):
+        return "xlsx"
+    if nome.endswith((".parquet", ".pq")):
+        return "parquet"
+    return "csv"
+
+
+def _ler_inicio(file, tamanho):
+    """
+    Primeiros bytes do arquivo, sem mover a posição de leitura.
+
+    Arquivos enviados (BytesIO/UploadedFile) são lidos pelo memoryview do
+    buffer, copiando só o trecho; caminhos são abertos e fechados.
+    """
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, "rb") as f:
+            return f.read(tamanho)
+    if hasattr(file, "getbuffer"):
+        with file.getbuffer() as buffer:
+            return bytes(buffer[:tamanho])
+    posicao = file.tell()
+    dados = file.read(tamanho)
+    file.seek(posicao)
+    return dados
+
+
+def compressao_arquivo(file):
+    """Compressão do arquivo pelos primeiros bytes ("gzip", "bz2", "xz", "zip") ou None"""
+    inicio = _ler_inicio(file, 8)
+    for assinatura, compressao in ASSINATURAS_COMPRESSAO:
+        if inicio.startswith(assinatura):
+            return compressao
+    return None
+
+
+def _ler_descompactado(file, compressao, tamanho):
+    """Primeiros bytes do conteúdo descompactado, sem descompactar o arquivo inteiro"""
+    caminho = isinstance(file, (str, os.PathLike))
+    origem = open(file, "rb") if caminho else file
+    posicao = None if caminho else file.tell()
+    try:
+        if compressao == "zip":
+            with zipfile.ZipFile(origem) as arquivo_zip, arquivo_zip.open(arquivo_zip.namelist()[0]) as fluxo:
+                return fluxo.read(tamanho)
+        if compressao == "gzip":
+            fluxo = gzip.GzipFile(fileobj=origem)
+        elif compressao == "bz2":
+            fluxo = bz2.BZ2File(origem)
+        else:
+            fluxo = lzma.LZMAFile(origem)
+        with fluxo:
+            return fluxo.read(tamanho)
+    finally:
+        if caminho:
+            origem.close()
+        else:
+            file.seek(posicao)
+
+
+def abas_excel(file):
+    """
+    Nomes das abas de um XLSX, na ordem das guias, lidos só do índice do
+    arquivo (xl/workbook.xml), sem abrir as planilhas.
+    """
+    try:
+        with zipfile.ZipFile(file) as arquivo_zip, arquivo_zip.open("xl/workbook.xml") as indice:
+            return [
+                elemento.get("name") for _, elemento in ElementTree.iterparse(indice)
+                if elemento.tag.endswith("}sheet")
+            ]
+    except (KeyError, zipfile.BadZipFile, ElementTree.ParseError):
+        if hasattr(file, "seek"):
+            file.seek(0)
+        return pd.ExcelFile(file).sheet_names
+    finally:
+        if hasattr(file, "seek"):
+            file.seek(0)
+
+
+def nome_coluna_livre(nome, colunas):
+    """Nome de coluna que não está em colunas: o próprio nome ou nome_2, nome_3..."""
+    colunas = set(colunas)
+    novo = nome
+    contador = 2
+    while novo in colunas:
+        novo = f"{nome}_{contador}"
+        contador += 1
+    return novo
+
+
+def _ler_aba(caminho, aba, backend):
+    """Lê uma aba de um XLSX em disco (executada em outro processo)"""
+    return ler_excel(caminho, aba, backend=backend)
+
+
+def ler_abas_excel(file, abas, workers=None, backend=BACKEND_PADRAO):
+    """
+    Lê várias abas de um XLSX e as empilha, com a aba de cada linha em
+    COLUNA_ABA (ou COLUNA_ABA_2... se as abas já tiverem essa coluna).
+
+    Por padrão as abas são lidas em sequência. Com workers > 1 (parâmetro ou
+    CENTRAL_WORKERS), cada aba é lida por um processo (o leitor openpyxl é
+    Python puro: threads não leriam em paralelo); os processos recebem só o
+    caminho do arquivo (envios são gravados uma vez em um arquivo temporário),
+    não o conteúdo. Arquivos pequenos ou falha ao iniciar os processos leem em
+    sequência.
+
+    Args:
+        file: Arquivo enviado, arquivo aberto em modo binário ou caminho
+        abas: Nomes das abas, na ordem do resultado
+        workers: Quantidade de processos (ver parallel_utils.numero_workers)
+        backend: Leitor de XLSX preferido (ver excel_utils.ler_excel)
+
+    Returns:
+        DataFrame com as abas empilhadas (colunas alinhadas pelo nome)
+    """
+    inicio = time.perf_counter()
+    workers = min(numero_workers(workers), len(abas))
+    em_disco = isinstance(file, (str, os.PathLike))
+    tamanho = os.path.getsize(file) if em_disco else len(file.getbuffer()) if hasattr(file, "getbuffer") else 0
+    frames = None
+    if workers > 1 and tamanho >= TAMANHO_MINIMO_ABAS_PARALELO:
+        temporario = None
+        try:
+            caminho = file
+            if not em_disco:
+                with tempfile.NamedTemporaryFile(suffix=".xlsx", delete=False) as temporario:
+                    with file.getbuffer() as buffer:
+                        temporario.write(buffer)
+                caminho = temporario.name
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                frames = list(executor.map(_ler_aba, repeat(caminho), abas, repeat(backend)))
+        except (OSError, RuntimeError):
+            # Ambiente sem suporte a processos
+            frames = None
+        finally:
+            if temporario is not None and os.path.exists(temporario.name):
+                os.remove(temporario.name)
+    if frames is None:
+        frames = [ler_excel(file, aba, backend=backend) for aba in abas]
+
+    leituras = [frame.attrs.get(CHAVE_LEITURA, {}) for frame in frames]
+    df = pd.concat(frames, ignore_index=True)
+    coluna_aba = nome_coluna_livre(COLUNA_ABA, df.columns)
+    df[coluna_aba] = np.repeat(np.array(abas, dtype=object), [len(frame) for frame in frames])
+    # Tempo total (com as abas em paralelo) e o tempo de cada aba
+    df.attrs[CHAVE_LEITURA] = {
+        "backend": ", ".join(dict.fromkeys(leitura.get("backend", "?") for leitura in leituras)),
+        "segundos": round(time.perf_counter() - inicio, 3),
+        "falhas": {nome: erro for leitura in leituras for nome, erro in leitura.get("falhas", {}).items()},
+        "abas": {aba: leitura.get("segundos") for aba, leitura in zip(abas, leituras)},
+    }
+    return df
+
+
+def _acertos_numero_processo(texto):
+    """Máscara dos textos (sem nulos) que estão em um dos formatos de número de processo"""
+    texto = texto.str.strip()
+    # Todos os formatos têm 20 dígitos: textos menores nem passam pelas expressões
+    possiveis = (texto.str.len() >= 20).to_numpy(dtype=bool)
+    acertos = np.zeros(len(texto), dtype=bool)
+    candidatos = texto[possiveis]
+    acertos[possiveis] = (
+        candidatos.str.match(PADRAO_CNJ.pattern)
+        | candidatos.str.match(PADRAO_CNJ_805.pattern)
+        | (candidatos.str.replace(r'\D', '', regex=True).str.len() == 20)
+    ).to_numpy(dtype=bool)
+    return acertos
+
+
+def taxa_numeros_processo(serie):
+    """
+    Proporção dos valores não nulos que estão em um dos formatos de número de
+    processo aceitos (padrão CNJ, variação 805 ou 20 dígitos).
+    """
+    texto = serie.dropna().astype(str)
+    return float(_acertos_numero_processo(texto).mean()) if len(texto) else 0.0
+
+
+def detectar_coluna_processos(df, linhas=LINHAS_DETECCAO):
+    """
+    Mede, em uma amostra de cada coluna, quantos valores são números de processo.
+
+    As amostras de todas as colunas são verificadas de uma só vez (uma única
+    série de textos), então arquivos largos custam o mesmo que um único teste.
+
+    Args:
+        df: DataFrame (ou amostra lida pela sonda)
+        linhas: Linhas usadas por coluna, espaçadas uniformemente
+
+    Returns:
+        Série coluna -> taxa de acerto (0 a 1), da maior para a menor, só com
+        colunas que têm algum acerto
+    """
+    if len(df) > linhas:
+        df = df.iloc[np.linspace(0, len(df) - 1, num=linhas, dtype=np.int64)]
+    # Colunas numéricas não guardam os 20 dígitos: não podem ser a coluna de processos
+    candidatas = [
+        posicao for posicao, tipo in enumerate(df.dtypes)
+        if not (pd.api.types.is_numeric_dtype(tipo) or pd.api.types.is_bool_dtype(tipo))
+    ]
+    if not candidatas or len(df) == 0:
+        return pd.Series(dtype=float)
+
+    # Uma coluna depois da outra (ordem "F"); a coluna de origem de cada valor fica em origem
+    valores = pd.Series(df.iloc[:, candidatas].to_numpy(dtype=object).ravel(order="F"))
+    origem = np.repeat(np.arange(len(candidatas)), len(df))
+    validos = valores.notna().to_numpy()
+    acertos = _acertos_numero_processo(valores[validos].astype(str))
+
+    total = np.bincount(origem[validos], minlength=len(candidatas))
+    taxas = np.bincount(origem[validos], weights=acertos, minlength=len(candidatas)) / np.maximum(total, 1)
+    taxas = pd.Series(taxas, index=df.columns[candidatas], dtype=float)
+    return taxas[taxas > 0].sort_values(ascending=False, kind="stable")
+
 
 class FileHandler:
-    """Classe utilitária para manipulação de arquivos CSV e Excel."""
+    """Classe utilitária para manipulação de arquivos CSV, Excel e Parquet."""
     
     @staticmethod
     def read_file(file, file_type, config):
-        if file_type == "xlsx":
-            df = pd.read_excel(file)
+        # O mesmo conteúdo, lido antes com a mesma coluna de processos, vem do
+        # cache em disco (config "cache_disco" = False desativa)
+        cache = cache_padrao() if config.get('cache_disco', True) else None
+        chave_cache = None
+        if cache is not None and cache.ativo:
+            chave_cache = cache.chave(
+                file, "preprocessado", file_type, config.get('coluna_processos', 'numeroProcesso'),
+                config.get('abas'), hash_conteudo=config.get('hash_conteudo')
+            )
+            df = cache.ler(chave_cache)
+            if df is not None:
+                return df
+
+        # Abas de um XLSX (config "abas"): None = só a primeira, "todas" ou lista de nomes
+        abas = config.get('abas') if file_type == "xlsx" else None
+        if abas == "todas":
+            abas = abas_excel(file)
+        abas = list(abas) if abas else None
+
+        # Confere a coluna de processos nas primeiras linhas antes de ler o arquivo inteiro
+        sonda = FileHandler.sondar_arquivo(
+            file, file_type, config.get('coluna_processos', 'numeroProcesso'), aba=abas[0] if abas else None,
+            backend_excel=config.get('backend_excel', BACKEND_PADRAO)
+        )
+
+        if file_type == "xlsx" and abas and len(abas) > 1:
+            df = ler_abas_excel(file, abas, config.get('workers'), config.get('backend_excel', BACKEND_PADRAO))
+        elif file_type == "xlsx":
+            # Leitor mais rápido instalado; o usado e o tempo ficam em df.attrs
+            df = ler_excel(file, abas[0] if abas else 0, backend=config.get('backend_excel', BACKEND_PADRAO))
+        elif file_type == "parquet":
+            df = pd.read_parquet(file)
         elif file_type == "csv":
+            # Parser C direto sobre o buffer enviado (sem cópia para texto); caminhos
+            # em disco (CLI) são lidos com memory map. CSVs compactados são
+            # descompactados em fluxo pelo próprio pandas, sem extrair em disco
+            opcoes = FileHandler.opcoes_csv(file)
+            delimiter, quotechar = sonda["delimitador"] if sonda else (";", '"')
             try:
-                df = pd.read_csv(
-                    file,
-                    delimiter=";",
-                    quotechar='"',
-                    encoding="utf-8",
-                    engine="python",
-                    on_bad_lines="skip"
-                )
+                df = pd.read_csv(file, delimiter=delimiter, quotechar=quotechar, **opcoes)
             except Exception:
-                file.seek(0)
+                if hasattr(file, "seek"):
+                    file.seek(0)
                 delimiter, quotechar = FileHandler.detect_csv_properties(file)
-                df = pd.read_csv(
-                    file,
-                    delimiter=delimiter,
-                    quotechar=quotechar,
-                    encoding="utf-8",
-                    engine="python",
-                    on_bad_lines="skip"
-                )
+                df = pd.read_csv(file, delimiter=delimiter, quotechar=quotechar, **opcoes)
         else:
-            raise ValueError("Tipo de arquivo não suportado. Apenas CSV e XLSX são aceitos.")
+            raise ValueError("Tipo de arquivo não suportado. Apenas CSV (também compactado), XLSX e Parquet são aceitos.")
+        
+        # IDs, flags pode*EmLote e textos repetidos em tipos compactos; o relatório
+        # fica em df.attrs (config "otimizar_memoria" = False desativa)
+        if config.get('otimizar_memoria', True):
+            df = otimizar_memoria(df, preservar=[config.get('coluna_processos', 'numeroProcesso')])
         
         df = FileHandler.preprocess_dataframe(df, config)
+        if chave_cache is not None:
+            cache.gravar(chave_cache, df)
         return df
 
+    @staticmethod
+    def sondar_arquivo(file, file_type, coluna_processos, linhas=LINHAS_DETECCAO, aba=None,
+                       backend_excel=BACKEND_PADRAO):
+        """
+        Lê só o cabeçalho e as primeiras linhas e confere a coluna de processos.
+
+        Em CSVs, se a coluna não aparece com ";" o delimitador é detectado na
+        amostra (arquivos separados por vírgula, tabulação...).
+
+        Args:
+            file: Arquivo enviado, arquivo aberto em modo binário ou caminho
+            file_type: "csv", "xlsx" ou "parquet"
+            coluna_processos: Coluna que deve existir
+            linhas: Linhas de dados lidas além do cabeçalho
+            aba: Aba conferida em XLSX (None = a primeira)
+            backend_excel: Leitor de XLSX preferido (ver excel_utils.ler_excel)
+
+        Returns:
+            Dicionário com "colunas", "amostra" (DataFrame) e, em CSVs,
+            "delimitador" (delimitador, aspas); None se as primeiras linhas não
+            puderem ser lidas (a leitura completa decide)
+
+        Raises:
+            ColunaNaoEncontrada: Se a coluna não estiver no cabeçalho (com a
+                coluna detectada pelo conteúdo, se houver)
+        """
+        def rebobinar():
+            if hasattr(file, "seek"):
+                file.seek(0)
+
+        try:
+            if file_type == "xlsx":
+                amostra = ler_excel(file, aba if aba is not None else 0, nrows=linhas, backend=backend_excel)
+                sonda = {"colunas": list(amostra.columns), "amostra": amostra}
+            elif file_type == "parquet":
+                # Só o primeiro lote de linhas do primeiro grupo é lido
+                import pyarrow.parquet as pq
+                lote = next(pq.ParquetFile(file).iter_batches(batch_size=linhas), None)
+                amostra = lote.to_pandas() if lote is not None else pd.DataFrame()
+                sonda = {"colunas": list(amostra.columns), "amostra": amostra}
+            elif file_type == "csv":
+                opcoes = {**FileHandler.opcoes_csv(file), "nrows": linhas}
+                opcoes.pop("memory_map", None)
+                delimitador = (";", '"')
+                amostra = pd.read_csv(file, delimiter=";", quotechar='"', **opcoes)
+                if coluna_processos not in amostra.columns:
+                    rebobinar()
+                    detectado = FileHandler.detect_csv_properties(file)
+                    if detectado[0] != ";":
+                        outra = pd.read_csv(file, delimiter=detectado[0], quotechar=detectado[1], **opcoes)
+                        if coluna_processos in outra.columns or len(outra.columns) > len(amostra.columns):
+                            amostra, delimitador = outra, detectado
+                sonda = {"colunas": list(amostra.columns), "amostra": amostra, "delimitador": delimitador}
+            else:
+                return None
+        except Exception:
+            return None
+        finally:
+            rebobinar()
+
+        if coluna_processos not in sonda["colunas"]:
+            taxas = detectar_coluna_processos(sonda["amostra"])
+            if len(taxas) and taxas.iloc[0] >= TAXA_MINIMA_DETECCAO:
+                raise ColunaNaoEncontrada(coluna_processos, sonda["colunas"], taxas.index[0], float(taxas.iloc[0]))
+            raise ColunaNaoEncontrada(coluna_processos, sonda["colunas"])
+        return sonda
+
+    @staticmethod
+    def opcoes_csv(file):
+        """
+        Opções do read_csv para o arquivo: parser C, compressão detectada pelos
+        primeiros bytes e memory map para caminhos não compactados.
+        """
+        opcoes = {"encoding": "utf-8", "engine": "c", "on_bad_lines": "skip"}
+        compressao = compressao_arquivo(file)
+        if compressao:
+            opcoes["compression"] = compressao
+        elif isinstance(file, (str, os.PathLike)):
+            opcoes["memory_map"] = True
+        return opcoes
+
+    @staticmethod
+    def ler_amostra(file, tamanho=1024):
+        """
+        Lê o início do arquivo como texto sem mover a posição de leitura
+        (o início do conteúdo descompactado, em CSVs compactados).
+        """
+        compressao = compressao_arquivo(file)
+        dados = _ler_descompactado(file, compressao, tamanho) if compressao else _ler_inicio(file, tamanho)
+        return dados.decode("utf-8", errors="replace")
+
     @staticmethod
     def detect_csv_properties(file):
         """
         Detecta o delimitador de campo e o caractere de aspas em um arquivo CSV.
         """
+        sample = FileHandler.ler_amostra(file)
         try:
-            sample = file.read(1024).decode("utf-8", errors="replace")
-            file.seek(0)
-            
             sniffer = Sniffer()
             dialect = sniffer.sniff(sample)
             return dialect.delimiter, dialect.quotechar
         except Exception:
-            file.seek(0)
-            sample = file.read(1024).decode("utf-8", errors="replace")
-            file.seek(0)
             if sample.count(',') >= sample.count(';'):
                 return ",", '"'
             elif sample.count(';') > 0:
@@ -73,9 +480,10 @@ class FileHandler:
         print(f"DEBUG: Procurando pela coluna: '{coluna_processos}'")
         
         if coluna_processos not in df.columns:
-            # Tentar encontrar coluna similar
-            colunas_similares = [col for col in df.columns if 'processo' in col.lower() or 'numero' in col.lower()]
-            raise KeyError(f"A coluna '{coluna_processos}' não foi encontrada. Colunas disponíveis: {list(df.columns)}. Colunas similares: {colunas_similares}")
+            taxas = detectar_coluna_processos(df)
+            if len(taxas) and taxas.iloc[0] >= TAXA_MINIMA_DETECCAO:
+                raise ColunaNaoEncontrada(coluna_processos, df.columns, taxas.index[0], float(taxas.iloc[0]))
+            raise ColunaNaoEncontrada(coluna_processos, df.columns)
         
         # Garantir que seja string
         df[coluna_processos] = df[coluna_processos].astype(str)
@@ -86,7 +494,8 @@ class FileHandler:
             print(f"  {i+1}: '{numero}' (tipo: {type(numero)})")
         
         # EXTRAÇÃO SIMPLIFICADA DE DÍGITO
-        df['Dígito'] = df[coluna_processos].apply(FileHandler.extrair_digito_simples)
+        # Arquivos grandes são divididos entre vários processos (config "workers")
+        df['Dígito'] = aplicar_texto(df[coluna_processos], FileHandler.extrair_digito_simples, config.get('workers'))
         
         # DEBUG: Verificar resultados da extração
         digitos_extraidos = df['Dígito'].value_counts().sort_index()
@@ -195,7 +604,7 @@ def extrair_componentes_numero(numero_str):
         Ou None se não conseguir extrair
     """
     # Padrão 1: Com formatação CNJ padrão (0000046-15.2017.8.05.0216)
-    match1 = re.match(r'(\d{7})-(\d{2})\.(\d{4})\.(\d)\.(\d{2})\.(\d{4})', numero_str)
+    match1 = PADRAO_CNJ.match(numero_str)
     if match1:
         return {
             'sequencial': int(match1.group(1)),
@@ -207,7 +616,7 @@ def extrair_componentes_numero(numero_str):
         }
     
     # Padrão 2: Com formatação variação (0000046-15.2017.805.0216)
-    match2 = re.match(r'(\d{7})-(\d{2})\.(\d{4})\.(\d{3})\.(\d{4})', numero_str)
+    match2 = PADRAO_CNJ_805.match(numero_str)
     if match2:
         tribunal_str = match2.group(4)  # "805"
         segmento = int(tribunal_str[0])  # "8"
@@ -235,6 +644,22 @@ def extrair_componentes_numero(numero_str):
     
     return None
 
+def canonicalizar_numero_processo(serie):
+    """
+    Converte uma coluna de números de processo para a forma canônica (20 dígitos).
+    
+    Os três formatos suportados (padrão CNJ, variação 805 e sem formatação) têm os
+    mesmos 20 dígitos, então basta remover tudo que não é dígito. Valores que não
+    somam 20 dígitos são mantidos como texto sem espaços nas pontas.
+    
+    Returns:
+        Série com o número canônico (nulos permanecem nulos)
+    """
+    texto = serie.astype("string").str.strip()
+    apenas_digitos = texto.str.replace(r'\D', '', regex=True)
+    canonico = apenas_digitos.where(apenas_digitos.str.len() == 20, texto)
+    return canonico.mask(canonico.isin(["", "nan", "None"]))
+
 # =============================================================================
 # FUNÇÕES AUXILIARES SIMPLIFICADAS
 # =============================================================================
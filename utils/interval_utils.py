@@ -0,0 +1,249 @@
+# utils/interval_utils.py - Distribuição de dígitos entre servidores
+
+import copy
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Dígitos possíveis (00 a 99). O dígito 0 é o valor usado para "não identificado"
+# e nunca é atribuído a um servidor, por isso a otimização começa em 1.
+TOTAL_DIGITOS = 100
+DIGITO_INICIAL = 1
+DIGITO_FINAL = 99
+
+
+def histograma_digitos(digitos: pd.Series, pesos: Optional[pd.Series] = None) -> np.ndarray:
+    """
+    Conta (ou soma os pesos) dos processos por dígito.
+
+    Args:
+        digitos: Coluna "Dígito"
+        pesos: Peso de cada processo, alinhado a digitos (None = 1 por processo)
+
+    Returns:
+        Array com 100 posições, uma por dígito
+    """
+    valores = pd.to_numeric(digitos, errors="coerce").fillna(0).astype(np.int64).clip(0, TOTAL_DIGITOS - 1)
+    return np.bincount(
+        valores.to_numpy(),
+        weights=None if pesos is None else pesos.to_numpy(dtype=float),
+        minlength=TOTAL_DIGITOS
+    ).astype(float)
+
+
+def pesos_processos(df: pd.DataFrame, pesos_tarefa: Optional[Dict[str, float]] = None,
+                    meta2: Optional[pd.Series] = None, peso_meta2: float = 1.0) -> pd.Series:
+    """
+    Peso de cada processo para balancear a carga.
+
+    Args:
+        df: DataFrame dos processos
+        pesos_tarefa: Peso por valor de "nomeTarefa" (tarefas não listadas pesam 1)
+        meta2: Máscara booleana dos processos Meta 2, alinhada a df
+        peso_meta2: Peso aplicado aos processos Meta 2
+
+    Returns:
+        Série de pesos
+    """
+    pesos = pd.Series(1.0, index=df.index)
+    if pesos_tarefa and "nomeTarefa" in df.columns:
+        pesos = pesos * df["nomeTarefa"].map(pesos_tarefa).fillna(1.0).astype(float)
+    if meta2 is not None:
+        pesos = pesos.where(~meta2.fillna(False).astype(bool), pesos * peso_meta2)
+    return pesos
+
+
+def intervalos_por_digito(intervalos_servidores: Dict[str, List[List[int]]]) -> np.ndarray:
+    """
+    Servidor responsável por cada dígito, na mesma regra de atribuir_servidor_melhorado.
+
+    Args:
+        intervalos_servidores: Intervalos por servidor
+
+    Returns:
+        Array de 100 posições com o índice do servidor (ordem do dicionário) ou -1
+    """
+    responsavel = np.full(TOTAL_DIGITOS, -1, dtype=np.int64)
+    # O primeiro servidor cujo intervalo contém o dígito prevalece
+    for indice, intervalos in reversed(list(enumerate(intervalos_servidores.values()))):
+        for intervalo in intervalos:
+            if len(intervalo) >= 2:
+                inicio = max(int(intervalo[0]), DIGITO_INICIAL)
+                fim = min(int(intervalo[1]), DIGITO_FINAL)
+                if inicio <= fim:
+                    responsavel[inicio:fim + 1] = indice
+    return responsavel
+
+
+def carga_por_servidor(histograma: np.ndarray, intervalos_servidores: Dict[str, List[List[int]]]) -> pd.Series:
+    """
+    Carga (processos ou pesos) de cada servidor para um histograma de dígitos.
+
+    Args:
+        histograma: Histograma de 100 posições
+        intervalos_servidores: Intervalos por servidor
+
+    Returns:
+        Série com a carga por servidor
+    """
+    responsavel = intervalos_por_digito(intervalos_servidores)
+    atribuidos = responsavel >= 0
+    cargas = np.bincount(responsavel[atribuidos], weights=histograma[atribuidos],
+                         minlength=len(intervalos_servidores))
+    return pd.Series(cargas, index=list(intervalos_servidores.keys()))
+
+
+def otimizar_intervalos(histograma: np.ndarray, servidores: List[str]) -> Dict[str, List[List[int]]]:
+    """
+    Divide os dígitos 1 a 99 em intervalos contíguos, um por servidor, minimizando
+    a maior carga individual (partição linear por programação dinâmica).
+
+    Args:
+        histograma: Histograma de 100 posições (ver histograma_digitos)
+        servidores: Servidores, na ordem em que recebem os intervalos
+
+    Returns:
+        Intervalos por servidor, no formato de "intervalos_servidores"
+    """
+    cargas = np.asarray(histograma, dtype=float)[DIGITO_INICIAL:DIGITO_FINAL + 1]
+    n = len(cargas)
+    k = min(len(servidores), n)
+    if k == 0:
+        return {}
+
+    acumulado = np.concatenate([[0.0], np.cumsum(cargas)])
+
+    # melhor[j][i]: menor carga máxima dividindo os i primeiros dígitos entre j servidores
+    melhor = np.full((k + 1, n + 1), np.inf)
+    corte = np.zeros((k + 1, n + 1), dtype=np.int64)
+    melhor[0][0] = 0.0
+    for j in range(1, k + 1):
+        for i in range(j, n - (k - j) + 1):
+            # O servidor j fica com os dígitos de inicio+1 até i
+            inicios = np.arange(j - 1, i)
+            candidatos = np.maximum(melhor[j - 1][inicios], acumulado[i] - acumulado[inicios])
+            posicao = int(np.argmin(candidatos))
+            melhor[j][i] = candidatos[posicao]
+            corte[j][i] = inicios[posicao]
+
+    limites = []
+    fim = n
+    for j in range(k, 0, -1):
+        inicio = corte[j][fim]
+        limites.append((inicio, fim))
+        fim = inicio
+    limites.reverse()
+
+    resultado = {
+        servidor: [[int(DIGITO_INICIAL + inicio), int(DIGITO_INICIAL + fim - 1)]]
+        for servidor, (inicio, fim) in zip(servidores, limites)
+    }
+    # Servidores além da quantidade de dígitos ficam sem intervalo
+    for servidor in servidores[k:]:
+        resultado[servidor] = [[0, 0]]
+    return resultado
+
+
+def configuracao_otimizada(configuracao: Dict[str, Any], histograma: np.ndarray,
+                           servidores: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Cópia da configuração com os intervalos otimizados, pronta para
+    CacheManager.salvar_configuracao.
+
+    Args:
+        configuracao: Configuração atual
+        histograma: Histograma de 100 posições
+        servidores: Servidores considerados (None = os da configuração atual, na mesma ordem)
+
+    Returns:
+        Nova configuração
+    """
+    nova = copy.deepcopy(configuracao)
+    servidores = servidores if servidores is not None else list(configuracao.get("intervalos_servidores", {}).keys())
+    nova["intervalos_servidores"] = otimizar_intervalos(histograma, servidores)
+    return nova
+
+
+def avaliar_configuracoes(histograma: np.ndarray, configuracoes: Dict[str, Dict[str, Any]],
+                          referencia: Dict[str, Any]) -> Dict[str, pd.DataFrame]:
+    """
+    Avalia várias configurações de intervalos contra o mesmo histograma de dígitos.
+
+    Cada configuração vira um vetor "dígito -> servidor" de 100 posições, então o
+    custo não depende da quantidade de processos do arquivo.
+
+    Args:
+        histograma: Histograma de 100 posições
+        configuracoes: Configurações por nome (com a chave "intervalos_servidores")
+        referencia: Configuração atual, base para contar os processos reatribuídos
+
+    Returns:
+        Dicionário com 'resumo' (uma linha por configuração) e 'cargas'
+        (carga por configuração e servidor)
+    """
+    histograma = np.asarray(histograma, dtype=float)
+    identificados = histograma[DIGITO_INICIAL:DIGITO_FINAL + 1].sum()
+
+    def servidor_por_digito(intervalos_servidores):
+        nomes = np.array(list(intervalos_servidores.keys()) + [None], dtype=object)
+        return nomes[intervalos_por_digito(intervalos_servidores)]
+
+    servidores_referencia = servidor_por_digito(referencia.get("intervalos_servidores", {}))
+
+    resumo = []
+    cargas = []
+    for nome, configuracao in configuracoes.items():
+        intervalos_servidores = configuracao.get("intervalos_servidores", {})
+        carga = carga_por_servidor(histograma, intervalos_servidores)
+        servidores = servidor_por_digito(intervalos_servidores)
+        alterados = servidores[DIGITO_INICIAL:] != servidores_referencia[DIGITO_INICIAL:]
+        media = carga.mean() if len(carga) else 0.0
+
+        resumo.append({
+            "Configuração": nome,
+            "Servidores": len(carga),
+            "Maior Carga": carga.max() if len(carga) else 0.0,
+            "Menor Carga": carga.min() if len(carga) else 0.0,
+            "Desequilíbrio": carga.max() / media if media > 0 else 0.0,
+            "Não Atribuídos": identificados - carga.sum(),
+            "Reatribuídos": histograma[DIGITO_INICIAL:][alterados].sum()
+        })
+        cargas.extend(
+            {"Configuração": nome, "Servidor": servidor, "Carga": valor}
+            for servidor, valor in carga.items()
+        )
+
+    return {
+        "resumo": pd.DataFrame(resumo),
+        "cargas": pd.DataFrame(cargas, columns=["Configuração", "Servidor", "Carga"])
+    }
+
+
+def gerar_variantes(configuracao: Dict[str, Any], histograma: np.ndarray,
+                    novos_servidores: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Gera configurações candidatas a partir da atual: os intervalos otimizados,
+    a remoção de cada servidor e a inclusão de cada novo servidor.
+
+    Args:
+        configuracao: Configuração atual
+        histograma: Histograma de 100 posições
+        novos_servidores: Nomes de servidores a incluir, um por variante
+
+    Returns:
+        Configurações por nome
+    """
+    servidores = list(configuracao.get("intervalos_servidores", {}).keys())
+    variantes = {"Otimizada": configuracao_otimizada(configuracao, histograma)}
+
+    if len(servidores) > 1:
+        for servidor in servidores:
+            restantes = [outro for outro in servidores if outro != servidor]
+            variantes[f"Sem {servidor}"] = configuracao_otimizada(configuracao, histograma, restantes)
+
+    for servidor in novos_servidores or []:
+        if servidor and servidor not in servidores:
+            variantes[f"Com {servidor}"] = configuracao_otimizada(configuracao, histograma, servidores + [servidor])
+
+    return variantes
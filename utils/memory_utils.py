@@ -0,0 +1,175 @@
+# utils/memory_utils.py - Redução do uso de memória das planilhas lidas
+
+import re
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+# Relatório da otimização, guardado em df.attrs (sobrevive ao cache em disco)
+CHAVE_RELATORIO = "otimizacao_memoria"
+
+# Colunas de permissão do PJe (podeMovimentarEmLote, podeIntimarEmLote...)
+PADRAO_COLUNAS_LOGICAS = re.compile(r"^pode.*EmLote$")
+VALORES_LOGICOS = {
+    "true": True, "false": False, "verdadeiro": True, "falso": False,
+    "sim": True, "não": False, "nao": False, "s": True, "n": False,
+    "1": True, "0": False
+}
+# Colunas de texto com até esta proporção de valores distintos viram category
+PROPORCAO_MAXIMA_CATEGORIAS = 0.5
+
+TIPOS_INTEIROS = [np.int8, np.int16, np.int32, np.int64]
+
+
+def _menor_inteiro(minimo: int, maximo: int) -> type:
+    """Menor tipo inteiro com sinal que comporta o intervalo"""
+    for tipo in TIPOS_INTEIROS:
+        limites = np.iinfo(tipo)
+        if limites.min <= minimo and maximo <= limites.max:
+            return tipo
+    return np.int64
+
+
+def _converter_logica(serie: pd.Series, valores: np.ndarray, nome_de_flag: bool) -> Optional[pd.Series]:
+    """
+    Converte uma coluna de verdadeiro/falso em bool ("boolean" se tiver nulos).
+    Colunas pode*EmLote aceitam sim/não, s/n e 1/0; as demais só true/false.
+    """
+    mapa = {}
+    for valor in valores:
+        if isinstance(valor, (bool, np.bool_)):
+            mapa[valor] = bool(valor)
+            continue
+        texto = str(valor).strip().lower()
+        if texto not in VALORES_LOGICOS or (not nome_de_flag and texto not in ("true", "false")):
+            return None
+        mapa[valor] = VALORES_LOGICOS[texto]
+
+    convertida = serie.map(mapa)
+    return convertida.astype(bool) if not serie.hasnans else convertida.astype("boolean")
+
+
+def _otimizar_coluna(serie: pd.Series, proporcao_categorias: float) -> Optional[pd.Series]:
+    """Versão mais compacta da coluna, ou None se não houver ganho"""
+    nome_de_flag = bool(PADRAO_COLUNAS_LOGICAS.match(str(serie.name)))
+
+    if pd.api.types.is_bool_dtype(serie) or isinstance(serie.dtype, pd.CategoricalDtype):
+        return None
+
+    if pd.api.types.is_integer_dtype(serie) and not pd.api.types.is_extension_array_dtype(serie):
+        if len(serie) == 0:
+            return None
+        if nome_de_flag and serie.isin([0, 1]).all():
+            return serie.astype(bool)
+        tipo = _menor_inteiro(int(serie.min()), int(serie.max()))
+        return serie.astype(tipo) if tipo != serie.dtype else None
+
+    if pd.api.types.is_float_dtype(serie):
+        validos = serie.dropna().to_numpy()
+        if len(validos) == 0 or not np.isfinite(validos).all() or not np.array_equal(validos, np.floor(validos)):
+            return None
+        # Valores fora do int64 (ex.: 1e20) ficam como float
+        limites = np.iinfo(np.int64)
+        if validos.min() < limites.min or validos.max() >= limites.max:
+            return None
+        if nome_de_flag and np.isin(validos, [0, 1]).all():
+            return serie.astype("boolean")
+        # IDs lidos como float por causa de células vazias
+        tipo = _menor_inteiro(int(validos.min()), int(validos.max()))
+        if serie.hasnans:
+            return serie.astype(pd.api.types.pandas_dtype(tipo.__name__.capitalize()))
+        return serie.astype(tipo)
+
+    if pd.api.types.is_object_dtype(serie) or pd.api.types.is_string_dtype(serie):
+        valores = serie.dropna().unique()
+        if len(valores) == 0:
+            return None
+        if len(valores) <= 2 or nome_de_flag:
+            convertida = _converter_logica(serie, valores, nome_de_flag)
+            if convertida is not None:
+                return convertida
+        # Só texto puro: colunas com tipos misturados ficam como estão
+        if len(valores) <= proporcao_categorias * len(serie) and pd.api.types.infer_dtype(valores) == "string":
+            return serie.astype("category")
+
+    return None
+
+
+def gerar_relatorio_memoria(antes: pd.DataFrame, depois: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Compara o uso de memória (memory_usage profundo) de um DataFrame antes e
+    depois da otimização.
+
+    Args:
+        antes: DataFrame original
+        depois: DataFrame otimizado (mesmas colunas)
+
+    Returns:
+        Dicionário com a memória total antes/depois, a redução e as colunas convertidas
+    """
+    mb = 1024 * 1024
+    memoria_antes = antes.memory_usage(deep=True, index=True)
+    memoria_depois = depois.memory_usage(deep=True, index=True)
+    total_antes = float(memoria_antes.sum()) / mb
+    total_depois = float(memoria_depois.sum()) / mb
+
+    return {
+        'memoria_antes_mb': round(total_antes, 3),
+        'memoria_depois_mb': round(total_depois, 3),
+        'reducao_percentual': round(100 * (1 - total_depois / total_antes), 1) if total_antes else 0.0,
+        # Posicional (a primeira linha de memory_usage é o índice), para aceitar nomes repetidos
+        'colunas_convertidas': [
+            {
+                'Coluna': str(col),
+                'Tipo original': str(tipo_antes),
+                'Tipo otimizado': str(tipo_depois),
+                'Antes (MB)': round(float(bytes_antes) / mb, 3),
+                'Depois (MB)': round(float(bytes_depois) / mb, 3)
+            }
+            for col, tipo_antes, tipo_depois, bytes_antes, bytes_depois in zip(
+                antes.columns, antes.dtypes, depois.dtypes,
+                memoria_antes.iloc[1:], memoria_depois.iloc[1:]
+            )
+            if tipo_antes != tipo_depois
+        ]
+    }
+
+
+def otimizar_memoria(df: pd.DataFrame, preservar: Iterable[str] = (),
+                     proporcao_categorias: float = PROPORCAO_MAXIMA_CATEGORIAS) -> pd.DataFrame:
+    """
+    Reduz a memória de uma planilha recém-lida:
+
+    - inteiros (e floats só com valores inteiros, como IDs com células vazias)
+      passam para o menor tipo inteiro que comporta os valores;
+    - colunas pode*EmLote e colunas só com true/false passam para bool;
+    - colunas de texto com poucos valores distintos passam para category.
+
+    O relatório (ver gerar_relatorio_memoria) fica em df.attrs[CHAVE_RELATORIO].
+
+    Args:
+        df: DataFrame lido
+        preservar: Colunas que não devem ser convertidas (ex.: coluna de processos)
+        proporcao_categorias: Proporção máxima de valores distintos para usar category
+
+    Returns:
+        DataFrame otimizado (o original não é alterado)
+    """
+    preservar = set(preservar)
+    otimizado = df.copy(deep=False)
+    for col in df.columns:
+        if col in preservar or not isinstance(df[col], pd.Series):
+            # Colunas preservadas ou com nome repetido ficam como estão
+            continue
+        convertida = _otimizar_coluna(df[col], proporcao_categorias)
+        if convertida is not None:
+            otimizado[col] = convertida
+
+    otimizado.attrs[CHAVE_RELATORIO] = gerar_relatorio_memoria(df, otimizado)
+    return otimizado
+
+
+def relatorio_memoria(df: pd.DataFrame) -> Optional[Dict[str, Any]]:
+    """Relatório da otimização de memória do DataFrame, se houver"""
+    return df.attrs.get(CHAVE_RELATORIO)
@@ -2,12 +2,101 @@
 
 import pandas as pd
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Tuple, Optional
 import re
+from utils.fileHandler import FileHandler, canonicalizar_numero_processo, ler_abas_excel, nome_coluna_livre, tipo_arquivo
+from utils.sketch_utils import ColumnSketch
+from utils.profile_utils import ColumnProfiler
+from utils.disk_cache import cache_padrao
+from utils.memory_utils import otimizar_memoria
+from utils.excel_utils import ler_excel
 
 class MergeUtils:
     """Classe utilitária para operações de união de planilhas"""
     
+    # Linhas por planilha usadas na descoberta automática do par de colunas
+    SKETCH_SAMPLE_ROWS = 100_000
+    
+    @staticmethod
+    def read_spreadsheet(file, sheets: Optional[Tuple[str, ...]] = None) -> pd.DataFrame:
+        """
+        Lê uma planilha enviada (Excel, Parquet ou CSV, também compactado) sem pré-processamento.
+        
+        Planilhas já lidas antes (mesmo conteúdo) vêm do cache em disco. Os
+        tipos das colunas são compactados (ver memory_utils.otimizar_memoria).
+        
+        Args:
+            file: Arquivo enviado (UploadedFile ou objeto com atributo name)
+            sheets: Abas de um XLSX (None = só a primeira); com mais de uma, as
+                linhas são empilhadas com a aba de origem em COLUNA_ABA
+            
+        Returns:
+            DataFrame com o conteúdo da planilha
+        """
+        file_type = tipo_arquivo(file.name)
+        cache = cache_padrao()
+        cache_key = cache.chave(file, "bruto", file_type, sheets) if cache.ativo else None
+        if cache_key is not None:
+            df = cache.ler(cache_key)
+            if df is not None:
+                return df
+        
+        if file_type == "xlsx" and sheets and len(sheets) > 1:
+            df = ler_abas_excel(file, list(sheets))
+        elif file_type == "xlsx":
+            df = ler_excel(file, sheets[0] if sheets else 0)
+        elif file_type == "parquet":
+            df = pd.read_parquet(file)
+        else:
+            opcoes = FileHandler.opcoes_csv(file)
+            df = pd.read_csv(file, **opcoes)
+        df = otimizar_memoria(df)
+        
+        if cache_key is not None:
+            cache.gravar(cache_key, df)
+        return df
+    
+    @staticmethod
+    def read_spreadsheets(files: List[Any], max_workers: Optional[int] = None) -> Tuple[Dict[str, pd.DataFrame], Dict[str, str]]:
+        """
+        Lê várias planilhas em paralelo, preservando a ordem de envio.
+        
+        Arquivos com o mesmo nome (ex.: acervo.xlsx de duas varas) recebem
+        "nome (2)", "nome (3)"... para que nenhum seja descartado.
+        
+        Args:
+            files: Lista de arquivos enviados
+            max_workers: Número máximo de threads (None = uma por arquivo, até 8)
+            
+        Returns:
+            Tupla (planilhas lidas por nome, mensagens de erro por nome)
+        """
+        frames = {}
+        errors = {}
+        if not files:
+            return frames, errors
+        
+        names = []
+        for file in files:
+            name = file.name
+            counter = 2
+            while name in names:
+                name = f"{file.name} ({counter})"
+                counter += 1
+            names.append(name)
+        
+        workers = max_workers or min(len(files), 8)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [(name, executor.submit(MergeUtils.read_spreadsheet, file)) for name, file in zip(names, files)]
+            for name, future in futures:
+                try:
+                    frames[name] = future.result()
+                except Exception as e:
+                    errors[name] = str(e)
+        
+        return frames, errors
+    
     @staticmethod
     def clean_column_for_comparison(series: pd.Series) -> pd.Series:
         """
@@ -19,30 +108,32 @@ class MergeUtils:
         Returns:
             Série limpa
         """
-        # Converter para string
-        cleaned = series.astype(str)
+        # Converter para string e remover espaços extras
+        cleaned = series.astype(str).str.strip()
         
-        # Remover espaços extras
-        cleaned = cleaned.str.strip()
+        # Números inteiros lidos como float (coluna com células vazias) viram "1",
+        # não "1.0", para casar com a mesma chave lida como inteiro
+        if pd.api.types.is_float_dtype(series):
+            values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+            limits = np.iinfo(np.int64)
+            with np.errstate(invalid='ignore'):
+                whole = np.isfinite(values) & (values == np.floor(values)) & (values > limits.min) & (values < limits.max)
+            if whole.any():
+                cleaned = cleaned.copy()
+                cleaned[whole] = values[whole].astype(np.int64).astype(str)
         
-        # Para números de processo, padronizar formato
-        # Remove caracteres especiais extras e padroniza
-        def normalize_processo(value):
-            if pd.isna(value) or value in ['nan', 'None', '']:
-                return value
-            
-            # Remover espaços e caracteres especiais desnecessários
-            value = re.sub(r'\s+', '', str(value))
-            
-            # Se parece com número de processo, tentar padronizar
-            if re.match(r'\d+[-\.]\d+', value):
-                # Remover pontos e hífens extras, manter apenas estrutura principal
-                value = re.sub(r'\.+', '.', value)
-                value = re.sub(r'-+', '-', value)
-            
-            return value
+        # Valores vazios/nulos ficam como estão
+        empty = cleaned.isin(['nan', 'None', '<NA>', ''])
+        
+        # Remover espaços e caracteres especiais desnecessários
+        compact = cleaned.str.replace(r'\s+', '', regex=True)
+        
+        # Para números de processo, padronizar formato:
+        # remover pontos e hífens extras, manter apenas estrutura principal
+        looks_like_processo = compact.str.match(r'\d+[-\.]\d+', na=False)
+        standardized = compact.str.replace(r'\.+', '.', regex=True).str.replace(r'-+', '-', regex=True)
         
-        cleaned = cleaned.apply(normalize_processo)
+        cleaned = compact.where(~looks_like_processo, standardized).where(~empty, cleaned)
         
         return cleaned
     
@@ -88,10 +179,145 @@ class MergeUtils:
             'common_examples': list(common_values)[:10],
             'only_in_1_examples': list(only_in_1)[:5],
             'only_in_2_examples': list(only_in_2)[:5],
-            'null_count_1': df1[col1].isnull().sum(),
-            'null_count_2': df2[col2].isnull().sum()
+            'null_count_1': ColumnProfiler.column_stats(df1, col1)['Nulos'],
+            'null_count_2': ColumnProfiler.column_stats(df2, col2)['Nulos']
         }
     
+    @staticmethod
+    def hash_keys(series: pd.Series, clean_comparison_columns: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Converte uma coluna de comparação em hashes de 64 bits das chaves normalizadas.
+        
+        Args:
+            series: Coluna de comparação
+            clean_comparison_columns: Se deve limpar a coluna antes do hash
+            
+        Returns:
+            Tupla (hashes uint64, máscara de chaves válidas/não nulas)
+        """
+        keys = MergeUtils.clean_column_for_comparison(series) if clean_comparison_columns else series.astype(str)
+        valid = series.notna().to_numpy() & ~keys.isin(['nan', 'None', '<NA>', '']).to_numpy()
+        hashes = pd.util.hash_array(keys.to_numpy(dtype=object))
+        return hashes, valid
+    
+    @staticmethod
+    def split_by_key(df1: pd.DataFrame, col1: str, df2: pd.DataFrame, col2: str,
+                     clean_comparison_columns: bool = True) -> Dict[str, Any]:
+        """
+        Separa as linhas das duas planilhas conforme a presença da chave na outra.
+        
+        Usa isin sobre os hashes das chaves normalizadas (anti-join/semi-join), sem
+        executar um merge completo. Linhas com chave nula nunca têm correspondência.
+        
+        Args:
+            df1, df2: DataFrames
+            col1, col2: Colunas de comparação
+            clean_comparison_columns: Se deve limpar as colunas antes da comparação
+            
+        Returns:
+            Dicionário com 'only_in_1', 'only_in_2', 'in_both_1', 'in_both_2' (DataFrames)
+            e 'masks' (máscaras booleanas de presença na outra planilha)
+        """
+        hashes1, valid1 = MergeUtils.hash_keys(df1[col1], clean_comparison_columns)
+        hashes2, valid2 = MergeUtils.hash_keys(df2[col2], clean_comparison_columns)
+        
+        in_2 = valid1 & pd.Index(hashes1).isin(hashes2[valid2])
+        in_1 = valid2 & pd.Index(hashes2).isin(hashes1[valid1])
+        
+        return {
+            'only_in_1': df1[~in_2],
+            'only_in_2': df2[~in_1],
+            'in_both_1': df1[in_2],
+            'in_both_2': df2[in_1],
+            'masks': {'df1': in_2, 'df2': in_1}
+        }
+    
+    @staticmethod
+    def build_column_sketches(df: pd.DataFrame, k: int = 256, min_distinct: int = 10,
+                              sample_rows: Optional[int] = SKETCH_SAMPLE_ROWS) -> Dict[str, ColumnSketch]:
+        """
+        Constrói um sketch bottom-k por coluna candidata a chave de união.
+        
+        Colunas de ponto flutuante com casas decimais e colunas com poucos valores
+        distintos (ex.: sim/não, status) não são candidatas.
+        
+        Limpar e calcular o hash de todas as linhas de todas as colunas custa mais
+        que a própria união; acima de sample_rows linhas, os sketches são feitos
+        sobre uma amostra fixa das linhas e as estimativas se referem à amostra.
+        
+        Args:
+            df: DataFrame
+            k: Tamanho de cada sketch
+            min_distinct: Mínimo de valores distintos estimados para ser candidata
+            sample_rows: Máximo de linhas usadas (None = todas)
+            
+        Returns:
+            Dicionário coluna -> sketch
+        """
+        if sample_rows is not None and len(df) > sample_rows:
+            df = df.sample(n=sample_rows, random_state=0)
+        
+        sketches = {}
+        for col in df.columns:
+            series = df[col]
+            if pd.api.types.is_bool_dtype(series):
+                continue
+            if pd.api.types.is_float_dtype(series):
+                values = series.dropna()
+                if not (values == values.round()).all():
+                    continue
+                series = series.astype('Int64')
+            
+            hashes, valid = MergeUtils.hash_keys(series)
+            sketch = ColumnSketch(hashes[valid], k=k)
+            if sketch.estimate_distinct() >= min_distinct:
+                sketches[col] = sketch
+        
+        return sketches
+    
+    @staticmethod
+    def discover_join_keys(df1: pd.DataFrame, df2: pd.DataFrame, k: int = 256,
+                           top: int = 10, sample_rows: Optional[int] = SKETCH_SAMPLE_ROWS) -> pd.DataFrame:
+        """
+        Classifica os pares de colunas pela sobreposição estimada de valores.
+        
+        Em vez de comparar conjuntos completos par a par, compara os sketches de
+        todas as colunas candidatas das duas planilhas.
+        
+        Args:
+            df1, df2: DataFrames
+            k: Tamanho de cada sketch
+            top: Quantidade de pares retornados
+            sample_rows: Máximo de linhas usadas por planilha (ver build_column_sketches)
+            
+        Returns:
+            DataFrame com os melhores pares, do mais provável ao menos provável
+        """
+        sketches1 = MergeUtils.build_column_sketches(df1, k=k, sample_rows=sample_rows)
+        sketches2 = MergeUtils.build_column_sketches(df2, k=k, sample_rows=sample_rows)
+        
+        pairs = []
+        for col1, sketch1 in sketches1.items():
+            for col2, sketch2 in sketches2.items():
+                common = sketch1.estimate_intersection(sketch2)
+                if common < 1:
+                    continue
+                pairs.append({
+                    'coluna_1': col1,
+                    'coluna_2': col2,
+                    'comuns_estimados': int(round(common)),
+                    'cobertura': sketch1.estimate_containment(sketch2),
+                    'jaccard': sketch1.estimate_jaccard(sketch2)
+                })
+        
+        columns = ['coluna_1', 'coluna_2', 'comuns_estimados', 'cobertura', 'jaccard']
+        if not pairs:
+            return pd.DataFrame(columns=columns)
+        
+        ranking = pd.DataFrame(pairs, columns=columns)
+        ranking = ranking.sort_values(['comuns_estimados', 'cobertura'], ascending=False)
+        return ranking.head(top).reset_index(drop=True)
+    
     @staticmethod
     def smart_merge(df1: pd.DataFrame, df2: pd.DataFrame, 
                    left_on: str, right_on: str,
@@ -151,6 +377,241 @@ class MergeUtils:
         
         return result
     
+    @staticmethod
+    def build_key_index(df: pd.DataFrame, on: str, clean_comparison_columns: bool = True) -> Dict[str, Any]:
+        """
+        Constrói o índice de chaves de uma planilha base, uma única vez.
+        
+        Cada linha recebe o código da sua chave e as chaves distintas ficam em um
+        pd.Index, cuja tabela hash é reaproveitada por todas as planilhas anexadas.
+        
+        Args:
+            df: DataFrame base
+            on: Coluna de comparação da base
+            clean_comparison_columns: Se deve limpar a coluna antes de indexar
+            
+        Returns:
+            Dicionário com 'codes' (código por linha, -1 para nulos) e 'index' (chaves distintas)
+        """
+        keys = MergeUtils.clean_column_for_comparison(df[on]) if clean_comparison_columns else df[on].astype(str)
+        codes, uniques = pd.factorize(keys)
+        return {
+            'codes': codes,
+            'index': pd.Index(uniques)
+        }
+    
+    @staticmethod
+    def attach_to_key_index(key_index: Dict[str, Any], df: pd.DataFrame, on: str,
+                            clean_comparison_columns: bool = True) -> np.ndarray:
+        """
+        Localiza, para cada linha da base, a linha correspondente de outra planilha.
+        
+        Quando a chave se repete na planilha anexada, vale a primeira ocorrência.
+        
+        Args:
+            key_index: Índice retornado por build_key_index
+            df: DataFrame a anexar
+            on: Coluna de comparação do DataFrame anexado
+            clean_comparison_columns: Se deve limpar a coluna antes da busca
+            
+        Returns:
+            Array com a posição da linha correspondente por linha da base (-1 = sem correspondência)
+        """
+        keys = MergeUtils.clean_column_for_comparison(df[on]) if clean_comparison_columns else df[on].astype(str)
+        positions = key_index['index'].get_indexer(keys)
+        
+        # Posição da primeira linha anexada para cada chave distinta da base
+        row_for_key = np.full(len(key_index['index']), -1, dtype=np.int64)
+        matched = np.flatnonzero(positions >= 0)
+        distinct, first = np.unique(positions[matched], return_index=True)
+        row_for_key[distinct] = matched[first]
+        
+        codes = key_index['codes']
+        return np.where(codes >= 0, row_for_key[codes], -1)
+    
+    @staticmethod
+    def multi_merge(base_df: pd.DataFrame, base_on: str,
+                    attachments: List[Dict[str, Any]],
+                    base_columns: List[str] = None,
+                    how: str = 'left',
+                    clean_comparison_columns: bool = True) -> pd.DataFrame:
+        """
+        Une várias planilhas a uma planilha base usando um único índice de chaves.
+        
+        Args:
+            base_df: DataFrame base (ex.: acervo)
+            base_on: Coluna de comparação da base
+            attachments: Lista de dicionários com 'df', 'on', 'columns' (None = todas) e 'suffix'
+            base_columns: Colunas da base para manter (None = todas)
+            how: 'left' mantém todas as linhas da base; 'inner' só as presentes em todas as planilhas
+            clean_comparison_columns: Se deve limpar as colunas de comparação
+            
+        Returns:
+            DataFrame resultado da união
+        """
+        if how not in ('left', 'inner'):
+            raise ValueError("Tipo de união não suportado. Use 'left' ou 'inner'.")
+        
+        key_index = MergeUtils.build_key_index(base_df, base_on, clean_comparison_columns)
+        
+        result_columns = list(base_columns) if base_columns else base_df.columns.tolist()
+        if base_on not in result_columns:
+            result_columns = [base_on] + result_columns
+        
+        parts = [base_df[result_columns].reset_index(drop=True)]
+        used_names = set(result_columns)
+        keep = np.ones(len(base_df), dtype=bool)
+        
+        for attachment in attachments:
+            df = attachment['df']
+            on = attachment['on']
+            suffix = attachment.get('suffix', '')
+            columns = [col for col in (attachment.get('columns') or df.columns.tolist()) if col != on]
+            
+            rows = MergeUtils.attach_to_key_index(key_index, df, on, clean_comparison_columns)
+            found = rows >= 0
+            keep &= found
+            
+            # Linhas sem correspondência recebem nulos via reindex
+            attached = df[columns].reset_index(drop=True).reindex(np.where(found, rows, -1))
+            attached.index = parts[0].index
+            
+            renamed = {}
+            for col in columns:
+                new_name = col
+                if new_name in used_names:
+                    new_name = f"{col}{suffix}" if suffix else col
+                    counter = 2
+                    while new_name in used_names:
+                        new_name = f"{col}{suffix}_{counter}"
+                        counter += 1
+                renamed[col] = new_name
+                used_names.add(new_name)
+            parts.append(attached.rename(columns=renamed))
+        
+        result = pd.concat(parts, axis=1)
+        if how == 'inner':
+            result = result[keep].reset_index(drop=True)
+        
+        return result
+    
+    @staticmethod
+    def align_dtypes(frames: List[pd.DataFrame]) -> Dict[str, np.dtype]:
+        """
+        Define o esquema comum (nome e tipo de cada coluna) de várias planilhas.
+        
+        As colunas seguem a ordem em que aparecem pela primeira vez. Tipos numéricos
+        diferentes são promovidos para o tipo comum; inteiros e booleanos ausentes em
+        alguma planilha viram float/objeto para comportar nulos; o restante vira objeto.
+        
+        Args:
+            frames: Lista de DataFrames
+            
+        Returns:
+            Dicionário coluna -> dtype numpy
+        """
+        columns = {}
+        for df in frames:
+            for col in df.columns:
+                dtype = df[col].dtype
+                # Inteiros com nulos (Int8...Int64, ver memory_utils) seguem como float
+                if not isinstance(dtype, np.dtype) and pd.api.types.is_integer_dtype(dtype):
+                    dtype = np.dtype('float64')
+                columns.setdefault(col, []).append(dtype)
+        
+        schema = {}
+        for col, dtypes in columns.items():
+            missing_somewhere = len(dtypes) < len(frames)
+            if not all(isinstance(dtype, np.dtype) for dtype in dtypes):
+                schema[col] = np.dtype(object)
+                continue
+            
+            kinds = {dtype.kind for dtype in dtypes}
+            if kinds <= {'i', 'u', 'f'}:
+                dtype = np.result_type(*dtypes)
+                if missing_somewhere and dtype.kind in 'iu':
+                    dtype = np.dtype('float64')
+                schema[col] = dtype
+            elif len(set(dtypes)) == 1 and dtypes[0].kind in 'Mm':
+                schema[col] = dtypes[0]
+            elif kinds == {'b'} and not missing_somewhere:
+                schema[col] = np.dtype(bool)
+            else:
+                schema[col] = np.dtype(object)
+        
+        return schema
+    
+    @staticmethod
+    def stack_frames(frames: Dict[str, pd.DataFrame],
+                     key_column: Optional[str] = None,
+                     order_column: Optional[str] = None,
+                     source_column: Optional[str] = "Arquivo de Origem") -> pd.DataFrame:
+        """
+        Empilha várias planilhas (união vertical) com alinhamento de esquema.
+        
+        Cada coluna do resultado é alocada uma única vez e preenchida por fatias,
+        evitando cópias repetidas de pd.concat em sequência. Se key_column for
+        informada, mantém apenas a linha mais recente de cada número de processo
+        canônico: a de maior order_column ou, sem ela, a da última planilha.
+        
+        Args:
+            frames: Planilhas por nome, da mais antiga para a mais recente
+            key_column: Coluna com o número do processo para deduplicar (None = não deduplica)
+            order_column: Coluna que define a linha mais recente (data ou número)
+            source_column: Nome da coluna com a planilha de origem (None = não cria);
+                se as planilhas já tiverem essa coluna (ex.: um empilhamento
+                anterior), ela é mantida e a nova recebe _2, _3...
+            
+        Returns:
+            DataFrame empilhado
+        """
+        names = list(frames.keys())
+        dfs = [frames[name] for name in names]
+        schema = MergeUtils.align_dtypes(dfs)
+        lengths = [len(df) for df in dfs]
+        total = sum(lengths)
+        offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+        
+        data = {}
+        for col, dtype in schema.items():
+            out = np.empty(total, dtype=dtype)
+            for df, start, end in zip(dfs, offsets[:-1], offsets[1:]):
+                if col in df.columns:
+                    out[start:end] = df[col].to_numpy(dtype=dtype)
+                elif dtype.kind == 'f':
+                    out[start:end] = np.nan
+                elif dtype.kind in 'Mm':
+                    out[start:end] = np.datetime64('NaT') if dtype.kind == 'M' else np.timedelta64('NaT')
+                else:
+                    out[start:end] = None
+            data[col] = out
+        
+        if source_column:
+            source_column = nome_coluna_livre(source_column, data)
+            data[source_column] = np.repeat(np.array(names, dtype=object), lengths)
+        
+        result = pd.DataFrame(data)
+        
+        if key_column:
+            keys = canonicalizar_numero_processo(result[key_column])
+            if order_column:
+                order = result[order_column]
+                if not pd.api.types.is_numeric_dtype(order) and not pd.api.types.is_datetime64_any_dtype(order):
+                    order = pd.to_datetime(order, errors='coerce', dayfirst=True)
+                # Valores sem data/ordem contam como os mais antigos
+                positions = np.argsort(order.rank(na_option='top').to_numpy(), kind='stable')
+            else:
+                positions = np.arange(total)
+            
+            # Na ordem da mais antiga para a mais recente, descarta as repetições anteriores
+            sorted_keys = keys.iloc[positions]
+            duplicated = sorted_keys.duplicated(keep='last').to_numpy() & sorted_keys.notna().to_numpy()
+            drop = np.zeros(total, dtype=bool)
+            drop[positions[duplicated]] = True
+            result = result[~drop].reset_index(drop=True)
+        
+        return result
+    
     @staticmethod
     def generate_merge_report(df1: pd.DataFrame, df2: pd.DataFrame, 
                             result: pd.DataFrame,
@@ -166,6 +627,8 @@ class MergeUtils:
         Returns:
             Dicionário com relatório detalhado
         """
+        profile = ColumnProfiler.profile(result)
+        
         return {
             'original_rows': {
                 'df1': len(df1),
@@ -178,9 +641,9 @@ class MergeUtils:
             'result_rows': len(result),
             'result_columns': len(result.columns),
             'data_quality': {
-                'null_values_result': result.isnull().sum().sum(),
-                'duplicate_rows_result': result.duplicated().sum(),
-                'memory_usage_mb': result.memory_usage(deep=True).sum() / 1024 / 1024
+                'null_values_result': int(profile['Nulos'].sum()) if len(profile) else 0,
+                'duplicate_rows_result': ColumnProfiler.duplicate_rows(result),
+                'memory_usage_mb': profile['Memória (MB)'].sum() if len(profile) else 0.0
             },
             'column_mapping': {
                 'from_df1': [col for col in result.columns if col in df1.columns],
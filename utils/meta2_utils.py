@@ -0,0 +1,75 @@
+# utils/meta2_utils.py - Contagem de Meta 2 por histograma de anos
+
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+
+class HistogramaAnos:
+    """
+    Histograma acumulado dos anos dos processos, opcionalmente por grupo
+    (servidor, tarefa...).
+
+    Um processo é Meta 2 quando o ano é anterior ao ano de corte, então a
+    contagem para qualquer corte é uma soma de prefixo do histograma: uma busca
+    binária sobre os anos, sem percorrer as linhas novamente.
+    """
+
+    def __init__(self, anos: pd.Series, grupos: Optional[pd.Series] = None):
+        """
+        Args:
+            anos: Coluna "Ano Processo" (nulos = ano não identificado, ignorados)
+            grupos: Coluna de agrupamento, alinhada a anos (None = total geral)
+        """
+        validos = anos.notna()
+        anos_validos = anos[validos].astype(int)
+
+        if grupos is None:
+            tabela = anos_validos.value_counts().sort_index().to_frame("Total").T
+        else:
+            grupos = grupos[validos]
+            if isinstance(grupos.dtype, pd.CategoricalDtype):
+                # Sem linhas para categorias que só aparecem com ano não identificado
+                grupos = grupos.cat.remove_unused_categories()
+            tabela = pd.crosstab(grupos, anos_validos)
+
+        self.anos = tabela.columns.to_numpy(dtype=np.int64)
+        self.grupos = tabela.index
+        self.acumulado = tabela.to_numpy(dtype=np.int64).cumsum(axis=1)
+
+    def contar_meta2(self, ano_meta2: int) -> pd.Series:
+        """
+        Quantidade de processos Meta 2 por grupo para um ano de corte.
+
+        Args:
+            ano_meta2: Ano a partir do qual os processos não são Meta 2
+
+        Returns:
+            Série com a contagem por grupo
+        """
+        posicao = np.searchsorted(self.anos, ano_meta2, side="left")
+        if posicao == 0:
+            valores = np.zeros(len(self.grupos), dtype=np.int64)
+        else:
+            valores = self.acumulado[:, posicao - 1]
+        return pd.Series(valores, index=self.grupos)
+
+    def total_meta2(self, ano_meta2: int) -> int:
+        """Quantidade total de processos Meta 2 para um ano de corte"""
+        return int(self.contar_meta2(ano_meta2).sum())
+
+    def curva(self) -> pd.DataFrame:
+        """
+        Quantidade de processos Meta 2 para todos os anos de corte possíveis.
+
+        Returns:
+            DataFrame com as colunas "Ano de Corte" e "Processos Meta 2"
+        """
+        if len(self.anos) == 0:
+            return pd.DataFrame(columns=["Ano de Corte", "Processos Meta 2"])
+
+        cortes = np.arange(self.anos[0], self.anos[-1] + 2)
+        total = np.concatenate([[0], self.acumulado.sum(axis=0)])
+        posicoes = np.searchsorted(self.anos, cortes, side="left")
+        return pd.DataFrame({"Ano de Corte": cortes, "Processos Meta 2": total[posicoes]})
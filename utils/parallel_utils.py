@@ -0,0 +1,130 @@
+# utils/parallel_utils.py - Processamento de colunas de texto em vários núcleos
+
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Callable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Abaixo desta quantidade de linhas o custo de iniciar os processos supera o ganho
+LINHAS_MINIMAS_PARALELO = 200_000
+
+# Um único pool de processos por processo, reaproveitado entre as chamadas
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_workers = 0
+_executor_lock = threading.Lock()
+
+
+def _aplicar_fatia(nome_memoria: str, largura: int, total: int, inicio: int, fim: int,
+                   funcao: Callable[[str], Any]) -> List[Any]:
+    """Aplica a função a um trecho dos textos guardados na memória compartilhada"""
+    memoria = shared_memory.SharedMemory(name=nome_memoria)
+    try:
+        textos = np.ndarray((total,), dtype=f"S{largura}", buffer=memoria.buf)[inicio:fim]
+        # Copiar o trecho antes de fechar a memória (não pode haver visões abertas)
+        trecho = [texto.decode("utf-8") for texto in textos]
+        del textos
+    finally:
+        memoria.close()
+    return [funcao(texto) for texto in trecho]
+
+
+def numero_workers(workers: Optional[int] = None, padrao: int = 1) -> int:
+    """
+    Quantidade de processos a usar.
+
+    No aplicativo o padrão é 1 (sem processos extras a partir do servidor);
+    a CLI passa o número de núcleos como padrão.
+
+    Args:
+        workers: Valor explícito (None = variável de ambiente CENTRAL_WORKERS
+            ou, na falta dela, padrao)
+        padrao: Valor usado sem workers nem CENTRAL_WORKERS
+
+    Returns:
+        Quantidade de processos (no mínimo 1)
+    """
+    if workers is None:
+        try:
+            workers = int(os.environ.get("CENTRAL_WORKERS", ""))
+        except ValueError:
+            workers = padrao
+    return max(1, workers)
+
+
+def _obter_executor(workers: int) -> ProcessPoolExecutor:
+    """Pool de processos compartilhado, recriado só se a quantidade mudar"""
+    global _executor, _executor_workers
+    with _executor_lock:
+        if _executor is None or _executor_workers != workers:
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+            _executor = ProcessPoolExecutor(max_workers=workers)
+            _executor_workers = workers
+        return _executor
+
+
+def _descartar_executor():
+    """Descarta o pool compartilhado (ex.: depois que um processo morreu)"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+            _executor = None
+
+
+def aplicar_texto(serie: pd.Series, funcao: Callable[[str], Any], workers: Optional[int] = None,
+                  linhas_minimas: int = LINHAS_MINIMAS_PARALELO) -> pd.Series:
+    """
+    Aplica uma função a cada valor de uma coluna de texto, dividindo as linhas
+    entre vários processos.
+
+    Os textos são copiados uma única vez para um bloco de memória compartilhada
+    (largura fixa, UTF-8), e cada processo lê só o seu trecho: apenas os
+    resultados voltam serializados. O resultado mantém a ordem e o índice da
+    coluna original.
+
+    Colunas pequenas, workers=1 ou falha ao iniciar os processos caem no
+    Series.apply comum, com o mesmo resultado.
+
+    Args:
+        serie: Coluna de texto (valores não texto são convertidos com str)
+        funcao: Função de um argumento, definida no nível do módulo ou
+            functools.partial (precisa ser serializável)
+        workers: Quantidade de processos (ver numero_workers)
+        linhas_minimas: Tamanho mínimo da coluna para usar vários processos
+
+    Returns:
+        Série com os resultados
+    """
+    workers = numero_workers(workers)
+    if workers <= 1 or len(serie) < linhas_minimas:
+        return serie.apply(funcao)
+
+    textos = np.char.encode(serie.astype(str).to_numpy(dtype=str), "utf-8")
+    largura = max(textos.dtype.itemsize, 1)
+    textos = textos.astype(f"S{largura}")
+
+    memoria = shared_memory.SharedMemory(create=True, size=max(textos.nbytes, 1))
+    try:
+        np.ndarray(textos.shape, dtype=textos.dtype, buffer=memoria.buf)[:] = textos
+        limites = np.linspace(0, len(textos), workers + 1, dtype=np.int64)
+        executor = _obter_executor(workers)
+        futuros = [
+            executor.submit(_aplicar_fatia, memoria.name, largura, len(textos), int(inicio), int(fim), funcao)
+            for inicio, fim in zip(limites[:-1], limites[1:]) if fim > inicio
+        ]
+        resultados = [valor for futuro in futuros for valor in futuro.result()]
+    except (OSError, RuntimeError):
+        # Ambiente sem suporte a processos ou memória compartilhada (ou pool
+        # quebrado, BrokenProcessPool): o próximo uso cria outro pool
+        _descartar_executor()
+        return serie.apply(funcao)
+    finally:
+        memoria.close()
+        memoria.unlink()
+
+    return pd.Series(resultados, index=serie.index, name=serie.name)
@@ -0,0 +1,162 @@
+# utils/profile_utils.py - Perfil de colunas com cache por DataFrame
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.sketch_utils import ColumnSketch
+
+
+class ColumnProfiler:
+    """
+    Calcula estatísticas por coluna (tipo, nulos, distintos, exemplo, memória)
+    uma única vez por DataFrame.
+
+    O cache é do processo e usa como chave uma impressão digital barata do
+    conteúdo (ver _fingerprint): todas as páginas e reruns que recebem o mesmo
+    DataFrame, inclusive recarregado do disco, reaproveitam as estatísticas
+    já calculadas, e um DataFrame alterado as recalcula.
+    """
+
+    # Acima deste número de linhas a contagem de distintos é aproximada
+    APPROX_THRESHOLD = 200_000
+    # Tamanho do sketch usado na contagem aproximada (erro relativo ~3%)
+    SKETCH_SIZE = 1024
+    # Quantidade de DataFrames mantidos no cache
+    MAX_ENTRIES = 32
+    # Linhas das colunas de texto usadas na impressão digital (DataFrames
+    # menores entram inteiros)
+    FINGERPRINT_ROWS = 10_000
+
+    _cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _fingerprint(df: pd.DataFrame) -> str:
+        """
+        Impressão digital do conteúdo do DataFrame.
+
+        Combina o formato, os nomes e tipos das colunas, o hash de todas as
+        linhas das colunas numéricas, booleanas e de data (rápido) e o hash de
+        FINGERPRINT_ROWS linhas espaçadas das demais colunas. Em DataFrames
+        maiores, uma alteração de texto fora das linhas amostradas não é notada.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(repr((df.shape, [(str(col), str(dtype)) for col, dtype in df.dtypes.items()])).encode())
+
+        fixed = [
+            pd.api.types.is_numeric_dtype(dtype) or pd.api.types.is_datetime64_any_dtype(dtype)
+            or pd.api.types.is_timedelta64_dtype(dtype)
+            for dtype in df.dtypes
+        ]
+        fixed_columns = np.flatnonzero(fixed)
+        other_columns = np.flatnonzero(~np.asarray(fixed, dtype=bool))
+        if len(fixed_columns):
+            digest.update(pd.util.hash_pandas_object(df.iloc[:, fixed_columns], index=False).to_numpy().tobytes())
+        if len(other_columns) and len(df):
+            rows = min(len(df), ColumnProfiler.FINGERPRINT_ROWS)
+            positions = np.unique(np.linspace(0, len(df) - 1, rows).astype(np.int64))
+            sample = df.iloc[positions, other_columns]
+            digest.update(pd.util.hash_pandas_object(sample, index=False).to_numpy().tobytes())
+        return digest.hexdigest()
+
+    @staticmethod
+    def _column_stats(series: pd.Series) -> Dict[str, Any]:
+        """Calcula as estatísticas de uma única coluna"""
+        not_null = int(series.notna().sum())
+        approximate = len(series) > ColumnProfiler.APPROX_THRESHOLD
+        if approximate:
+            hashes = pd.util.hash_pandas_object(series.dropna(), index=False).to_numpy()
+            distinct = int(round(ColumnSketch(hashes, k=ColumnProfiler.SKETCH_SIZE).estimate_distinct()))
+        else:
+            distinct = int(series.nunique())
+
+        first_valid = series.first_valid_index()
+        return {
+            "Coluna": series.name,
+            "Tipo": str(series.dtype),
+            "Não Nulos": not_null,
+            "Nulos": len(series) - not_null,
+            "Valores Únicos": distinct,
+            "Únicos Aproximados": approximate,
+            "Exemplo": str(series.loc[first_valid]) if first_valid is not None else "N/A",
+            "Memória (MB)": series.memory_usage(deep=True, index=False) / 1024 / 1024,
+        }
+
+    @staticmethod
+    def _entry(df: pd.DataFrame) -> Dict[str, Any]:
+        """Retorna (criando se necessário) a entrada de cache do DataFrame"""
+        key = ColumnProfiler._fingerprint(df)
+        with ColumnProfiler._lock:
+            entry = ColumnProfiler._cache.get(key)
+            if entry is None:
+                entry = {"columns": {}, "duplicate_rows": None}
+                ColumnProfiler._cache[key] = entry
+                while len(ColumnProfiler._cache) > ColumnProfiler.MAX_ENTRIES:
+                    ColumnProfiler._cache.popitem(last=False)
+            else:
+                ColumnProfiler._cache.move_to_end(key)
+        return entry
+
+    @staticmethod
+    def profile(df: pd.DataFrame, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Perfil das colunas do DataFrame, calculando apenas o que ainda não está em cache.
+
+        Args:
+            df: DataFrame
+            columns: Colunas desejadas (None = todas)
+
+        Returns:
+            DataFrame com uma linha por coluna
+        """
+        entry = ColumnProfiler._entry(df)
+        columns = df.columns.tolist() if columns is None else columns
+        for col in columns:
+            if col not in entry["columns"]:
+                entry["columns"][col] = ColumnProfiler._column_stats(df[col])
+        return pd.DataFrame([entry["columns"][col] for col in columns])
+
+    @staticmethod
+    def column_stats(df: pd.DataFrame, column: str) -> Dict[str, Any]:
+        """
+        Estatísticas de uma única coluna.
+
+        Args:
+            df: DataFrame
+            column: Nome da coluna
+
+        Returns:
+            Dicionário com as estatísticas da coluna
+        """
+        entry = ColumnProfiler._entry(df)
+        if column not in entry["columns"]:
+            entry["columns"][column] = ColumnProfiler._column_stats(df[column])
+        return entry["columns"][column]
+
+    @staticmethod
+    def duplicate_rows(df: pd.DataFrame) -> int:
+        """
+        Quantidade de linhas duplicadas, comparando o hash de cada linha.
+
+        Args:
+            df: DataFrame
+
+        Returns:
+            Número de linhas repetidas
+        """
+        entry = ColumnProfiler._entry(df)
+        if entry["duplicate_rows"] is None:
+            row_hashes = pd.util.hash_pandas_object(df, index=False)
+            entry["duplicate_rows"] = int(row_hashes.duplicated().sum())
+        return entry["duplicate_rows"]
+
+    @staticmethod
+    def clear():
+        """Limpa o cache de perfis"""
+        with ColumnProfiler._lock:
+            ColumnProfiler._cache.clear()
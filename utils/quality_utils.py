@@ -0,0 +1,164 @@
+# utils/quality_utils.py - Relatório de qualidade dos números de processo
+
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.interval_utils import TOTAL_DIGITOS, intervalos_por_digito
+
+# Códigos de problema por linha. Cada código é um bit, então uma linha pode
+# acumular mais de um problema (ex.: sem ano e sem dígito).
+SEM_ANO = 1
+SEM_DIGITO = 2
+DIGITO_NAO_CONFIGURADO = 4
+DIGITO_VERIFICADOR_INVALIDO = 8
+FORMATO_NAO_RECONHECIDO = 16
+
+DESCRICOES = {
+    SEM_ANO: "Sem ano identificado",
+    SEM_DIGITO: "Sem dígito identificado",
+    DIGITO_NAO_CONFIGURADO: "Dígito sem servidor configurado",
+    DIGITO_VERIFICADOR_INVALIDO: "Dígito verificador inválido",
+    FORMATO_NAO_RECONHECIDO: "Formato não reconhecido",
+}
+
+# Mesmos formatos aceitos por extrair_componentes_numero
+_PADRAO_CNJ = r'\d{7}-\d{2}\.\d{4}\.\d\.\d{2}\.\d{4}'
+_PADRAO_805 = r'\d{7}-\d{2}\.\d{4}\.\d{3}\.\d{4}'
+
+
+def _digito_verificador_valido(canonicos: pd.Series) -> np.ndarray:
+    """
+    Confere o dígito verificador CNJ (módulo 97) de números com 20 dígitos.
+
+    O dígito DD de NNNNNNN-DD.AAAA.J.TR.OOOO é 98 - (NNNNNNNAAAAJTROOOO00 mod 97).
+    O número tem 20 dígitos, mais do que cabe em int64, então o resto é
+    calculado em blocos de até 9 dígitos.
+
+    Args:
+        canonicos: Números com exatamente 20 dígitos
+
+    Returns:
+        Array booleano, alinhado a canonicos
+    """
+    base = canonicos.str.slice(0, 7) + canonicos.str.slice(9, 20) + "00"
+    resto = np.zeros(len(base), dtype=np.int64)
+    for inicio, fim in ((0, 9), (9, 18), (18, 20)):
+        bloco = base.str.slice(inicio, fim).astype("int64").to_numpy()
+        resto = (resto * 10 ** (fim - inicio) + bloco) % 97
+    informado = canonicos.str.slice(7, 9).astype("int64").to_numpy()
+    return informado == 98 - resto
+
+
+class RelatorioQualidade:
+    """
+    Problemas de cada linha de um arquivo de processos, calculados de uma vez
+    para a coluna inteira.
+
+    Reaproveita as colunas "Dígito" e "Ano Processo" já calculadas, de modo que
+    o relatório concorda com o que os painéis mostram.
+    """
+
+    def __init__(self, numeros: pd.Series, digitos: pd.Series, anos: pd.Series,
+                 intervalos_servidores: Dict[str, List[List[int]]]):
+        """
+        Args:
+            numeros: Coluna dos números de processo
+            digitos: Coluna "Dígito" (0 = não identificado)
+            anos: Coluna "Ano Processo" (nulo = não identificado)
+            intervalos_servidores: Intervalos por servidor
+        """
+        texto = numeros.astype("string").str.strip()
+        apenas_digitos = texto.str.replace(r'\D', '', regex=True)
+        vinte_digitos = (apenas_digitos.str.len() == 20).fillna(False).to_numpy(dtype=bool)
+        formatado = (
+            texto.str.match(_PADRAO_CNJ) | texto.str.match(_PADRAO_805)
+        ).fillna(False).to_numpy(dtype=bool)
+
+        digitos = pd.to_numeric(digitos, errors="coerce").fillna(0).astype(np.int64).clip(0, TOTAL_DIGITOS - 1)
+        digitos = digitos.to_numpy()
+        sem_digito = digitos == 0
+        nao_configurado = ~sem_digito & (intervalos_por_digito(intervalos_servidores)[digitos] < 0)
+
+        verificador_invalido = np.zeros(len(texto), dtype=bool)
+        if vinte_digitos.any():
+            verificador_invalido[vinte_digitos] = ~_digito_verificador_valido(apenas_digitos[vinte_digitos])
+
+        codigos = np.zeros(len(texto), dtype=np.uint8)
+        codigos[anos.isna().to_numpy()] |= SEM_ANO
+        codigos[sem_digito] |= SEM_DIGITO
+        codigos[nao_configurado] |= DIGITO_NAO_CONFIGURADO
+        codigos[verificador_invalido] |= DIGITO_VERIFICADOR_INVALIDO
+        codigos[~(formatado | vinte_digitos)] |= FORMATO_NAO_RECONHECIDO
+
+        self.codigos = pd.Series(codigos, index=numeros.index, name="Problemas")
+
+    def mascara(self, problemas: int) -> pd.Series:
+        """
+        Linhas com algum dos problemas indicados.
+
+        Args:
+            problemas: Um código ou a combinação de códigos (ex.: SEM_DIGITO | DIGITO_NAO_CONFIGURADO)
+
+        Returns:
+            Série booleana
+        """
+        return (self.codigos & problemas) != 0
+
+    def contar(self, problemas: int) -> int:
+        """Quantidade de linhas com algum dos problemas indicados"""
+        return int(self.mascara(problemas).sum())
+
+    def descricoes(self) -> pd.Series:
+        """
+        Descrição dos problemas de cada linha (vazia quando não há problemas).
+
+        Returns:
+            Série de texto, com os problemas separados por "; "
+        """
+        texto = pd.Series("", index=self.codigos.index, dtype=object)
+        for codigo, descricao in DESCRICOES.items():
+            texto = texto + np.where(self.mascara(codigo), descricao + "; ", "")
+        return texto.str.rstrip("; ")
+
+    def resumo(self) -> pd.DataFrame:
+        """
+        Quantidade de linhas por problema, apenas dos problemas encontrados.
+
+        Returns:
+            DataFrame com as colunas "Código", "Problema", "Processos" e "Percentual"
+        """
+        total = len(self.codigos)
+        linhas = []
+        for codigo, descricao in DESCRICOES.items():
+            quantidade = self.contar(codigo)
+            if quantidade:
+                linhas.append({
+                    "Código": codigo,
+                    "Problema": descricao,
+                    "Processos": quantidade,
+                    "Percentual": round(100 * quantidade / total, 2)
+                })
+        return pd.DataFrame(linhas, columns=["Código", "Problema", "Processos", "Percentual"])
+
+    def exemplos(self, df: pd.DataFrame, colunas: Optional[List[str]] = None,
+                 linhas: int = 5) -> Dict[str, pd.DataFrame]:
+        """
+        Primeiras linhas de cada problema encontrado.
+
+        Args:
+            df: DataFrame alinhado às colunas usadas no relatório
+            colunas: Colunas exibidas (None = todas)
+            linhas: Quantidade de linhas por problema
+
+        Returns:
+            DataFrames de exemplo por descrição do problema
+        """
+        exemplos = {}
+        for codigo, descricao in DESCRICOES.items():
+            indices = self.codigos.index[self.mascara(codigo).to_numpy()][:linhas]
+            if len(indices):
+                exemplo = df.loc[indices]
+                exemplos[descricao] = exemplo[colunas] if colunas else exemplo
+        return exemplos
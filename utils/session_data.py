@@ -0,0 +1,293 @@
+# utils/session_data.py - DataFrames das sessões com limite de memória
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+try:
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow é opcional: sem ele os DataFrames vão para pickle
+    feather = None
+
+LIMITE_SESSAO_MB = int(os.environ.get("CENTRAL_LIMITE_SESSAO_MB", "512"))
+LIMITE_GLOBAL_MB = int(os.environ.get("CENTRAL_LIMITE_GLOBAL_MB", "2048"))
+PASTA_DESCARTE = os.path.join(tempfile.gettempdir(), "central_sessoes")
+# Sessões sem acesso há mais que isso (abas fechadas, recarregadas) são apagadas
+EXPIRACAO_SESSAO_MIN = int(os.environ.get("CENTRAL_EXPIRACAO_SESSAO_MIN", "60"))
+
+
+class _Registro:
+    """Um DataFrame guardado: em memória ou descarregado em disco"""
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.linhas = len(df)
+        self.tamanho = int(df.memory_usage(deep=True, index=True).sum())
+        self.caminho = None
+        self.ultimo_uso = time.monotonic()
+
+
+class GerenciadorDados:
+    """
+    Guarda os DataFrames de uma sessão respeitando limites de memória.
+
+    O tamanho de cada DataFrame (memory_usage profundo) é medido ao guardar.
+    Quando a sessão passa do seu limite, ou todas as sessões juntas passam do
+    limite global, os DataFrames usados há mais tempo são gravados em disco
+    (Feather, ou pickle sem pyarrow) e liberados da memória. Ao pedir um
+    DataFrame descarregado ele é relido do disco, sem diferença para quem chama.
+
+    Os registros ficam em um dicionário do processo, compartilhado por todas
+    as instâncias, para que o limite global enxergue todas as sessões.
+    Sessões sem acesso há mais de expiracao_min minutos são apagadas (memória
+    e arquivos), assim como pastas de sessões de execuções anteriores.
+    """
+
+    _sessoes: Dict[str, "OrderedDict[str, _Registro]"] = {}
+    _acessos: Dict[str, float] = {}
+    _pastas_verificadas: set = set()
+    _lock = threading.RLock()
+
+    def __init__(self, sessao: str, limite_sessao_mb: int = LIMITE_SESSAO_MB,
+                 limite_global_mb: int = LIMITE_GLOBAL_MB, pasta: str = PASTA_DESCARTE,
+                 expiracao_min: float = EXPIRACAO_SESSAO_MIN):
+        """
+        Args:
+            sessao: Identificador da sessão
+            limite_sessao_mb: Memória máxima da sessão, em MB
+            limite_global_mb: Memória máxima de todas as sessões, em MB
+            pasta: Pasta dos arquivos descarregados
+            expiracao_min: Minutos sem acesso até a sessão ser apagada
+        """
+        self.sessao = sessao
+        self.limite_sessao = limite_sessao_mb * 1024 * 1024
+        self.limite_global = limite_global_mb * 1024 * 1024
+        self.expiracao = expiracao_min * 60
+        self.pasta_raiz = pasta
+        self.pasta = os.path.join(pasta, sessao)
+        with self._lock:
+            self._limpar_orfas()
+            self._registros = self._sessoes.setdefault(sessao, OrderedDict())
+            self._expirar_sessoes()
+
+    # -------------------------------------------------------------------------
+    # Descarregar e recarregar
+    # -------------------------------------------------------------------------
+    @staticmethod
+    def _descarregar(registro: _Registro, pasta: str):
+        """Grava o DataFrame em disco e libera a memória"""
+        os.makedirs(pasta, exist_ok=True)
+        indice = registro.df.index
+        caminho = None
+        # O Feather só guarda o índice padrão (0, 1, 2...); os demais vão para pickle
+        if feather is not None and isinstance(indice, pd.RangeIndex) and indice.start == 0 and indice.step == 1:
+            caminho = os.path.join(pasta, f"{uuid.uuid4().hex}.feather")
+            try:
+                registro.df.to_feather(caminho, compression="uncompressed")
+            except Exception:
+                # Tipos que o Feather não aceita (ex.: colunas com tipos misturados)
+                if os.path.exists(caminho):
+                    os.remove(caminho)
+                caminho = None
+
+        if caminho is None:
+            caminho = os.path.join(pasta, f"{uuid.uuid4().hex}.pkl")
+            registro.df.to_pickle(caminho)
+
+        registro.caminho = caminho
+        registro.df = None
+
+    @staticmethod
+    def _recarregar(registro: _Registro):
+        """Relê um DataFrame descarregado"""
+        if registro.caminho.endswith(".feather"):
+            registro.df = feather.read_table(registro.caminho, memory_map=True).to_pandas()
+        else:
+            registro.df = pd.read_pickle(registro.caminho)
+        os.remove(registro.caminho)
+        registro.caminho = None
+
+    @staticmethod
+    def _remover_arquivo(registro: _Registro):
+        if registro.caminho and os.path.exists(registro.caminho):
+            os.remove(registro.caminho)
+
+    def _limpar_orfas(self):
+        """
+        Na primeira instância do processo com esta pasta, apaga as pastas de
+        sessões que não estão registradas (de execuções anteriores do servidor)
+        e que não foram alteradas dentro do prazo de expiração.
+        """
+        if self.pasta_raiz in self._pastas_verificadas:
+            return
+        self._pastas_verificadas.add(self.pasta_raiz)
+        if not os.path.isdir(self.pasta_raiz):
+            return
+        limite = time.time() - self.expiracao
+        for nome in os.listdir(self.pasta_raiz):
+            caminho = os.path.join(self.pasta_raiz, nome)
+            try:
+                orfa = nome not in self._sessoes and os.path.getmtime(caminho) < limite
+            except OSError:
+                continue
+            if orfa and os.path.isdir(caminho):
+                shutil.rmtree(caminho, ignore_errors=True)
+
+    def _expirar_sessoes(self):
+        """Apaga as sessões (registros e pasta) sem acesso dentro do prazo"""
+        agora = time.monotonic()
+        self._acessos[self.sessao] = agora
+        expiradas = [
+            sessao for sessao, acesso in self._acessos.items()
+            if sessao != self.sessao and agora - acesso > self.expiracao
+        ]
+        for sessao in expiradas:
+            self._sessoes.pop(sessao, None)
+            self._acessos.pop(sessao, None)
+            shutil.rmtree(os.path.join(self.pasta_raiz, sessao), ignore_errors=True)
+
+    def _aplicar_limites(self, manter: Optional[str] = None):
+        """Descarrega os DataFrames menos usados até os limites serem respeitados"""
+        self._expirar_sessoes()
+        em_memoria = [(nome, reg) for nome, reg in self._registros.items() if reg.df is not None]
+        uso_sessao = sum(reg.tamanho for _, reg in em_memoria)
+        for nome, registro in sorted(em_memoria, key=lambda item: item[1].ultimo_uso):
+            if uso_sessao <= self.limite_sessao:
+                break
+            if nome != manter:
+                self._descarregar(registro, self.pasta)
+                uso_sessao -= registro.tamanho
+
+        todos = [
+            (sessao, nome, reg)
+            for sessao, registros in self._sessoes.items()
+            for nome, reg in registros.items() if reg.df is not None
+        ]
+        uso_global = sum(reg.tamanho for _, _, reg in todos)
+        for sessao, nome, registro in sorted(todos, key=lambda item: item[2].ultimo_uso):
+            if uso_global <= self.limite_global:
+                break
+            if not (sessao == self.sessao and nome == manter):
+                self._descarregar(registro, os.path.join(self.pasta_raiz, sessao))
+                uso_global -= registro.tamanho
+
+    # -------------------------------------------------------------------------
+    # Interface
+    # -------------------------------------------------------------------------
+    def guardar(self, nome: str, df: pd.DataFrame):
+        """
+        Guarda (ou substitui) um DataFrame da sessão.
+
+        Args:
+            nome: Nome do DataFrame na sessão
+            df: DataFrame
+        """
+        with self._lock:
+            anterior = self._registros.pop(nome, None)
+            if anterior is not None:
+                self._remover_arquivo(anterior)
+            self._registros[nome] = _Registro(df)
+            self._aplicar_limites(manter=nome)
+
+    def obter(self, nome: str) -> Optional[pd.DataFrame]:
+        """
+        Retorna um DataFrame da sessão, relendo do disco se foi descarregado.
+
+        Args:
+            nome: Nome do DataFrame na sessão
+
+        Returns:
+            DataFrame ou None se não existir
+        """
+        with self._lock:
+            registro = self._registros.get(nome)
+            if registro is None:
+                return None
+            if registro.df is None:
+                self._recarregar(registro)
+            registro.ultimo_uso = time.monotonic()
+            df = registro.df
+            self._aplicar_limites(manter=nome)
+            return df
+
+    def contem(self, nome: str) -> bool:
+        """Indica se a sessão tem um DataFrame com esse nome"""
+        with self._lock:
+            return nome in self._registros
+
+    def remover(self, *nomes: str):
+        """Remove DataFrames da sessão (nomes inexistentes são ignorados)"""
+        with self._lock:
+            for nome in nomes:
+                registro = self._registros.pop(nome, None)
+                if registro is not None:
+                    self._remover_arquivo(registro)
+
+    def remover_prefixo(self, prefixo: str):
+        """Remove os DataFrames cujo nome começa com o prefixo"""
+        with self._lock:
+            self.remover(*[nome for nome in self._registros if nome.startswith(prefixo)])
+
+    def nomes(self, prefixo: str = "") -> List[str]:
+        """Nomes dos DataFrames da sessão, na ordem em que foram guardados"""
+        with self._lock:
+            return [nome for nome in self._registros if nome.startswith(prefixo)]
+
+    def limpar(self):
+        """Remove todos os DataFrames e arquivos da sessão"""
+        with self._lock:
+            self._registros.clear()
+            self._sessoes.pop(self.sessao, None)
+            self._registros = self._sessoes.setdefault(self.sessao, OrderedDict())
+        shutil.rmtree(self.pasta, ignore_errors=True)
+
+    def uso(self) -> Dict[str, Any]:
+        """
+        Uso de memória e disco da sessão e de todas as sessões.
+
+        Returns:
+            Dicionário com memória e disco da sessão, memória global e limites, em MB
+        """
+        mb = 1024 * 1024
+        with self._lock:
+            memoria_sessao = sum(reg.tamanho for reg in self._registros.values() if reg.df is not None)
+            disco_sessao = sum(reg.tamanho for reg in self._registros.values() if reg.df is None)
+            memoria_global = sum(
+                reg.tamanho for registros in self._sessoes.values()
+                for reg in registros.values() if reg.df is not None
+            )
+            sessoes = sum(1 for registros in self._sessoes.values() if registros)
+        return {
+            "memoria_sessao_mb": memoria_sessao / mb,
+            "disco_sessao_mb": disco_sessao / mb,
+            "limite_sessao_mb": self.limite_sessao / mb,
+            "memoria_global_mb": memoria_global / mb,
+            "limite_global_mb": self.limite_global / mb,
+            "sessoes": sessoes,
+        }
+
+    def tabela_uso(self) -> pd.DataFrame:
+        """
+        Um DataFrame por linha: nome, linhas, memória e onde está guardado.
+
+        Returns:
+            DataFrame com as colunas "Nome", "Linhas", "Memória (MB)" e "Local"
+        """
+        with self._lock:
+            linhas = [
+                {
+                    "Nome": nome,
+                    "Linhas": reg.linhas,
+                    "Memória (MB)": round(reg.tamanho / 1024 / 1024, 2),
+                    "Local": "memória" if reg.df is not None else "disco"
+                }
+                for nome, reg in self._registros.items()
+            ]
+        return pd.DataFrame(linhas, columns=["Nome", "Linhas", "Memória (MB)", "Local"])
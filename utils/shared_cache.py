@@ -0,0 +1,164 @@
+# utils/shared_cache.py - Cache em memória compartilhado entre sessões
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+import pandas as pd
+
+LIMITE_PADRAO_MB = int(os.environ.get("CENTRAL_CACHE_MEMORIA_MB", "2048"))
+# Tempo sem uso após o qual a reserva de uma sessão deixa de proteger a entrada
+# (sessões fechadas no navegador não avisam o servidor)
+VALIDADE_RESERVA_SEGUNDOS = 2 * 60 * 60
+
+
+def _tamanho(valor: Any) -> int:
+    """Memória ocupada por um DataFrame ou Series (outros valores contam 0)"""
+    if isinstance(valor, pd.DataFrame):
+        return int(valor.memory_usage(deep=True, index=True).sum())
+    if isinstance(valor, pd.Series):
+        return int(valor.memory_usage(deep=True, index=True))
+    return 0
+
+
+class CacheCompartilhado:
+    """
+    Cache do processo para planilhas lidas e colunas calculadas, compartilhado
+    por todas as sessões do Streamlit.
+
+    Cada sessão reserva as entradas que está usando, em "vagas" nomeadas (ex.:
+    o arquivo base do Dashboard): reservar outra chave na mesma vaga libera a
+    anterior. Entradas reservadas nunca são removidas; as demais são removidas
+    da menos usada para a mais usada quando o total passa do limite de memória.
+
+    Os valores são compartilhados, não copiados: quem os recebe não deve
+    alterá-los no lugar (use assign/copy para derivar novos DataFrames).
+    """
+
+    def __init__(self, limite_mb: int = LIMITE_PADRAO_MB,
+                 validade_reserva: float = VALIDADE_RESERVA_SEGUNDOS):
+        """
+        Args:
+            limite_mb: Memória máxima das entradas sem reserva, em MB
+            validade_reserva: Segundos sem uso até uma reserva expirar
+        """
+        self.limite_bytes = limite_mb * 1024 * 1024
+        self.validade_reserva = validade_reserva
+        self._entradas: "OrderedDict[Hashable, Dict[str, Any]]" = OrderedDict()
+        # (sessão, vaga) -> [chave, último uso]
+        self._reservas: Dict[Any, list] = {}
+        self._calculando: Dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _referencias(self) -> Dict[Hashable, int]:
+        """Quantidade de reservas válidas por chave"""
+        agora = time.monotonic()
+        referencias = {}
+        for chave, ultimo_uso in self._reservas.values():
+            if agora - ultimo_uso <= self.validade_reserva:
+                referencias[chave] = referencias.get(chave, 0) + 1
+        return referencias
+
+    def _remover_excedente(self):
+        """Remove entradas sem reserva, das menos usadas, até caber no limite"""
+        referencias = self._referencias()
+        total = sum(entrada["tamanho"] for entrada in self._entradas.values())
+        for chave in list(self._entradas.keys()):
+            if total <= self.limite_bytes:
+                break
+            if referencias.get(chave):
+                continue
+            total -= self._entradas.pop(chave)["tamanho"]
+
+    def _reservar(self, chave: Hashable, sessao: Optional[str], vaga: Optional[Hashable]):
+        if sessao is not None:
+            self._reservas[(sessao, vaga)] = [chave, time.monotonic()]
+
+    def obter(self, chave: Hashable, calcular: Callable[[], Any], sessao: Optional[str] = None,
+              vaga: Optional[Hashable] = None) -> Any:
+        """
+        Retorna o valor da chave, calculando-o uma única vez mesmo que várias
+        sessões o peçam ao mesmo tempo.
+
+        Args:
+            chave: Identificador do valor (ex.: hash do arquivo + configuração)
+            calcular: Função sem argumentos que produz o valor
+            sessao: Sessão que passa a reservar o valor (None = sem reserva)
+            vaga: Vaga da reserva; a chave reservada antes nessa vaga é liberada
+
+        Returns:
+            O valor em cache ou recém-calculado
+        """
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is not None:
+                self._entradas.move_to_end(chave)
+                self._reservar(chave, sessao, vaga)
+                return entrada["valor"]
+            calculo = self._calculando.setdefault(chave, threading.Lock())
+
+        try:
+            with calculo:
+                # Outra sessão pode ter terminado o mesmo cálculo enquanto esperávamos
+                with self._lock:
+                    entrada = self._entradas.get(chave)
+                if entrada is None:
+                    valor = calcular()
+                    entrada = {"valor": valor, "tamanho": _tamanho(valor)}
+                    with self._lock:
+                        self._entradas[chave] = entrada
+                        self._entradas.move_to_end(chave)
+        finally:
+            with self._lock:
+                self._calculando.pop(chave, None)
+
+        with self._lock:
+            self._reservar(chave, sessao, vaga)
+            self._remover_excedente()
+        return entrada["valor"]
+
+    def liberar(self, sessao: str, vaga: Optional[Hashable] = None):
+        """
+        Libera as reservas de uma sessão.
+
+        Args:
+            sessao: Sessão
+            vaga: Vaga a liberar (None = todas as vagas da sessão)
+        """
+        with self._lock:
+            for reserva in list(self._reservas.keys()):
+                if reserva[0] == sessao and (vaga is None or reserva[1] == vaga):
+                    del self._reservas[reserva]
+            self._remover_excedente()
+
+    def estatisticas(self) -> Dict[str, Any]:
+        """Quantidade de entradas, memória ocupada e sessões com reserva"""
+        with self._lock:
+            referencias = self._referencias()
+            return {
+                "entradas": len(self._entradas),
+                "memoria_mb": sum(entrada["tamanho"] for entrada in self._entradas.values()) / 1024 / 1024,
+                "entradas_reservadas": sum(1 for chave in self._entradas if referencias.get(chave)),
+                "sessoes": len({sessao for sessao, _ in self._reservas}),
+            }
+
+    def limpar(self):
+        """Remove todas as entradas e reservas"""
+        with self._lock:
+            self._entradas.clear()
+            self._reservas.clear()
+
+
+_cache_compartilhado = None
+_cache_lock = threading.Lock()
+
+
+def cache_compartilhado() -> CacheCompartilhado:
+    """Cache único do processo (limite de memória da variável CENTRAL_CACHE_MEMORIA_MB)"""
+    global _cache_compartilhado
+    with _cache_lock:
+        if _cache_compartilhado is None:
+            _cache_compartilhado = CacheCompartilhado()
+        return _cache_compartilhado
@@ -0,0 +1,90 @@
+# utils/sketch_utils.py - Sketches compactos para estimar sobreposição de colunas
+
+import numpy as np
+from typing import Optional
+
+# Maior valor de um hash de 64 bits, usado para normalizar os hashes em [0, 1]
+_HASH_MAX = float(2 ** 64)
+
+
+class ColumnSketch:
+    """
+    Sketch bottom-k (KMV, variante de MinHash de uma permutação) de uma coluna.
+
+    Guarda apenas os k menores hashes distintos dos valores. Com isso estima o
+    número de valores distintos e a similaridade de Jaccard entre duas colunas
+    sem comparar os valores completos.
+    """
+
+    def __init__(self, hashes: np.ndarray, k: int = 256):
+        """
+        Args:
+            hashes: Hashes uint64 dos valores (nulos já removidos)
+            k: Quantidade de menores hashes mantidos
+        """
+        self.k = k
+        distintos = np.unique(np.asarray(hashes, dtype=np.uint64))
+        self.minimos = distintos[:k]
+        self.exato = len(distintos) <= k
+
+    def estimate_distinct(self) -> float:
+        """
+        Estima o número de valores distintos da coluna.
+
+        Returns:
+            Contagem exata se a coluna tem até k distintos, senão a estimativa KMV
+        """
+        if self.exato:
+            return float(len(self.minimos))
+        return (self.k - 1) / (float(self.minimos[-1]) / _HASH_MAX)
+
+    def estimate_jaccard(self, other: "ColumnSketch") -> float:
+        """
+        Estima a similaridade de Jaccard entre os valores distintos de duas colunas.
+
+        Args:
+            other: Sketch da outra coluna
+
+        Returns:
+            Estimativa entre 0 e 1
+        """
+        k = min(self.k, other.k)
+        uniao = np.union1d(self.minimos, other.minimos)[:k]
+        if len(uniao) == 0:
+            return 0.0
+        comuns = np.intersect1d(self.minimos, other.minimos, assume_unique=True)
+        return len(np.intersect1d(uniao, comuns, assume_unique=True)) / len(uniao)
+
+    def estimate_intersection(self, other: "ColumnSketch") -> float:
+        """
+        Estima quantos valores distintos as duas colunas têm em comum.
+
+        Args:
+            other: Sketch da outra coluna
+
+        Returns:
+            Estimativa da interseção
+        """
+        if self.exato and other.exato:
+            return float(len(np.intersect1d(self.minimos, other.minimos, assume_unique=True)))
+
+        jaccard = self.estimate_jaccard(other)
+        d1 = self.estimate_distinct()
+        d2 = other.estimate_distinct()
+        # |A ∩ B| = J * |A ∪ B| e |A ∪ B| = (|A| + |B|) / (1 + J)
+        return jaccard * (d1 + d2) / (1 + jaccard)
+
+    def estimate_containment(self, other: "ColumnSketch") -> Optional[float]:
+        """
+        Estima a fração dos valores da menor coluna que existem na outra.
+
+        Args:
+            other: Sketch da outra coluna
+
+        Returns:
+            Estimativa entre 0 e 1, ou None se alguma coluna está vazia
+        """
+        menor = min(self.estimate_distinct(), other.estimate_distinct())
+        if menor == 0:
+            return None
+        return min(self.estimate_intersection(other) / menor, 1.0)